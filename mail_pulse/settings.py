@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django_bootstrap5",
+    "django_apscheduler",
     "users.apps.UsersConfig",
     "mailings.apps.MailingsConfig",
 ]
@@ -109,6 +110,9 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 EMAIL_BACKEND = config("EMAIL_BACKEND", cast=str)
+TRANSACTIONAL_EMAIL_BACKEND = config(
+    "TRANSACTIONAL_EMAIL_BACKEND", default=None
+)
 EMAIL_HOST = config("EMAIL_HOST", cast=str)
 EMAIL_PORT = config("EMAIL_PORT", cast=int)
 EMAIL_USE_SSL = config("EMAIL_USE_SSL", cast=bool)
@@ -116,6 +120,131 @@ EMAIL_HOST_USER = config("EMAIL_HOST_USER", cast=str)
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", cast=str)
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+MAILING_SEND_BATCH_SIZE = config(
+    "MAILING_SEND_BATCH_SIZE", default=100, cast=int
+)
+MAILING_MAX_MESSAGES_PER_CONNECTION = config(
+    "MAILING_MAX_MESSAGES_PER_CONNECTION", default=1000, cast=int
+)
+MAILING_WORKERS = config("MAILING_WORKERS", default=1, cast=int)
+MAILING_DELIVERY_ENGINE = config("MAILING_DELIVERY_ENGINE", default="sync")
+MAILING_ASYNC_SESSIONS = config("MAILING_ASYNC_SESSIONS", default=10, cast=int)
+MAILING_RETRY_MAX_ATTEMPTS = config(
+    "MAILING_RETRY_MAX_ATTEMPTS", default=5, cast=int
+)
+MAILING_RETRY_BASE_DELAY = config(
+    "MAILING_RETRY_BASE_DELAY", default=60, cast=float
+)
+MAILING_RETRY_MAX_DELAY = config(
+    "MAILING_RETRY_MAX_DELAY", default=3600, cast=float
+)
+MAILING_RATE_LIMIT_PER_HOST = config(
+    "MAILING_RATE_LIMIT_PER_HOST", default=0, cast=float
+)
+MAILING_RATE_LIMIT_PER_OWNER = config(
+    "MAILING_RATE_LIMIT_PER_OWNER", default=0, cast=float
+)
+MAILING_RATE_LIMIT_BURST = config(
+    "MAILING_RATE_LIMIT_BURST", default=0, cast=float
+)
+MAILING_RATE_LIMIT_LEASE = config(
+    "MAILING_RATE_LIMIT_LEASE", default=0.1, cast=float
+)
+MAILING_RCPT_BATCH_SIZE = config(
+    "MAILING_RCPT_BATCH_SIZE", default=1, cast=int
+)
+MAILING_RCPT_GROUP_BY_DOMAIN = config(
+    "MAILING_RCPT_GROUP_BY_DOMAIN", default=False, cast=bool
+)
+MAILING_SMTP_POOL_SIZE = config("MAILING_SMTP_POOL_SIZE", default=10, cast=int)
+MAILING_SMTP_POOL_MAX_IDLE = config(
+    "MAILING_SMTP_POOL_MAX_IDLE", default=60, cast=float
+)
+MAILING_SMTP_POOL_HEALTH_CHECK_INTERVAL = config(
+    "MAILING_SMTP_POOL_HEALTH_CHECK_INTERVAL", default=10, cast=float
+)
+MAILING_SMTP_POOL_TIMEOUT = config(
+    "MAILING_SMTP_POOL_TIMEOUT", default=30, cast=float
+)
+MAILING_SMTP_POOL_RESERVED_TRANSACTIONAL = config(
+    "MAILING_SMTP_POOL_RESERVED_TRANSACTIONAL", default=2, cast=int
+)
+MAILING_SMTP_POOL_RESERVED_MANUAL = config(
+    "MAILING_SMTP_POOL_RESERVED_MANUAL", default=2, cast=int
+)
+MAILING_SMTP_LANE_SLOTS = config(
+    "MAILING_SMTP_LANE_SLOTS", default=10, cast=int
+)
+MAILING_SMTP_LANE_SLOT_TTL = config(
+    "MAILING_SMTP_LANE_SLOT_TTL", default=60, cast=float
+)
+MAILING_SCHEDULER_INTERVAL = config(
+    "MAILING_SCHEDULER_INTERVAL", default=60, cast=int
+)
+MAILING_SCHEDULER_CONCURRENCY = config(
+    "MAILING_SCHEDULER_CONCURRENCY", default=4, cast=int
+)
+MAILING_CLAIM_TIMEOUT = config("MAILING_CLAIM_TIMEOUT", default=900, cast=int)
+MAILING_SENDER_LEASE_TIMEOUT = config(
+    "MAILING_SENDER_LEASE_TIMEOUT", default=60, cast=float
+)
+MAILING_SENDER_HEARTBEAT_INTERVAL = config(
+    "MAILING_SENDER_HEARTBEAT_INTERVAL", default=10, cast=float
+)
+MAILING_SENDER_POLL_INTERVAL = config(
+    "MAILING_SENDER_POLL_INTERVAL", default=5, cast=float
+)
+MAILING_JOB_WORKERS = config("MAILING_JOB_WORKERS", default=4, cast=int)
+MAILING_JOB_POLL_INTERVAL = config(
+    "MAILING_JOB_POLL_INTERVAL", default=1, cast=float
+)
+MAILING_JOB_MAX_ATTEMPTS = config(
+    "MAILING_JOB_MAX_ATTEMPTS", default=3, cast=int
+)
+MAILING_JOB_RETRY_DELAY = config(
+    "MAILING_JOB_RETRY_DELAY", default=30, cast=float
+)
+MAILING_PROGRESS_INTERVAL = config(
+    "MAILING_PROGRESS_INTERVAL", default=1, cast=float
+)
+MAILING_PROGRESS_RATE_WINDOW = config(
+    "MAILING_PROGRESS_RATE_WINDOW", default=30, cast=float
+)
+MAILING_PROGRESS_STREAM_TIMEOUT = config(
+    "MAILING_PROGRESS_STREAM_TIMEOUT", default=300, cast=float
+)
+MAILING_SPOOL_DIR = config(
+    "MAILING_SPOOL_DIR", default=str(BASE_DIR / "spool")
+)
+MAILING_SPOOL_SEGMENT_SIZE = config(
+    "MAILING_SPOOL_SEGMENT_SIZE", default=4 * 1024 * 1024, cast=int
+)
+MAILING_SPOOL_SEGMENT_AGE = config(
+    "MAILING_SPOOL_SEGMENT_AGE", default=1, cast=float
+)
+MAILING_SPOOL_FSYNC_INTERVAL_MS = config(
+    "MAILING_SPOOL_FSYNC_INTERVAL_MS", default=20, cast=int
+)
+MAILING_SPOOL_POLL_INTERVAL = config(
+    "MAILING_SPOOL_POLL_INTERVAL", default=1, cast=float
+)
+MAILING_FAIR_QUANTUM = config("MAILING_FAIR_QUANTUM", default=1000, cast=int)
+MAILING_FAIR_OWNER_CONCURRENCY = config(
+    "MAILING_FAIR_OWNER_CONCURRENCY", default=0, cast=int
+)
+MAILING_SWEEP_INTERVAL = config(
+    "MAILING_SWEEP_INTERVAL", default=300, cast=int
+)
+MAILING_SWEEP_BATCH_SIZE = config(
+    "MAILING_SWEEP_BATCH_SIZE", default=1000, cast=int
+)
+MAILING_ATTEMPT_LOG_BATCH_SIZE = config(
+    "MAILING_ATTEMPT_LOG_BATCH_SIZE", default=500, cast=int
+)
+MAILING_ATTEMPT_LOG_FLUSH_MS = config(
+    "MAILING_ATTEMPT_LOG_FLUSH_MS", default=1000, cast=int
+)
+
 AUTH_USER_MODEL = "users.User"
 LOGIN_URL = "/users/login/"
 LOGIN_REDIRECT_URL = "/"
@@ -1,6 +1,17 @@
 from django.contrib import admin
 
-from mailings.models import Mailing, MailingAttempt, Message, Recipient
+from mailings.models import (
+    Job,
+    LaneSlot,
+    Mailing,
+    MailingAttempt,
+    Message,
+    OutboxEntry,
+    OwnerShare,
+    RateLimitBucket,
+    Recipient,
+    SenderWorker,
+)
 
 
 @admin.register(Recipient)
@@ -35,5 +46,79 @@ class MailingAttemptAdmin(admin.ModelAdmin):
     """Админка для попыток рассылки."""
 
     list_display = ("mailing", "status", "attempt_time")
+    list_filter = ("status", "owner")
+    search_fields = ("mailing__message__subject",)
+
+
+@admin.register(OutboxEntry)
+class OutboxEntryAdmin(admin.ModelAdmin):
+    """Админка для очереди писем."""
+
+    list_display = (
+        "mailing",
+        "recipient",
+        "status",
+        "attempts",
+        "leased_by",
+        "sent_at",
+    )
     list_filter = ("status", "mailing__owner")
+    search_fields = ("recipient__email",)
+    raw_id_fields = ("mailing", "recipient")
+
+
+@admin.register(SenderWorker)
+class SenderWorkerAdmin(admin.ModelAdmin):
+    """Админка для реестра отправителей."""
+
+    list_display = ("name", "hostname", "pid", "started_at", "heartbeat_at")
+    search_fields = ("name", "hostname")
+
+
+@admin.register(OwnerShare)
+class OwnerShareAdmin(admin.ModelAdmin):
+    """Админка для долей владельцев в отправке."""
+
+    list_display = ("owner", "weight", "max_concurrent")
+    search_fields = ("owner__email",)
+    raw_id_fields = ("owner",)
+
+
+@admin.register(RateLimitBucket)
+class RateLimitBucketAdmin(admin.ModelAdmin):
+    """Админка для общих ограничений скорости."""
+
+    list_display = ("scope", "key", "rate", "capacity", "reserved")
+    list_filter = ("scope",)
+
+
+@admin.register(LaneSlot)
+class LaneSlotAdmin(admin.ModelAdmin):
+    """Админка для общих мест SMTP-соединений."""
+
+    list_display = ("server", "number", "lane", "expires_at")
+    list_filter = ("server", "lane")
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Админка для очереди задач."""
+
+    list_display = (
+        "mailing",
+        "kind",
+        "status",
+        "attempts",
+        "run_after",
+        "locked_by",
+        "finished_at",
+    )
+    list_filter = ("status", "kind")
     search_fields = ("mailing__message__subject",)
+    raw_id_fields = ("mailing",)
+    actions = ("requeue",)
+
+    @admin.action(description="Вернуть невыполненные задачи в очередь")
+    def requeue(self, request, queryset) -> None:
+        requeued = Job.objects.requeue(queryset)
+        self.message_user(request, f"Возвращено в очередь: {requeued}")
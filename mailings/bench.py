@@ -0,0 +1,281 @@
+"""Бенчмарк скорости отправки рассылок."""
+
+import statistics
+import time
+import tracemalloc
+import uuid
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass
+from typing import Iterator
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from mailings.constants import OutboxStatus
+from mailings.delivery import BackgroundSMTPSink
+from mailings.models import Mailing, Message, Recipient
+
+BENCH_BACKENDS: tuple[str, ...] = ("locmem", "smtp")
+LOCMEM_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+SMTP_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+COMPARED_METRICS: tuple[str, ...] = (
+    "messages_per_second",
+    "p50_ms",
+    "p99_ms",
+    "queries",
+    "peak_memory_kb",
+)
+HIGHER_IS_BETTER: frozenset[str] = frozenset({"messages_per_second"})
+
+
+@dataclass
+class BenchmarkResult:
+    """Результат одного прогона бенчмарка."""
+
+    backend: str
+    recipients: int
+    sent: int
+    duration: float
+    messages_per_second: float
+    p50_ms: float
+    p99_ms: float
+    queries: int
+    peak_memory_kb: float
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class TimedEmailBackend(BaseEmailBackend):
+    """
+    Обёртка над почтовым бэкендом, замеряющая время каждого письма.
+
+    Оборачиваемый бэкенд задаётся атрибутом класса `target`, замеры
+    в секундах накапливаются в `latencies`.
+    """
+
+    target: str = LOCMEM_BACKEND
+    latencies: list[float] = []
+
+    def __init__(self, fail_silently: bool = False, **kwargs) -> None:
+        super().__init__(fail_silently=fail_silently)
+        self._backend = get_connection(
+            self.target, fail_silently=fail_silently, **kwargs
+        )
+
+    @property
+    def connection(self):
+        """SMTP-соединение оборачиваемого бэкенда, если оно есть."""
+        return getattr(self._backend, "connection", None)
+
+    def open(self) -> bool | None:
+        return self._backend.open()
+
+    def close(self) -> None:
+        self._backend.close()
+
+    def send_messages(self, email_messages) -> int:
+        started = time.perf_counter()
+        try:
+            return self._backend.send_messages(email_messages)
+        finally:
+            if email_messages:
+                elapsed = time.perf_counter() - started
+                share = elapsed / len(email_messages)
+                self.latencies.extend([share] * len(email_messages))
+
+
+class QueryCounter:
+    """Считает SQL-запросы; подключается `connection.execute_wrapper`."""
+
+    def __init__(self) -> None:
+        self.count: int = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values: list[float], percent: int) -> float:
+    """Возвращает перцентиль значений; 0, если значений нет."""
+    if len(values) < 2:
+        return values[0] if values else 0.0
+
+    cut_points = statistics.quantiles(values, n=100, method="inclusive")
+    return cut_points[percent - 1]
+
+
+def create_mailing(recipients: int) -> Mailing:
+    """Создаёт рассылку на `recipients` сгенерированных получателей."""
+    tag = uuid.uuid4().hex[:8]
+    owner = get_user_model().objects.create_user(
+        email=f"bench-{tag}@example.com",
+        username=f"bench-{tag}",
+        password=uuid.uuid4().hex,
+    )
+    message = Message.objects.create(
+        subject="Бенчмарк",
+        body="Текст письма. " * 50,
+        owner=owner,
+    )
+    mailing = Mailing.objects.create(
+        start_time=timezone.now(),
+        end_time=timezone.now() + timezone.timedelta(days=1),
+        message=message,
+        owner=owner,
+    )
+    created = Recipient.objects.bulk_create(
+        (
+            Recipient(
+                email=f"{tag}-{index}@example.com",
+                last_name="Иванов",
+                first_name="Иван",
+                owner=owner,
+            )
+            for index in range(recipients)
+        ),
+        batch_size=1000,
+    )
+    Mailing.recipients.through.objects.bulk_create(
+        (
+            Mailing.recipients.through(
+                mailing_id=mailing.pk,
+                recipient_id=recipient.pk,
+            )
+            for recipient in created
+        ),
+        batch_size=1000,
+    )
+    return mailing
+
+
+@contextmanager
+def email_backend(backend: str) -> Iterator[None]:
+    """
+    Направляет почту через `TimedEmailBackend`.
+
+    Бэкенд `locmem` хранит письма в памяти, `smtp` отправляет их
+    в локальный `SMTPSink`, запущенный на время бенчмарка.
+    """
+    overrides = {"EMAIL_BACKEND": "mailings.bench.TimedEmailBackend"}
+    TimedEmailBackend.latencies = []
+    TimedEmailBackend.target = LOCMEM_BACKEND
+
+    with ExitStack() as stack:
+        if backend == "smtp":
+            sink = stack.enter_context(BackgroundSMTPSink()).start()
+            TimedEmailBackend.target = SMTP_BACKEND
+            overrides.update(
+                EMAIL_HOST=sink.host,
+                EMAIL_PORT=sink.port,
+                EMAIL_USE_SSL=False,
+                EMAIL_USE_TLS=False,
+            )
+        stack.enter_context(override_settings(**overrides))
+        yield
+
+    mail.outbox = []
+
+
+def run_benchmark(recipients: int, backend: str = "locmem") -> BenchmarkResult:
+    """
+    Отправляет рассылку на `recipients` получателей и замеряет отправку.
+
+    Данные создаются в транзакции, которая затем откатывается. Пиковая
+    память считается `tracemalloc` в том же прогоне, поэтому скорость
+    включает его накладные расходы — сравнивать её стоит только
+    с результатами этого же бенчмарка.
+    """
+    counter = QueryCounter()
+
+    with transaction.atomic():
+        mailing = create_mailing(recipients)
+
+        with email_backend(backend), connection.execute_wrapper(counter):
+            tracemalloc.start()
+            started = time.perf_counter()
+            try:
+                mailing.send_mailing()
+                duration = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        sent = mailing.outbox.filter(status=OutboxStatus.SENT).count()
+        transaction.set_rollback(True)
+
+    latencies = TimedEmailBackend.latencies
+    return BenchmarkResult(
+        backend=backend,
+        recipients=recipients,
+        sent=sent,
+        duration=round(duration, 3),
+        messages_per_second=round(sent / duration, 1),
+        p50_ms=round(percentile(latencies, 50) * 1000, 3),
+        p99_ms=round(percentile(latencies, 99) * 1000, 3),
+        queries=counter.count,
+        peak_memory_kb=round(peak / 1024, 1),
+    )
+
+
+def is_regression(
+    metric: str,
+    value: float,
+    expected: float,
+    tolerance: float,
+) -> bool:
+    """Проверяет, хуже ли значение метрики базового больше допуска."""
+    if metric in HIGHER_IS_BETTER:
+        return value < expected * (1 - tolerance)
+    return value > expected * (1 + tolerance)
+
+
+def compare_result(
+    actual: dict,
+    expected: dict,
+    tolerance: float,
+) -> list[str]:
+    """Возвращает регрессии одного прогона относительно базового."""
+    backend = actual["backend"]
+
+    if (
+        expected.get("recipients", actual["recipients"])
+        != actual["recipients"]
+    ):
+        return [
+            f"{backend}: в базовом прогоне {expected['recipients']} "
+            f"получателей, в текущем {actual['recipients']}"
+        ]
+
+    return [
+        f"{backend}.{metric}: {actual[metric]} (база {expected[metric]})"
+        for metric in COMPARED_METRICS
+        if metric in expected
+        and is_regression(metric, actual[metric], expected[metric], tolerance)
+    ]
+
+
+def find_regressions(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    tolerance: float,
+) -> list[str]:
+    """
+    Сравнивает результаты с базовыми и возвращает список регрессий.
+
+    Сравниваются только бэкенды и метрики, присутствующие в обоих.
+    """
+    regressions = []
+
+    for backend, expected in baseline.items():
+        if backend in results:
+            regressions += compare_result(
+                results[backend], expected, tolerance
+            )
+
+    return regressions
@@ -8,9 +8,23 @@ FIRST_NAME_LEN: int = 100
 PATRONYMIC_LEN: int = 100
 SUBJECT_LEN: int = 255
 STATUS_LEN: int = 20
+WORKER_NAME_LEN: int = 255
+JOB_KIND_LEN: int = 50
+SLOT_HOLDER_LEN: int = 32
 
 DEFAULT_PAGE_SIZE: int = 5
 
+RECIPIENT_DELIVERY_FIELDS: tuple[str, ...] = (
+    "email",
+    "last_name",
+    "first_name",
+    "patronymic",
+)
+MERGE_FIELDS: frozenset[str] = frozenset(
+    (*RECIPIENT_DELIVERY_FIELDS, "full_name")
+)
+TEMPLATE_CACHE_SIZE: int = 256
+
 
 class MailingStatus(TextChoices):
     """Статусы рассылки."""
@@ -26,3 +40,42 @@ class AttemptStatus(TextChoices):
 
     SUCCESS = ("success", "Успешно")
     FAILED = ("failed", "Не успешно")
+
+
+class OutboxStatus(TextChoices):
+    """Статусы письма в очереди рассылки."""
+
+    PENDING = ("pending", "Ожидает отправки")
+    SENDING = ("sending", "Отправляется")
+    SENT = ("sent", "Отправлено")
+    FAILED = ("failed", "Не отправлено")
+
+
+class DeliveryEngine(TextChoices):
+    """Способы доставки писем рассылки."""
+
+    SYNC = ("sync", "Синхронная")
+    ASYNC = ("async", "Асинхронная")
+
+
+class JobKind(TextChoices):
+    """Виды фоновых задач."""
+
+    SEND_MAILING = ("send_mailing", "Отправка рассылки")
+
+
+class JobStatus(TextChoices):
+    """Статусы фоновой задачи."""
+
+    QUEUED = ("queued", "В очереди")
+    RUNNING = ("running", "Выполняется")
+    DONE = ("done", "Выполнена")
+    DEAD = ("dead", "Не выполнена")
+
+
+class Lane(TextChoices):
+    """Полосы доставки писем в порядке убывания приоритета."""
+
+    TRANSACTIONAL = ("transactional", "Служебные письма")
+    MANUAL = ("manual", "Ручная отправка")
+    BULK = ("bulk", "Рассылки по расписанию")
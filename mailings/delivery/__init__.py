@@ -0,0 +1,53 @@
+from .aiodelivery import AsyncDelivery
+from .aiosmtp import AsyncSMTPClient
+from .connection import ConnectionDelivery, DeliveryResult
+from .engines import get_delivery
+from .mime import (
+    GroupEmailMessage,
+    MessageBuilder,
+    MessagePayload,
+    PreparedEmailMessage,
+)
+from .parallel import ThreadPoolDelivery
+from .pool import PooledEmailBackend, SMTPConnectionPool, smtp_pools
+from .ratelimit import (
+    RateLimit,
+    SharedTokenBucket,
+    TokenBucket,
+    rate_limits,
+)
+from .retry import RetryPolicy, is_transient_error
+from .sink import BackgroundSMTPSink, SMTPSink
+from .spool import SpoolEmailBackend, SpoolFlusher
+from .templates import CompiledTemplate, MessageTemplate, templates
+from .writers import BulkWriter
+
+__all__ = [
+    "AsyncDelivery",
+    "AsyncSMTPClient",
+    "BackgroundSMTPSink",
+    "BulkWriter",
+    "CompiledTemplate",
+    "ConnectionDelivery",
+    "DeliveryResult",
+    "GroupEmailMessage",
+    "MessageBuilder",
+    "MessagePayload",
+    "MessageTemplate",
+    "PooledEmailBackend",
+    "PreparedEmailMessage",
+    "RateLimit",
+    "RetryPolicy",
+    "SMTPConnectionPool",
+    "SMTPSink",
+    "SharedTokenBucket",
+    "SpoolEmailBackend",
+    "SpoolFlusher",
+    "ThreadPoolDelivery",
+    "TokenBucket",
+    "get_delivery",
+    "is_transient_error",
+    "rate_limits",
+    "smtp_pools",
+    "templates",
+]
@@ -0,0 +1,138 @@
+"""Асинхронная доставка писем через ограниченное число SMTP-сессий."""
+
+import asyncio
+from smtplib import SMTPServerDisconnected
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+)
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+
+from .aiosmtp import AsyncSMTPClient
+from .connection import DeliveryResult, get_failures, get_results
+from .ratelimit import RateLimit
+
+
+class AsyncDelivery:
+    """
+    Рассылает письма в `sessions` параллельных SMTP-сессиях.
+
+    Каждая сессия обслуживается своей задачей asyncio, берёт письма из
+    общей ограниченной очереди и переподключается после `max_messages`
+    писем или при обрыве соединения. Ограничение `rate_limit` общее
+    для всех сессий. Корутина `on_handoff` ожидается со списком из
+    одного письма перед передачей его серверу: сессия отправляет письма
+    по одному.
+    """
+
+    def __init__(
+        self,
+        sessions: int | None = None,
+        max_messages: int | None = None,
+        client_factory: Callable[[], AsyncSMTPClient] | None = None,
+        rate_limit: RateLimit | None = None,
+        on_handoff: (
+            Callable[[list[EmailMessage]], Awaitable[None]] | None
+        ) = None,
+    ) -> None:
+        self.sessions = sessions or settings.MAILING_ASYNC_SESSIONS
+        self.max_messages = (
+            max_messages or settings.MAILING_MAX_MESSAGES_PER_CONNECTION
+        )
+        self._client_factory = client_factory or AsyncSMTPClient.from_settings
+        self._rate_limit = rate_limit or RateLimit()
+        self._on_handoff = on_handoff
+
+    async def asend(
+        self,
+        messages: AsyncIterable[EmailMessage] | Iterable[EmailMessage],
+    ) -> AsyncIterator[DeliveryResult]:
+        """Отправляет письма и возвращает результаты по мере готовности."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.sessions * 2)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.sessions * 2)
+        producer = asyncio.create_task(self._produce(messages, queue))
+        workers = [
+            asyncio.create_task(self._work(queue, results))
+            for _ in range(self.sessions)
+        ]
+
+        try:
+            finished = 0
+            while finished < self.sessions:
+                result = await results.get()
+                if result is None:
+                    finished += 1
+                else:
+                    yield result
+            await producer
+        finally:
+            for task in (producer, *workers):
+                task.cancel()
+            await asyncio.gather(producer, *workers, return_exceptions=True)
+
+    async def _produce(
+        self,
+        messages: AsyncIterable[EmailMessage] | Iterable[EmailMessage],
+        queue: asyncio.Queue,
+    ) -> None:
+        """Кладёт письма в очередь, а в конце — по метке на каждую сессию."""
+        try:
+            if isinstance(messages, AsyncIterable):
+                async for message in messages:
+                    await queue.put(message)
+            else:
+                for message in messages:
+                    await queue.put(message)
+        finally:
+            for _ in range(self.sessions):
+                await queue.put(None)
+
+    async def _work(
+        self,
+        queue: asyncio.Queue,
+        results: asyncio.Queue,
+    ) -> None:
+        """Отправляет письма из очереди через одну SMTP-сессию."""
+        client = self._client_factory()
+
+        try:
+            while (message := await queue.get()) is not None:
+                for result in await self._send_one(client, message):
+                    await results.put(result)
+        finally:
+            await client.quit()
+            await results.put(None)
+
+    async def _send_one(
+        self,
+        client: AsyncSMTPClient,
+        message: EmailMessage,
+    ) -> list[DeliveryResult]:
+        await self._rate_limit.aacquire()
+
+        try:
+            await self._ensure_connected(client)
+            if self._on_handoff is not None:
+                await self._on_handoff([message])
+            try:
+                refused = await client.send_message(message)
+            except (SMTPServerDisconnected, ConnectionError):
+                await client.close()
+                await client.connect()
+                refused = await client.send_message(message)
+        except Exception as error:  # noqa: skip
+            return get_failures(message, error)
+
+        return get_results(message, refused)
+
+    async def _ensure_connected(self, client: AsyncSMTPClient) -> None:
+        """Открывает сессию, пересоздавая её после `max_messages` писем."""
+        if client.messages_sent >= self.max_messages:
+            await client.quit()
+        if not client.is_connected:
+            await client.connect()
@@ -0,0 +1,372 @@
+"""Асинхронный SMTP-клиент на потоках asyncio."""
+
+import asyncio
+import base64
+import re
+import socket
+import ssl
+from contextlib import suppress
+from email.utils import parseaddr
+from smtplib import (
+    SMTPAuthenticationError,
+    SMTPConnectError,
+    SMTPDataError,
+    SMTPHeloError,
+    SMTPNotSupportedError,
+    SMTPRecipientsRefused,
+    SMTPResponseException,
+    SMTPSenderRefused,
+    SMTPServerDisconnected,
+)
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.core.mail.message import sanitize_address
+
+CRLF: bytes = b"\r\n"
+LINE_BREAK_RE = re.compile(rb"\r\n|\r(?!\n)|(?<!\r)\n")
+LEADING_DOT_RE = re.compile(rb"^\.", re.MULTILINE)
+
+Reply = tuple[int, str]
+
+
+def quote_data(data: bytes) -> bytes:
+    """Готовит тело письма к команде DATA: CRLF и экранирование точек."""
+    data = LEADING_DOT_RE.sub(b"..", LINE_BREAK_RE.sub(CRLF, data))
+
+    if not data.endswith(CRLF):
+        data += CRLF
+
+    return data + b"." + CRLF
+
+
+def get_envelope_address(address: str, encoding: str) -> str:
+    """
+    Возвращает адрес для команд MAIL FROM и RCPT TO.
+
+    Как `smtplib.quoteaddr`, отбрасывает отображаемое имя, оставленное
+    `sanitize_address`.
+    """
+    return parseaddr(sanitize_address(address, encoding))[1]
+
+
+def get_envelope(message: EmailMessage) -> tuple[str, list[str], bytes]:
+    """Возвращает отправителя, получателей и байты письма Django."""
+    encoding = message.encoding or settings.DEFAULT_CHARSET
+    from_addr = get_envelope_address(message.from_email, encoding)
+    recipients = [
+        get_envelope_address(address, encoding)
+        for address in message.recipients()
+    ]
+    return from_addr, recipients, message.message().as_bytes(linesep="\r\n")
+
+
+class AsyncSMTPClient:
+    """
+    SMTP/ESMTP-клиент на `asyncio`.
+
+    Поддерживает SSL и STARTTLS, AUTH PLAIN/LOGIN и PIPELINING: если
+    сервер его объявил, команды MAIL, RCPT и DATA одного письма
+    отправляются одной записью в сокет. Ошибки — исключения `smtplib`.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        *,
+        use_ssl: bool = False,
+        use_tls: bool = False,
+        username: str = "",
+        password: str = "",
+        timeout: float | None = None,
+        ssl_context: ssl.SSLContext | None = None,
+        local_hostname: str | None = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self.local_hostname = local_hostname or socket.getfqdn()
+        self.extensions: dict[str, str] = {}
+        self.messages_sent: int = 0
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    @classmethod
+    def from_settings(cls, **kwargs) -> "AsyncSMTPClient":
+        """Создаёт клиента с параметрами `EMAIL_*` из настроек."""
+        params = {
+            "host": settings.EMAIL_HOST,
+            "port": settings.EMAIL_PORT,
+            "use_ssl": settings.EMAIL_USE_SSL,
+            "use_tls": settings.EMAIL_USE_TLS,
+            "username": settings.EMAIL_HOST_USER,
+            "password": settings.EMAIL_HOST_PASSWORD,
+            "timeout": settings.EMAIL_TIMEOUT,
+        }
+        params.update(kwargs)
+        return cls(**params)
+
+    async def __aenter__(self) -> "AsyncSMTPClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.quit()
+
+    @property
+    def is_connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def _get_ssl_context(self) -> ssl.SSLContext:
+        if self.ssl_context is None:
+            self.ssl_context = ssl.create_default_context()
+        return self.ssl_context
+
+    async def _wait(self, awaitable):
+        return await asyncio.wait_for(awaitable, self.timeout)
+
+    async def connect(self) -> None:
+        """Открывает сессию: приветствие, EHLO, STARTTLS и AUTH."""
+        context = self._get_ssl_context() if self.use_ssl else None
+
+        try:
+            self._reader, self._writer = await self._wait(
+                asyncio.open_connection(self.host, self.port, ssl=context)
+            )
+        except asyncio.TimeoutError as error:
+            raise SMTPServerDisconnected(
+                f"Истекло время подключения к {self.host}:{self.port}"
+            ) from error
+
+        self.messages_sent = 0
+        code, message = await self.read_reply()
+        if code != 220:
+            await self.close()
+            raise SMTPConnectError(code, message)
+
+        await self.ehlo()
+
+        if self.use_tls:
+            await self.starttls()
+            await self.ehlo()
+
+        if self.username and self.password:
+            await self.login()
+
+    async def _read_line(self) -> bytes:
+        if self._reader is None:
+            raise SMTPServerDisconnected("Нет соединения с сервером")
+
+        try:
+            line = await self._wait(self._reader.readline())
+        except (asyncio.TimeoutError, ConnectionError) as error:
+            await self.close()
+            raise SMTPServerDisconnected(str(error)) from error
+
+        if not line:
+            await self.close()
+            raise SMTPServerDisconnected("Соединение закрыто сервером")
+
+        return line
+
+    async def read_reply(self) -> Reply:
+        """Читает (возможно многострочный) ответ сервера."""
+        lines: list[str] = []
+
+        while True:
+            line = await self._read_line()
+            lines.append(line[4:].strip().decode(errors="replace"))
+            if line[3:4] != b"-":
+                break
+
+        code = int(line[:3]) if line[:3].isdigit() else -1
+        return code, "\n".join(lines)
+
+    def _write(self, data: bytes) -> None:
+        if self._writer is None:
+            raise SMTPServerDisconnected("Нет соединения с сервером")
+        self._writer.write(data)
+
+    def _write_command(self, command: str) -> None:
+        self._write(command.encode() + CRLF)
+
+    async def _drain(self) -> None:
+        try:
+            await self._wait(self._writer.drain())
+        except (asyncio.TimeoutError, ConnectionError) as error:
+            await self.close()
+            raise SMTPServerDisconnected(str(error)) from error
+
+    async def execute(self, command: str) -> Reply:
+        """Отправляет команду и возвращает ответ сервера."""
+        self._write_command(command)
+        await self._drain()
+        return await self.read_reply()
+
+    async def ehlo(self) -> None:
+        """Представляется серверу и запоминает объявленные расширения."""
+        code, message = await self.execute(f"EHLO {self.local_hostname}")
+        self.extensions = {}
+
+        if code != 250:
+            code, message = await self.execute(f"HELO {self.local_hostname}")
+            if code != 250:
+                raise SMTPHeloError(code, message)
+            return
+
+        for line in message.splitlines()[1:]:
+            keyword, _, params = line.partition(" ")
+            self.extensions[keyword.lower()] = params
+
+    async def starttls(self) -> None:
+        """Переводит сессию на TLS командой STARTTLS."""
+        if "starttls" not in self.extensions:
+            raise SMTPNotSupportedError("Сервер не поддерживает STARTTLS")
+
+        code, message = await self.execute("STARTTLS")
+        if code != 220:
+            raise SMTPResponseException(code, message)
+
+        await self._writer.start_tls(
+            self._get_ssl_context(),
+            server_hostname=self.host,
+        )
+        self.extensions = {}
+
+    async def login(self) -> None:
+        """Авторизуется механизмом AUTH PLAIN или AUTH LOGIN."""
+        mechanisms = self.extensions.get("auth", "").upper().split()
+
+        if "PLAIN" in mechanisms:
+            token = f"\0{self.username}\0{self.password}"
+            code, message = await self.execute(f"AUTH PLAIN {_b64(token)}")
+        elif "LOGIN" in mechanisms:
+            code, message = await self.execute("AUTH LOGIN")
+            for value in (self.username, self.password):
+                if code == 334:
+                    code, message = await self.execute(_b64(value))
+        else:
+            raise SMTPNotSupportedError(
+                "Сервер не поддерживает AUTH PLAIN или AUTH LOGIN"
+            )
+
+        if code not in (235, 503):
+            raise SMTPAuthenticationError(code, message)
+
+    async def sendmail(
+        self,
+        from_addr: str,
+        recipients: list[str],
+        data: bytes,
+    ) -> dict[str, Reply]:
+        """
+        Отправляет письмо одной SMTP-транзакцией.
+
+        Как и `smtplib.SMTP.sendmail`, возвращает отклонённых получателей,
+        а если отклонены все — выбрасывает `SMTPRecipientsRefused`.
+        """
+        if "pipelining" in self.extensions:
+            replies = await self._pipeline_envelope(from_addr, recipients)
+        else:
+            replies = await self._execute_envelope(from_addr, recipients)
+
+        mail_reply, rcpt_replies, data_reply = replies
+        refused = {
+            address: reply
+            for address, reply in zip(recipients, rcpt_replies)
+            if reply[0] not in (250, 251)
+        }
+        accepted = mail_reply[0] == 250 and len(refused) < len(recipients)
+
+        if data_reply is not None and data_reply[0] == 354:
+            data_reply = await self._send_data(data if accepted else None)
+            if accepted and data_reply[0] == 250:
+                self.messages_sent += 1
+                return refused
+
+        await self.rset()
+
+        if mail_reply[0] != 250:
+            raise SMTPSenderRefused(*mail_reply, from_addr)
+        if not accepted:
+            raise SMTPRecipientsRefused(refused)
+        raise SMTPDataError(*data_reply)
+
+    async def _pipeline_envelope(
+        self,
+        from_addr: str,
+        recipients: list[str],
+    ) -> tuple[Reply, list[Reply], Reply]:
+        """Отправляет MAIL, RCPT и DATA одной записью (PIPELINING)."""
+        self._write_command(f"MAIL FROM:<{from_addr}>")
+        for address in recipients:
+            self._write_command(f"RCPT TO:<{address}>")
+        self._write_command("DATA")
+        await self._drain()
+
+        mail_reply = await self.read_reply()
+        rcpt_replies = [await self.read_reply() for _ in recipients]
+        return mail_reply, rcpt_replies, await self.read_reply()
+
+    async def _execute_envelope(
+        self,
+        from_addr: str,
+        recipients: list[str],
+    ) -> tuple[Reply, list[Reply], Reply | None]:
+        """Отправляет MAIL, RCPT и DATA по одной команде."""
+        mail_reply = await self.execute(f"MAIL FROM:<{from_addr}>")
+        if mail_reply[0] != 250:
+            return mail_reply, [], None
+
+        rcpt_replies = [
+            await self.execute(f"RCPT TO:<{address}>")
+            for address in recipients
+        ]
+        if all(reply[0] not in (250, 251) for reply in rcpt_replies):
+            return mail_reply, rcpt_replies, None
+
+        return mail_reply, rcpt_replies, await self.execute("DATA")
+
+    async def _send_data(self, data: bytes | None) -> Reply:
+        """Передаёт тело письма; без тела — сразу завершает DATA."""
+        self._write(b"." + CRLF if data is None else quote_data(data))
+        await self._drain()
+        return await self.read_reply()
+
+    async def send_message(self, message: EmailMessage) -> dict[str, Reply]:
+        """Отправляет письмо Django `EmailMessage`."""
+        return await self.sendmail(*get_envelope(message))
+
+    async def rset(self) -> None:
+        """Сбрасывает текущую транзакцию."""
+        await self.execute("RSET")
+
+    async def noop(self) -> Reply:
+        """Проверяет, что сессия жива."""
+        return await self.execute("NOOP")
+
+    async def quit(self) -> None:
+        """Завершает сессию командой QUIT и закрывает соединение."""
+        if self.is_connected:
+            with suppress(SMTPServerDisconnected, OSError):
+                await self.execute("QUIT")
+        await self.close()
+
+    async def close(self) -> None:
+        """Закрывает соединение без QUIT."""
+        writer, self._reader, self._writer = self._writer, None, None
+
+        if writer is not None:
+            writer.close()
+            with suppress(Exception):
+                await writer.wait_closed()
+
+
+def _b64(value: str) -> str:
+    return base64.b64encode(value.encode()).decode()
@@ -0,0 +1,385 @@
+"""Отправка писем через одно долгоживущее соединение с сервером."""
+
+from contextlib import suppress
+from dataclasses import dataclass
+from itertools import islice
+from smtplib import (
+    SMTP,
+    SMTPException,
+    SMTPRecipientsRefused,
+    SMTPServerDisconnected,
+)
+from typing import Callable, Iterable, Iterator
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from mailings.constants import Lane
+
+from .aiosmtp import get_envelope, get_envelope_address
+from .pool import PooledEmailBackend
+from .ratelimit import RateLimit
+from .retry import is_transient_error
+
+HandoffHook = Callable[[list[EmailMessage]], None]
+
+SUCCESS_RESPONSE: str = "Сообщение успешно отправлено"
+FAILURE_RESPONSE: str = "Ошибка отправки"
+
+
+@dataclass(frozen=True)
+class DeliveryResult:
+    """
+    Результат отправки письма одному получателю.
+
+    Для письма нескольким получателям адрес указывается в `address`.
+    """
+
+    message: EmailMessage
+    success: bool
+    response: str
+    transient: bool = False
+    address: str = ""
+
+    @classmethod
+    def ok(cls, message: EmailMessage, address: str = "") -> "DeliveryResult":
+        """Результат успешной отправки."""
+        return cls(message, True, SUCCESS_RESPONSE, address=address)
+
+    @classmethod
+    def failed(
+        cls,
+        message: EmailMessage,
+        error: BaseException,
+        address: str = "",
+    ) -> "DeliveryResult":
+        """Результат неудачной отправки с признаком временной ошибки."""
+        return cls(
+            message,
+            False,
+            f"{FAILURE_RESPONSE}: {error}",
+            transient=is_transient_error(error),
+            address=address,
+        )
+
+    @property
+    def recipient(self) -> str:
+        """Адрес получателя письма."""
+        if self.address:
+            return self.address
+        return self.message.to[0] if self.message.to else ""
+
+
+def get_results(
+    message: EmailMessage,
+    refused: dict[str, tuple[int, bytes | str]],
+) -> list[DeliveryResult]:
+    """
+    Возвращает результаты по каждому получателю отправленного письма.
+
+    `refused` — отклонённые командой RCPT адреса в том виде, в каком они
+    ушли в конверт, как его возвращает `SMTP.sendmail`.
+    """
+    if not refused:
+        return [
+            DeliveryResult.ok(message, address)
+            for address in message.recipients()
+        ]
+
+    encoding = message.encoding or settings.DEFAULT_CHARSET
+    results = []
+
+    for address in message.recipients():
+        reply = refused.get(get_envelope_address(address, encoding))
+        if reply is None:
+            results.append(DeliveryResult.ok(message, address))
+        else:
+            error = SMTPRecipientsRefused({address: reply})
+            results.append(DeliveryResult.failed(message, error, address))
+
+    return results
+
+
+def get_failures(
+    message: EmailMessage,
+    error: BaseException,
+) -> list[DeliveryResult]:
+    """Возвращает результаты по каждому получателю неотправленного письма."""
+    if isinstance(error, SMTPRecipientsRefused):
+        return get_results(message, error.recipients)
+
+    return [
+        DeliveryResult.failed(message, error, address)
+        for address in message.recipients()
+    ]
+
+
+def get_sent_results(messages: list[EmailMessage]) -> list[DeliveryResult]:
+    """Возвращает результаты писем, принятых сервером целиком."""
+    return [
+        DeliveryResult.ok(message, address)
+        for message in messages
+        for address in message.recipients()
+    ]
+
+
+def get_connection_failures(
+    messages: list[EmailMessage],
+    error: BaseException,
+) -> list[DeliveryResult]:
+    """
+    Возвращает результаты писем, которые не удалось отправить без связи.
+
+    Ошибка открытия соединения считается временной независимо от кода
+    ответа: письма вернутся в очередь повторов.
+    """
+    return [
+        DeliveryResult(
+            message,
+            False,
+            f"{FAILURE_RESPONSE}: {error}",
+            transient=True,
+            address=address,
+        )
+        for message in messages
+        for address in message.recipients()
+    ]
+
+
+class Handoff:
+    """
+    Пачка писем, которую бэкенд перебирает в `send_messages`.
+
+    Перед тем как отдать бэкенду очередное письмо, берётся токен из
+    `rate_limit`; перед первым письмом `on_handoff` вызывается один раз
+    со всей пачкой. Бэкенды Django отправляют
+    письма по порядку, поэтому при ошибке все письма до последнего
+    отданного (`handed`) уже приняты.
+    """
+
+    def __init__(
+        self,
+        messages: list[EmailMessage],
+        rate_limit: RateLimit,
+        on_handoff: HandoffHook | None = None,
+    ) -> None:
+        self.messages = messages
+        self.rate_limit = rate_limit
+        self.on_handoff = on_handoff
+        self.handed: int = 0
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __iter__(self) -> Iterator[EmailMessage]:
+        for message in self.messages:
+            self.rate_limit.acquire()
+            if not self.handed and self.on_handoff is not None:
+                self.on_handoff(self.messages)
+            self.handed += 1
+            yield message
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """Разбивает последовательность на списки длиной не более size."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class ConnectionDelivery:
+    """
+    Отправляет письма через одно соединение, открытое `get_connection()`.
+
+    Письма передаются бэкенду пачками по `batch_size` одним вызовом
+    `send_messages`. Соединение переоткрывается после `max_messages`
+    писем и при обрыве сессии, результат возвращается отдельно для
+    каждого письма. Перед каждым письмом берётся токен из `rate_limit`.
+    Соединение открывается для полосы доставки `lane`; если открыть его
+    не удалось, письма пачки возвращаются с временной ошибкой.
+    `on_handoff` вызывается со списком писем перед передачей их серверу:
+    один раз на вызов `send_messages`.
+    """
+
+    def __init__(
+        self,
+        batch_size: int | None = None,
+        max_messages: int | None = None,
+        connection: BaseEmailBackend | None = None,
+        rate_limit: RateLimit | None = None,
+        lane: str = Lane.BULK,
+        on_handoff: HandoffHook | None = None,
+    ) -> None:
+        self.batch_size = batch_size or settings.MAILING_SEND_BATCH_SIZE
+        self.max_messages = (
+            max_messages or settings.MAILING_MAX_MESSAGES_PER_CONNECTION
+        )
+        self._connection = connection or get_connection(
+            fail_silently=False, lane=lane
+        )
+        self._rate_limit = rate_limit or RateLimit()
+        self._on_handoff = on_handoff
+        self._sent_on_connection: int = 0
+        self._opened: bool = False
+
+    def __enter__(self) -> "ConnectionDelivery":
+        self._try_open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """Открывает соединение с почтовым сервером."""
+        self._connection.open()
+        self._sent_on_connection = 0
+        self._opened = True
+
+    def close(self) -> None:
+        """Закрывает соединение, не считая ошибку QUIT ошибкой отправки."""
+        self._opened = False
+        with suppress(SMTPException, OSError):
+            self._connection.close()
+
+    def reconnect(self) -> None:
+        """Переоткрывает соединение с почтовым сервером."""
+        self.close()
+        self.open()
+
+    def send(
+        self, messages: Iterable[EmailMessage]
+    ) -> Iterator[DeliveryResult]:
+        """Отправляет письма и возвращает результат по каждому из них."""
+        for batch in batched(messages, self.batch_size):
+            yield from self.send_batch(batch)
+
+    def send_batch(self, batch: list[EmailMessage]) -> list[DeliveryResult]:
+        """
+        Отправляет пачку писем через текущее соединение.
+
+        Письма группам, для которых нужны отказы по каждому адресу,
+        уходят по одному, остальные — через `send_messages`.
+        """
+        if error := self._try_open():
+            return get_connection_failures(batch, error)
+
+        results = []
+        single = []
+
+        for message in batch:
+            if self._needs_envelope(message):
+                results.extend(self._send_one(message))
+            else:
+                single.append(message)
+
+        while single:
+            if self._sent_on_connection >= self.max_messages:
+                self._safe_reconnect()
+            limit = max(1, self.max_messages - self._sent_on_connection)
+            chunk_results, processed = self._send_chunk(single[:limit])
+            results.extend(chunk_results)
+            single = single[processed:]
+
+        return results
+
+    def _try_open(self) -> BaseException | None:
+        """Открывает закрытое соединение и возвращает ошибку открытия."""
+        if self._opened:
+            return None
+        try:
+            self.open()
+        except (SMTPException, OSError) as error:
+            return error
+        return None
+
+    def _safe_reconnect(self) -> None:
+        with suppress(SMTPException, OSError):
+            self.reconnect()
+
+    def _needs_envelope(self, message: EmailMessage) -> bool:
+        """Нужно ли отправить письмо отдельно, чтобы узнать отказы RCPT."""
+        if len(message.recipients()) < 2:
+            return False
+        smtp = getattr(self._connection, "connection", None)
+        return isinstance(self._connection, PooledEmailBackend) or isinstance(
+            smtp, SMTP
+        )
+
+    def _send_chunk(
+        self, chunk: list[EmailMessage]
+    ) -> tuple[list[DeliveryResult], int]:
+        """
+        Отправляет письма одним вызовом `send_messages`.
+
+        Возвращает результаты и число обработанных писем: письма после
+        отклонённого остаются неотправленными и уходят следующим вызовом.
+        """
+        handoff = Handoff(chunk, self._rate_limit, self._on_handoff)
+
+        try:
+            self._connection.send_messages(handoff)
+        except Exception as error:  # noqa: skip
+            if not handoff.handed:
+                return get_connection_failures(chunk, error), len(chunk)
+            handed = handoff.handed
+            self._sent_on_connection += handed
+            return [
+                *get_sent_results(chunk[: handed - 1]),
+                *self._resend(chunk[handed - 1], error),
+            ], handed
+
+        self._sent_on_connection += len(chunk)
+        return get_sent_results(chunk), len(chunk)
+
+    def _resend(
+        self, message: EmailMessage, error: BaseException
+    ) -> list[DeliveryResult]:
+        """
+        Повторяет письмо после обрыва сессии, иначе возвращает ошибку.
+        """
+        if not isinstance(error, (SMTPServerDisconnected, ConnectionError)):
+            return get_failures(message, error)
+
+        try:
+            self.reconnect()
+            refused = self._send_message(message)
+        except Exception as retry_error:  # noqa: skip
+            return get_failures(message, retry_error)
+
+        return get_results(message, refused)
+
+    def _send_one(self, message: EmailMessage) -> list[DeliveryResult]:
+        """Отправляет одно письмо и возвращает результат по каждому адресу."""
+        self._rate_limit.acquire()
+        if self._on_handoff is not None:
+            self._on_handoff([message])
+
+        try:
+            refused = self._send_message(message)
+        except Exception as error:  # noqa: skip
+            return self._resend(message, error)
+        finally:
+            self._sent_on_connection += 1
+
+        return get_results(message, refused)
+
+    def _send_message(self, message: EmailMessage) -> dict:
+        """
+        Отправляет письмо и возвращает отклонённых получателей.
+
+        `send_messages` не сообщает об отказах отдельным адресам, поэтому
+        письмо нескольким получателям уходит напрямую через открытое
+        SMTP-соединение бэкенда. `PooledEmailBackend` сообщает об отказах
+        сам, остальные бэкенды получают письмо как есть.
+        """
+        if isinstance(self._connection, PooledEmailBackend):
+            return self._connection.send_envelope(message)
+
+        smtp = getattr(self._connection, "connection", None)
+
+        if len(message.recipients()) > 1 and isinstance(smtp, SMTP):
+            return smtp.sendmail(*get_envelope(message))
+
+        self._connection.send_messages([message])
+        return {}
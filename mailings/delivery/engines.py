@@ -0,0 +1,37 @@
+"""Выбор способа доставки писем."""
+
+from django.conf import settings
+
+from mailings.constants import Lane
+
+from .connection import ConnectionDelivery, HandoffHook
+from .parallel import ThreadPoolDelivery
+from .ratelimit import RateLimit
+
+
+def get_delivery(
+    workers: int | None = None,
+    rate_limit: RateLimit | None = None,
+    lane: str = Lane.BULK,
+    on_handoff: HandoffHook | None = None,
+) -> ConnectionDelivery | ThreadPoolDelivery:
+    """
+    Возвращает доставку для рассылки полосы `lane`.
+
+    При одном потоке письма уходят через одно соединение, иначе —
+    через пул из `workers` потоков (по умолчанию `MAILING_WORKERS`).
+    `on_handoff` вызывается со списком писем перед передачей их серверу.
+    """
+    workers = workers or settings.MAILING_WORKERS
+
+    if workers > 1:
+        return ThreadPoolDelivery(
+            workers=workers,
+            rate_limit=rate_limit,
+            lane=lane,
+            on_handoff=on_handoff,
+        )
+
+    return ConnectionDelivery(
+        rate_limit=rate_limit, lane=lane, on_handoff=on_handoff
+    )
@@ -0,0 +1,201 @@
+"""Подготовка MIME-писем, общих для всех получателей рассылки."""
+
+import re
+from email.utils import make_msgid
+from itertools import groupby
+from typing import Any
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.core.mail.message import DNS_NAME, sanitize_address
+
+from .connection import batched
+from .templates import MessageTemplate
+
+CRLF = b"\r\n"
+PLACEHOLDER_ADDRESS = "payload@localhost"
+UNDISCLOSED_RECIPIENTS = "undisclosed-recipients:;"
+PLAIN_ADDRESS_RE = re.compile(r"[\w.!#$%&'*+/=?^`{|}~-]+@[\w.-]+", re.ASCII)
+
+
+class SerializedMessage:
+    """
+    Готовое письмо в байтах.
+
+    Повторяет ту часть интерфейса `email.message.Message`, которой
+    пользуются почтовые бэкенды Django и `AsyncSMTPClient`.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: bytes) -> None:
+        self._data = data
+
+    def as_bytes(self, unixfrom: bool = False, linesep: str = "\n") -> bytes:
+        """Возвращает письмо с заданным разделителем строк."""
+        if linesep == "\r\n":
+            return self._data
+        return self._data.replace(CRLF, linesep.encode())
+
+    def get_charset(self) -> None:
+        return None
+
+    def __bytes__(self) -> bytes:
+        return self._data
+
+
+def encode_address(address: str) -> str:
+    """Кодирует адрес; простые ASCII-адреса не разбираются парсером."""
+    if PLAIN_ADDRESS_RE.fullmatch(address):
+        return address
+    return sanitize_address(address, settings.DEFAULT_CHARSET)
+
+
+def get_domain(address: str) -> str:
+    """Возвращает домен адреса в нижнем регистре."""
+    return address.rpartition("@")[2].lower()
+
+
+class MessagePayload:
+    """
+    MIME-письмо, сериализованное один раз для всех получателей.
+
+    Заголовки (кроме `To` и `Message-ID`) и закодированное тело хранятся
+    в байтах; для получателя дописываются только его адрес и новый
+    идентификатор письма.
+    """
+
+    def __init__(self, subject: str, body: str, from_email: str) -> None:
+        self.subject = subject
+        self.body = body
+        self.from_email = from_email
+
+        mime = EmailMessage(
+            subject, body, from_email, [PLACEHOLDER_ADDRESS]
+        ).message()
+        del mime["To"]
+        del mime["Message-ID"]
+        data = mime.as_bytes(linesep="\r\n")
+        self._headers, _, self._content = data.partition(CRLF * 2)
+
+    def build(self, to: str) -> bytes:
+        """Возвращает письмо с уже закодированным заголовком `To`."""
+        message_id = make_msgid(domain=DNS_NAME)
+        return b"".join(
+            (
+                self._headers,
+                b"\r\nTo: ",
+                to.encode("ascii"),
+                b"\r\nMessage-ID: ",
+                message_id.encode("ascii"),
+                CRLF * 2,
+                self._content,
+            )
+        )
+
+
+class PreparedEmailMessage(EmailMessage):
+    """Письмо получателю на основе заранее сериализованного `payload`."""
+
+    def __init__(self, payload: MessagePayload, to: str) -> None:
+        super().__init__(
+            subject=payload.subject,
+            body=payload.body,
+            from_email=payload.from_email,
+            to=[to],
+        )
+        self.payload = payload
+
+    def message(self) -> SerializedMessage:
+        return SerializedMessage(
+            self.payload.build(encode_address(self.to[0]))
+        )
+
+
+class GroupEmailMessage(EmailMessage):
+    """
+    Одно письмо нескольким получателям в одной SMTP-транзакции.
+
+    Адреса передаются только в конверте (RCPT TO), а заголовок `To`
+    одинаков для всех, поэтому получатели не видят друг друга.
+    """
+
+    def __init__(self, payload: MessagePayload, recipients: list[str]) -> None:
+        super().__init__(
+            subject=payload.subject,
+            body=payload.body,
+            from_email=payload.from_email,
+            bcc=recipients,
+        )
+        self.payload = payload
+
+    def message(self) -> SerializedMessage:
+        return SerializedMessage(self.payload.build(UNDISCLOSED_RECIPIENTS))
+
+
+class MessageBuilder:
+    """
+    Создаёт письма получателям по шаблону сообщения.
+
+    Для неперсонализированного сообщения MIME-письмо сериализуется
+    один раз, иначе тема и тело рендерятся для каждого получателя.
+    Если `rcpt_limit` больше единицы, одинаковое письмо отправляется
+    группам до `rcpt_limit` получателей одной транзакцией, при
+    `group_by_domain` — только получателям с одним доменом.
+    """
+
+    def __init__(
+        self,
+        template: MessageTemplate,
+        from_email: str,
+        rcpt_limit: int = 1,
+        group_by_domain: bool = False,
+    ) -> None:
+        self.template = template
+        self.from_email = from_email
+        self.rcpt_limit = rcpt_limit
+        self.group_by_domain = group_by_domain
+        self.payload: MessagePayload | None = None
+
+        if not template.is_personalized:
+            self.payload = MessagePayload(
+                template.subject.text, template.body.text, from_email
+            )
+
+    def build_batch(self, recipients: list[Any]) -> list[EmailMessage]:
+        """Возвращает письма для пачки получателей."""
+        if self.payload and self.rcpt_limit > 1:
+            return self._build_groups(
+                [recipient.email for recipient in recipients]
+            )
+
+        if self.payload:
+            return [
+                PreparedEmailMessage(self.payload, recipient.email)
+                for recipient in recipients
+            ]
+
+        return [
+            EmailMessage(subject, body, self.from_email, [recipient.email])
+            for recipient, (subject, body) in zip(
+                recipients, self.template.render_batch(recipients)
+            )
+        ]
+
+    def _build_groups(self, addresses: list[str]) -> list[EmailMessage]:
+        """Возвращает письма группам получателей одной пачки."""
+        if self.group_by_domain:
+            groups = [
+                list(group)
+                for _, group in groupby(
+                    sorted(addresses, key=get_domain), key=get_domain
+                )
+            ]
+        else:
+            groups = [addresses]
+
+        return [
+            GroupEmailMessage(self.payload, chunk)
+            for group in groups
+            for chunk in batched(group, self.rcpt_limit)
+        ]
@@ -0,0 +1,126 @@
+"""Параллельная отправка писем в пуле потоков."""
+
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import close_old_connections
+
+from mailings.constants import Lane
+
+from .connection import (
+    ConnectionDelivery,
+    DeliveryResult,
+    HandoffHook,
+    batched,
+)
+from .ratelimit import RateLimit
+
+
+class ThreadPoolDelivery:
+    """
+    Рассылает письма пачками в `ThreadPoolExecutor`.
+
+    Каждый поток открывает собственное соединение `ConnectionDelivery`,
+    а результаты возвращаются вызывающему потоку, который и записывает
+    попытки в базу. Одновременно в работе не более двух пачек на поток.
+    Ограничение `rate_limit` общее для всех потоков, `on_handoff`
+    вызывается в потоке, передающем письма серверу; после каждой пачки
+    поток закрывает свои устаревшие соединения с базой.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        batch_size: int | None = None,
+        max_messages: int | None = None,
+        rate_limit: RateLimit | None = None,
+        lane: str = Lane.BULK,
+        on_handoff: HandoffHook | None = None,
+    ) -> None:
+        self.workers = workers or settings.MAILING_WORKERS
+        self.batch_size = batch_size or settings.MAILING_SEND_BATCH_SIZE
+        self.max_messages = max_messages
+        self.rate_limit = rate_limit
+        self.lane = lane
+        self.on_handoff = on_handoff
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._deliveries: list[ConnectionDelivery] = []
+        self._executor: ThreadPoolExecutor | None = None
+
+    def __enter__(self) -> "ThreadPoolDelivery":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """Запускает пул потоков."""
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="mailing-delivery",
+        )
+
+    def close(self) -> None:
+        """Дожидается потоков и закрывает их соединения."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        for delivery in self._deliveries:
+            delivery.close()
+        self._deliveries.clear()
+
+    def _get_delivery(self) -> ConnectionDelivery:
+        """
+        Возвращает соединение текущего потока.
+
+        Соединение открывается первой пачкой: если сервер недоступен,
+        её письма возвращаются с временной ошибкой.
+        """
+        delivery = getattr(self._local, "delivery", None)
+
+        if delivery is None:
+            delivery = ConnectionDelivery(
+                batch_size=self.batch_size,
+                max_messages=self.max_messages,
+                rate_limit=self.rate_limit,
+                lane=self.lane,
+                on_handoff=self.on_handoff,
+            )
+            self._local.delivery = delivery
+            with self._lock:
+                self._deliveries.append(delivery)
+
+        return delivery
+
+    def _send_batch(self, batch: list[EmailMessage]) -> list[DeliveryResult]:
+        try:
+            return self._get_delivery().send_batch(batch)
+        finally:
+            close_old_connections()
+
+    def send(
+        self, messages: Iterable[EmailMessage]
+    ) -> Iterator[DeliveryResult]:
+        """Отправляет письма и возвращает результаты по мере готовности."""
+        pending: set[Future] = set()
+
+        for batch in batched(messages, self.batch_size):
+            if len(pending) >= self.workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+            pending.add(self._executor.submit(self._send_batch, batch))
+
+        for future in pending:
+            yield from future.result()
@@ -0,0 +1,578 @@
+"""Пул долгоживущих SMTP-соединений и почтовый бэкенд на его основе."""
+
+import threading
+import time
+from collections import Counter, deque
+from contextlib import suppress
+from smtplib import SMTP, SMTPException, SMTPServerDisconnected
+from typing import Any, Callable, Protocol
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.smtp import EmailBackend as SMTPBackend
+
+from mailings.constants import Lane
+
+from .aiosmtp import get_envelope
+
+SLOT_POLL_INTERVAL: float = 0.05
+
+
+class LaneSlots(Protocol):
+    """
+    Места SMTP-соединений полос, общие для всех процессов.
+
+    Реализуется вне пакета доставки и подключается к пулам процесса
+    через `smtp_pools.slots`. Место занимается на `ttl` секунд, чтобы
+    места упавшего процесса освободились сами.
+    """
+
+    def acquire(
+        self, server: str, lane: str, size: int, limit: int, ttl: float
+    ) -> str | None:
+        """Занимает место полосы и возвращает его ключ; None — мест нет."""
+
+    def extend(self, slot: str, ttl: float) -> bool:
+        """Продлевает место; False, если его уже занял другой процесс."""
+
+    def release(self, slot: str) -> None:
+        """Освобождает место."""
+
+
+def get_reserved() -> dict[str, int]:
+    """Места, закреплённые за полосами, из настроек."""
+    return {
+        Lane.TRANSACTIONAL: settings.MAILING_SMTP_POOL_RESERVED_TRANSACTIONAL,
+        Lane.MANUAL: settings.MAILING_SMTP_POOL_RESERVED_MANUAL,
+    }
+
+
+def get_lane_limits(size: int, reserved: dict[str, int]) -> dict[str, int]:
+    """
+    Возвращает, сколько из `size` соединений может держать каждая полоса.
+
+    Полосе недоступны места, закреплённые за более важными полосами,
+    но одно соединение ей доступно всегда.
+    """
+    limits: dict[str, int] = {}
+    held: int = 0
+
+    for lane in Lane:
+        limits[lane] = max(1, size - held)
+        held += reserved.get(lane, 0)
+    return limits
+
+
+class PooledConnection:
+    """SMTP-соединение пула со счётчиками использования."""
+
+    __slots__ = (
+        "smtp",
+        "last_used",
+        "messages_sent",
+        "broken",
+        "lane",
+        "slot",
+        "slot_renewed",
+    )
+
+    def __init__(self, smtp: SMTP, now: float) -> None:
+        self.smtp = smtp
+        self.last_used = now
+        self.messages_sent: int = 0
+        self.broken: bool = False
+        self.lane: str = Lane.TRANSACTIONAL
+        self.slot: str | None = None
+        self.slot_renewed: float = now
+
+
+class SMTPConnectionPool:
+    """
+    Ограниченный пул SMTP-соединений, общий для потоков процесса.
+
+    Открыто не более `size` соединений; если все заняты, `acquire` ждёт
+    до `timeout` секунд. Соединения, простоявшие дольше `max_idle`,
+    закрываются, а простоявшие дольше `health_check_interval` перед
+    выдачей проверяются командой NOOP. Соединение закрывается после
+    `max_messages` писем или ошибки сети, иначе при возврате в пул
+    получает RSET, чтобы следующий отправитель начал с чистой сессии.
+
+    Соединения выдаются полосам доставки (`Lane`). За служебными
+    письмами и ручной отправкой закреплено `reserved` мест: полоса
+    не занимает места, закреплённые за более важными полосами, а те
+    могут занять любое свободное место.
+
+    Полосы разных процессов делят места через `slots`: на время выдачи
+    соединение занимает одно из `MAILING_SMTP_LANE_SLOTS` общих мест
+    сервера `server` по тем же правилам резервирования.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], SMTP],
+        size: int | None = None,
+        max_messages: int | None = None,
+        max_idle: float | None = None,
+        health_check_interval: float | None = None,
+        timeout: float | None = None,
+        reserved: dict[str, int] | None = None,
+        slots: LaneSlots | None = None,
+        server: str = "",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.size = size or settings.MAILING_SMTP_POOL_SIZE
+        self.max_messages = (
+            max_messages or settings.MAILING_MAX_MESSAGES_PER_CONNECTION
+        )
+        self.max_idle = max_idle or settings.MAILING_SMTP_POOL_MAX_IDLE
+        self.health_check_interval = (
+            health_check_interval
+            or settings.MAILING_SMTP_POOL_HEALTH_CHECK_INTERVAL
+        )
+        self.timeout = timeout or settings.MAILING_SMTP_POOL_TIMEOUT
+        reserved = get_reserved() if reserved is None else reserved
+        self.limits = get_lane_limits(self.size, reserved)
+        self.slots = slots if settings.MAILING_SMTP_LANE_SLOTS else None
+        self.slot_limits = get_lane_limits(
+            settings.MAILING_SMTP_LANE_SLOTS, reserved
+        )
+        self.slot_ttl = settings.MAILING_SMTP_LANE_SLOT_TTL
+        self.server = server
+        self._connect = connect
+        self._clock = clock
+        self._idle: deque[PooledConnection] = deque()
+        self._total: int = 0
+        self._lent: Counter[str] = Counter()
+        self._condition = threading.Condition()
+        self.created: int = 0
+        self.reused: int = 0
+        self.discarded: int = 0
+
+    def acquire(self, lane: str = Lane.TRANSACTIONAL) -> PooledConnection:
+        """Выдаёт полосе `lane` живое соединение, открывая новое при нужде."""
+        slot = self._take_slot(lane)
+
+        try:
+            pooled = self._take_connection(lane)
+        except BaseException:
+            self._release_slot(slot)
+            raise
+
+        pooled.slot = slot
+        pooled.slot_renewed = self._clock()
+        return pooled
+
+    def renew(self, pooled: PooledConnection) -> None:
+        """
+        Продлевает общее место выданного соединения.
+
+        Место продлевается, когда прошло больше половины его срока; если
+        его уже занял другой процесс, соединение занимает новое место.
+        """
+        if pooled.slot is None:
+            return
+        if self._clock() - pooled.slot_renewed < self.slot_ttl / 2:
+            return
+
+        if not self.slots.extend(pooled.slot, self.slot_ttl):
+            pooled.slot = self._take_slot(pooled.lane)
+        pooled.slot_renewed = self._clock()
+
+    def release(self, pooled: PooledConnection) -> None:
+        """Возвращает соединение в пул или закрывает его."""
+        self._release_slot(pooled.slot)
+        pooled.slot = None
+
+        if pooled.broken or pooled.messages_sent >= self.max_messages:
+            self._discard(pooled, pooled.lane)
+            return
+
+        try:
+            pooled.smtp.rset()
+        except (SMTPException, OSError):
+            self._discard(pooled, pooled.lane)
+            return
+
+        pooled.last_used = self._clock()
+        with self._condition:
+            self._idle.append(pooled)
+            self._lent[pooled.lane] -= 1
+            self._condition.notify_all()
+
+    def evict_idle(self) -> int:
+        """Закрывает соединения, простоявшие дольше `max_idle`."""
+        with self._condition:
+            expired = self._pop_expired()
+        for pooled in expired:
+            self._quit(pooled)
+        return len(expired)
+
+    def close(self) -> None:
+        """Закрывает все свободные соединения."""
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def get_metrics(self) -> dict:
+        """Возвращает размер пула, счётчики соединений и занятость полос."""
+        with self._condition:
+            return {
+                "size": self.size,
+                "open": self._total,
+                "idle": len(self._idle),
+                "created": self.created,
+                "reused": self.reused,
+                "discarded": self.discarded,
+                "lanes": {
+                    lane: {"limit": limit, "in_use": self._lent[lane]}
+                    for lane, limit in self.limits.items()
+                },
+            }
+
+    def _take_connection(self, lane: str) -> PooledConnection:
+        """Берёт соединение пула процесса, проверяя простоявшее."""
+        while True:
+            pooled = self._take_idle_or_reserve(lane)
+
+            if pooled is None:
+                pooled = self._open(lane)
+            elif self._is_healthy(pooled):
+                self.reused += 1
+            else:
+                self._discard(pooled, lane)
+                continue
+
+            pooled.lane = lane
+            return pooled
+
+    def _take_slot(self, lane: str) -> str | None:
+        """
+        Занимает общее для процессов место полосы `lane`.
+
+        Пока мест нет, попытка повторяется до `timeout` секунд.
+        """
+        if self.slots is None:
+            return None
+
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            slot = self.slots.acquire(
+                self.server,
+                lane,
+                settings.MAILING_SMTP_LANE_SLOTS,
+                self.slot_limits[lane],
+                self.slot_ttl,
+            )
+            if slot is not None:
+                return slot
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Нет свободных мест полосы {lane}")
+            time.sleep(SLOT_POLL_INTERVAL)
+
+    def _release_slot(self, slot: str | None) -> None:
+        if slot is not None:
+            self.slots.release(slot)
+
+    def _can_take(self, lane: str) -> bool:
+        """Может ли полоса взять свободное соединение или открыть новое."""
+        in_use = self._total - len(self._idle)
+        return in_use < self.limits[lane] and bool(
+            self._idle or self._total < self.size
+        )
+
+    def _take_idle_or_reserve(self, lane: str) -> PooledConnection | None:
+        """
+        Берёт свободное соединение или резервирует место под новое.
+
+        Возвращает None, если место зарезервировано; ждёт, если полосе
+        `lane` не осталось места.
+        """
+        deadline = time.monotonic() + self.timeout
+        expired: list[PooledConnection] = []
+
+        try:
+            with self._condition:
+                expired += self._pop_expired()
+                while not self._can_take(lane):
+                    if (remaining := deadline - time.monotonic()) <= 0:
+                        raise TimeoutError("Нет свободных SMTP-соединений")
+                    self._condition.wait(remaining)
+                    expired += self._pop_expired()
+
+                self._lent[lane] += 1
+                if self._idle:
+                    return self._idle.pop()
+                self._total += 1
+                return None
+        finally:
+            for pooled in expired:
+                self._quit(pooled)
+
+    def _pop_expired(self) -> list[PooledConnection]:
+        """
+        Убирает из очереди свободные соединения старше `max_idle`.
+
+        Вызывается под блокировкой; закрыть соединения должен вызывающий.
+        """
+        now = self._clock()
+        expired = []
+
+        while self._idle and now - self._idle[0].last_used >= self.max_idle:
+            expired.append(self._idle.popleft())
+
+        self._total -= len(expired)
+        self.discarded += len(expired)
+        return expired
+
+    def _open(self, lane: str) -> PooledConnection:
+        try:
+            smtp = self._connect()
+        except BaseException:
+            with self._condition:
+                self._total -= 1
+                self._lent[lane] -= 1
+                self._condition.notify_all()
+            raise
+
+        self.created += 1
+        return PooledConnection(smtp, self._clock())
+
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        """Проверяет NOOP соединение, простоявшее дольше интервала."""
+        if self._clock() - pooled.last_used < self.health_check_interval:
+            return True
+
+        try:
+            code, _ = pooled.smtp.noop()
+        except (SMTPException, OSError):
+            return False
+
+        return code == 250
+
+    def _discard(
+        self, pooled: PooledConnection, lane: str | None = None
+    ) -> None:
+        """
+        Закрывает соединение и освобождает его место в пуле.
+
+        `lane` — полоса, которой соединение было выдано.
+        """
+        self._quit(pooled)
+        with self._condition:
+            self._total -= 1
+            self.discarded += 1
+            if lane is not None:
+                self._lent[lane] -= 1
+            self._condition.notify_all()
+
+    @staticmethod
+    def _quit(pooled: PooledConnection) -> None:
+        with suppress(SMTPException, OSError):
+            pooled.smtp.quit()
+        with suppress(SMTPException, OSError):
+            pooled.smtp.close()
+
+
+class SMTPPoolRegistry:
+    """
+    Общие для процесса пулы соединений по параметрам сервера.
+
+    Пулы делят места полос с другими процессами через `slots`.
+    """
+
+    def __init__(self) -> None:
+        self._pools: dict[tuple, SMTPConnectionPool] = {}
+        self._lock = threading.Lock()
+        self.slots: LaneSlots | None = None
+
+    def get_pool(self, **params: Any) -> SMTPConnectionPool:
+        """Возвращает пул для параметров `SMTPBackend`, создаёт при нужде."""
+        key = tuple(sorted(params.items()))
+
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = SMTPConnectionPool(
+                    lambda: connect(**params),
+                    slots=self.slots,
+                    server=f"{params.get('host')}:{params.get('port')}",
+                )
+                self._pools[key] = pool
+            return pool
+
+    def get_metrics(self) -> list[dict]:
+        """Возвращает метрики всех пулов процесса."""
+        with self._lock:
+            pools = list(self._pools.items())
+        return [
+            {"host": dict(key)["host"], **pool.get_metrics()}
+            for key, pool in pools
+        ]
+
+    def clear(self) -> None:
+        """Закрывает свободные соединения и удаляет все пулы."""
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+
+smtp_pools = SMTPPoolRegistry()
+
+
+def connect(**params: Any) -> SMTP:
+    """
+    Открывает SMTP-соединение так же, как стандартный бэкенд Django.
+
+    SSL, STARTTLS и авторизация настраиваются теми же параметрами.
+    """
+    backend = SMTPBackend(fail_silently=False, **params)
+    backend.open()
+    return backend.connection
+
+
+class PooledEmailBackend(BaseEmailBackend):
+    """
+    Почтовый бэкенд Django, берущий соединения из общего пула процесса.
+
+    Между `open` и `close` бэкенд держит одно соединение пула, а
+    `close` возвращает его в пул вместо QUIT. Подключается настройкой
+    `EMAIL_BACKEND = "mailings.delivery.pool.PooledEmailBackend"`.
+    Соединения берутся для полосы `lane`; по умолчанию это служебные
+    письма, а рассылки передают свою полосу через `get_connection`.
+    """
+
+    def __init__(
+        self,
+        host: str | None = None,
+        port: int | None = None,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool | None = None,
+        use_ssl: bool | None = None,
+        timeout: float | None = None,
+        fail_silently: bool = False,
+        lane: str = Lane.TRANSACTIONAL,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(fail_silently=fail_silently, **kwargs)
+        self.lane = lane
+        self.pool = smtp_pools.get_pool(
+            host=host or settings.EMAIL_HOST,
+            port=port or settings.EMAIL_PORT,
+            username=(
+                settings.EMAIL_HOST_USER if username is None else username
+            ),
+            password=(
+                settings.EMAIL_HOST_PASSWORD if password is None else password
+            ),
+            use_tls=settings.EMAIL_USE_TLS if use_tls is None else use_tls,
+            use_ssl=settings.EMAIL_USE_SSL if use_ssl is None else use_ssl,
+            timeout=settings.EMAIL_TIMEOUT if timeout is None else timeout,
+        )
+        self._connection: PooledConnection | None = None
+        self._opened: bool = False
+        self._lock = threading.RLock()
+
+    def open(self) -> bool:
+        """Берёт соединение из пула; False, если оно уже взято."""
+        if self._opened:
+            return False
+
+        try:
+            self._checkout()
+        except (SMTPException, OSError):
+            if not self.fail_silently:
+                raise
+            return False
+
+        self._opened = True
+        return True
+
+    def close(self) -> None:
+        """Возвращает соединение в пул."""
+        self._opened = False
+
+        if self._connection is not None:
+            pooled, self._connection = self._connection, None
+            self.pool.release(pooled)
+
+    def send_messages(self, email_messages: list[EmailMessage]) -> int:
+        """Отправляет письма и возвращает число отправленных."""
+        if not email_messages:
+            return 0
+
+        with self._lock:
+            new_connection = self.open()
+            if not self._opened:
+                return 0
+            try:
+                return sum(
+                    self._send(message)
+                    for message in email_messages
+                    if message.recipients()
+                )
+            finally:
+                if new_connection:
+                    self.close()
+
+    def send_envelope(self, message: EmailMessage) -> dict:
+        """
+        Отправляет одно письмо и возвращает отклонённых получателей.
+
+        Как и `SMTP.sendmail`, выбрасывает исключение, если письмо
+        не принято ни для одного получателя.
+        """
+        return self.send_raw(*get_envelope(message))
+
+    def send_raw(
+        self, from_email: str, recipients: list[str], data: bytes
+    ) -> dict:
+        """Как `send_envelope`, но для уже собранного письма."""
+        with self._lock:
+            new_connection = self.open()
+            try:
+                return self._sendmail(from_email, recipients, data)
+            finally:
+                if new_connection:
+                    self.close()
+
+    def _checkout(self) -> PooledConnection:
+        if self._connection is None:
+            self._connection = self.pool.acquire(self.lane)
+        return self._connection
+
+    def _send(self, message: EmailMessage) -> int:
+        try:
+            self._sendmail(*get_envelope(message))
+        except SMTPException:
+            if not self.fail_silently:
+                raise
+            return 0
+        return 1
+
+    def _sendmail(
+        self, from_email: str, recipients: list[str], data: bytes
+    ) -> dict:
+        """
+        Отправляет письмо через текущее соединение.
+
+        Отработавшее `max_messages` писем или оборванное соединение
+        возвращается в пул сразу, следующее письмо возьмёт новое.
+        """
+        pooled = self._checkout()
+        self.pool.renew(pooled)
+
+        try:
+            return pooled.smtp.sendmail(from_email, recipients, data)
+        except (SMTPServerDisconnected, OSError):
+            pooled.broken = True
+            raise
+        finally:
+            pooled.messages_sent += 1
+            if pooled.broken or pooled.messages_sent >= self.pool.max_messages:
+                self._connection = None
+                self.pool.release(pooled)
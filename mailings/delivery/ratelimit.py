@@ -0,0 +1,268 @@
+"""Ограничение скорости отправки по алгоритму ведра токенов."""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from functools import partial
+from typing import Callable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+# Резервирует `count` токенов общего ведра и возвращает время (по часам
+# `time.time`), когда будет доступен первый из них.
+TokenStore = Callable[[int], float]
+
+
+class TokenBucket:
+    """
+    Потокобезопасное ведро токенов.
+
+    Токены пополняются со скоростью `rate` в секунду до `capacity`.
+    Вызывающий резервирует токен заранее, даже если ведро пусто, и ждёт
+    своей очереди — так параллельные отправители равномерно делят
+    скорость, а не устраивают всплески с последующими ошибками 421.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._clock = clock
+        self._tokens: float = self.capacity
+        self._updated: float = clock()
+        self._lock = threading.Lock()
+        self.acquired: int = 0
+        self.total_wait: float = 0.0
+        self.last_wait: float = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated) * self.rate,
+        )
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Текущее число токенов; отрицательное — есть очередь ожидания."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Резервирует токены и возвращает время ожидания в секундах."""
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            wait = max(0.0, -self._tokens / self.rate)
+            self.acquired += 1
+            self.total_wait += wait
+            self.last_wait = wait
+        return wait
+
+    async def areserve(self) -> float:
+        """Асинхронный аналог `reserve`."""
+        return self.reserve()
+
+    def get_metrics(self) -> dict[str, float]:
+        """Возвращает текущий уровень токенов и статистику ожидания."""
+        tokens = self.tokens
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "tokens": round(tokens, 3),
+                "acquired": self.acquired,
+                "total_wait": round(self.total_wait, 3),
+                "last_wait": round(self.last_wait, 3),
+            }
+
+
+class SharedTokenBucket:
+    """
+    Ведро токенов, общее для всех процессов-отправителей.
+
+    Состояние ведра хранится в `store`. Процесс резервирует токены
+    порциями на `lease` секунд отправки (`MAILING_RATE_LIMIT_LEASE`) и
+    раздаёт их своим потокам по очереди, так что все процессы вместе
+    не превышают `rate`. Токены порции, которые процесс не успел
+    израсходовать, пропадают.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        store: TokenStore,
+        lease: float | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.rate = rate
+        self.store = store
+        self.lease_size = max(
+            1, int(rate * (lease or settings.MAILING_RATE_LIMIT_LEASE))
+        )
+        self._clock = clock
+        self._ready: deque[float] = deque()
+        self._lock = threading.Lock()
+        self.acquired: int = 0
+        self.total_wait: float = 0.0
+        self.last_wait: float = 0.0
+
+    def reserve(self) -> float:
+        """Берёт токен и возвращает время ожидания в секундах."""
+        with self._lock:
+            if not self._ready:
+                self._lease()
+            return self._take()
+
+    async def areserve(self) -> float:
+        """Асинхронный аналог `reserve`: общее ведро читается в потоке."""
+        while True:
+            with self._lock:
+                if self._ready:
+                    return self._take()
+            await sync_to_async(self._lease_if_empty)()
+
+    def get_metrics(self) -> dict[str, float]:
+        """Возвращает число зарезервированных токенов и ожидание."""
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "tokens": len(self._ready),
+                "acquired": self.acquired,
+                "total_wait": round(self.total_wait, 3),
+                "last_wait": round(self.last_wait, 3),
+            }
+
+    def _lease_if_empty(self) -> None:
+        with self._lock:
+            if not self._ready:
+                self._lease()
+
+    def _lease(self) -> None:
+        """Резервирует порцию токенов в общем ведре."""
+        first = self.store(self.lease_size)
+        self._ready.extend(
+            first + index / self.rate for index in range(self.lease_size)
+        )
+
+    def _take(self) -> float:
+        wait = max(0.0, self._ready.popleft() - self._clock())
+        self.acquired += 1
+        self.total_wait += wait
+        self.last_wait = wait
+        return wait
+
+
+class RateLimit:
+    """Набор ведер, из каждого из которых письмо забирает по токену."""
+
+    def __init__(self, buckets: list[TokenBucket] | None = None) -> None:
+        self.buckets = buckets or []
+
+    def reserve(self) -> float:
+        """Резервирует токены во всех ведрах, возвращает наибольшую паузу."""
+        return max((bucket.reserve() for bucket in self.buckets), default=0.0)
+
+    def acquire(self) -> None:
+        """Ждёт своей очереди на отправку письма."""
+        if wait := self.reserve():
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """Асинхронный аналог `acquire`."""
+        waits = [await bucket.areserve() for bucket in self.buckets]
+        if wait := max(waits, default=0.0):
+            await asyncio.sleep(wait)
+
+
+class RateLimitRegistry:
+    """
+    Общие для процесса ведра токенов по почтовому серверу и владельцу.
+
+    Скорости задаются настройками `MAILING_RATE_LIMIT_PER_HOST` и
+    `MAILING_RATE_LIMIT_PER_OWNER` (писем в секунду, 0 — без ограничения),
+    запас на всплеск — `MAILING_RATE_LIMIT_BURST`.
+
+    С `store` процесс берёт токены из общего для всех процессов ведра
+    (`SharedTokenBucket`); `store` вызывается с областью, ключом,
+    скоростью, запасом и числом токенов.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: dict[
+            tuple[str, str], TokenBucket | SharedTokenBucket
+        ] = {}
+        self._lock = threading.Lock()
+
+    def get_bucket(
+        self,
+        scope: str,
+        key: str,
+        rate: float,
+        store: Callable[..., float] | None = None,
+    ) -> TokenBucket | SharedTokenBucket:
+        """Возвращает ведро для `scope` и `key`, при необходимости создаёт."""
+        with self._lock:
+            bucket = self._buckets.get((scope, key))
+            if bucket is None or bucket.rate != rate:
+                bucket = self._create_bucket(scope, key, rate, store)
+                self._buckets[(scope, key)] = bucket
+            return bucket
+
+    def for_delivery(
+        self,
+        host: str,
+        owner_id: int | None,
+        store: Callable[..., float] | None = None,
+    ) -> RateLimit:
+        """Возвращает ограничение для отправки писем владельца через host."""
+        limits = (
+            ("host", host, settings.MAILING_RATE_LIMIT_PER_HOST),
+            ("owner", owner_id, settings.MAILING_RATE_LIMIT_PER_OWNER),
+        )
+        return RateLimit(
+            [
+                self.get_bucket(scope, str(key), rate, store)
+                for scope, key, rate in limits
+                if rate and key is not None
+            ]
+        )
+
+    def get_metrics(self) -> list[dict]:
+        """Возвращает метрики всех ведер процесса."""
+        with self._lock:
+            buckets = list(self._buckets.items())
+        return [
+            {"scope": scope, "key": key, **bucket.get_metrics()}
+            for (scope, key), bucket in buckets
+        ]
+
+    def clear(self) -> None:
+        """Удаляет все ведра."""
+        with self._lock:
+            self._buckets.clear()
+
+    @staticmethod
+    def _create_bucket(
+        scope: str,
+        key: str,
+        rate: float,
+        store: Callable[..., float] | None,
+    ) -> TokenBucket | SharedTokenBucket:
+        capacity = settings.MAILING_RATE_LIMIT_BURST or max(rate, 1.0)
+        if store is None:
+            return TokenBucket(rate, capacity=capacity)
+        return SharedTokenBucket(
+            rate, partial(store, scope, key, rate, capacity)
+        )
+
+
+rate_limits = RateLimitRegistry()
@@ -0,0 +1,64 @@
+"""Классификация ошибок отправки и расписание повторных попыток."""
+
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+from smtplib import (
+    SMTPException,
+    SMTPRecipientsRefused,
+    SMTPResponseException,
+    SMTPServerDisconnected,
+)
+
+from django.conf import settings
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Проверяет, что ошибку отправки стоит повторить позже.
+
+    Временными считаются ответы 4xx, обрывы соединения и сетевые ошибки;
+    ответы 5xx и прочие ошибки считаются постоянными.
+    """
+    if isinstance(error, SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+
+    if isinstance(error, SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+
+    if isinstance(error, SMTPServerDisconnected):
+        return True
+
+    return isinstance(error, OSError) and not isinstance(error, SMTPException)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Экспоненциальная задержка повторных попыток с джиттером.
+
+    Перед попыткой номер n ожидание выбирается случайно между половиной
+    и полной величиной `base_delay * 2 ** (n - 1)`, но не больше
+    `max_delay`. После `max_attempts` попыток ошибка считается постоянной.
+    """
+
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+
+    @classmethod
+    def from_settings(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=settings.MAILING_RETRY_MAX_ATTEMPTS,
+            base_delay=settings.MAILING_RETRY_BASE_DELAY,
+            max_delay=settings.MAILING_RETRY_MAX_DELAY,
+        )
+
+    def can_retry(self, attempts: int) -> bool:
+        """Проверяет, осталась ли ещё попытка после `attempts` попыток."""
+        return attempts < self.max_attempts
+
+    def get_delay(self, attempts: int) -> timedelta:
+        """Возвращает задержку перед следующей попыткой."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return timedelta(seconds=random.uniform(delay / 2, delay))
@@ -0,0 +1,304 @@
+"""Локальный SMTP-сервер-приёмник для нагрузочных тестов."""
+
+import asyncio
+import random
+import re
+import ssl
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+DATA_END: bytes = b"\r\n.\r\n"
+MAX_MESSAGE_SIZE: int = 32 * 1024 * 1024
+PATH_RE = re.compile(r"<([^>]*)>")
+
+
+def parse_path(argument: str) -> str:
+    """Возвращает адрес из аргумента MAIL FROM/RCPT TO."""
+    match = PATH_RE.search(argument)
+    return match.group(1) if match else argument.partition(":")[2].strip()
+
+
+@dataclass
+class SinkStats:
+    """Счётчики принятых и отклонённых писем."""
+
+    sessions: int = 0
+    active_sessions: int = 0
+    max_active_sessions: int = 0
+    messages: int = 0
+    recipients: int = 0
+    bytes: int = 0
+    temp_failures: int = 0
+    perm_failures: int = 0
+    drops: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    last_message_at: float | None = None
+
+    def as_dict(self) -> dict:
+        """Возвращает счётчики, время работы и скорость приёма."""
+        stats = asdict(self)
+        elapsed = (self.last_message_at or time.monotonic()) - self.started_at
+        stats.pop("started_at")
+        stats.pop("last_message_at")
+        stats["elapsed"] = round(elapsed, 3)
+        stats["messages_per_second"] = round(
+            self.messages / elapsed if elapsed > 0 else 0.0, 1
+        )
+        return stats
+
+
+class SinkSession:
+    """Состояние одной SMTP-сессии."""
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.mail_from: str | None = None
+        self.rcpt_to: list[str] = []
+        self.tls: bool = False
+        self.closed: bool = False
+
+    def reply(self, line: str) -> None:
+        self.writer.write(f"{line}\r\n".encode())
+
+    def reset(self) -> None:
+        self.mail_from, self.rcpt_to = None, []
+
+
+class SMTPSink:
+    """
+    SMTP-сервер на asyncio, принимающий и отбрасывающий письма.
+
+    Понимает EHLO/HELO, STARTTLS (если задан `ssl_context`), AUTH,
+    PIPELINING, MAIL, RCPT, DATA, RSET, NOOP и QUIT. Ответ на письмо
+    задерживается на `latency` секунд, с вероятностями `temp_fail_rate`,
+    `perm_fail_rate` и `drop_rate` письмо получает ответ 451, 554 или
+    соединение обрывается. Адреса из `rejected` отклоняются на RCPT.
+    Письма сохраняются в `messages`, только если `keep_messages`.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        temp_fail_rate: float = 0.0,
+        perm_fail_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        rejected: set[str] | tuple = (),
+        ssl_context: ssl.SSLContext | None = None,
+        keep_messages: bool = False,
+        seed: int | None = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.temp_fail_rate = temp_fail_rate
+        self.perm_fail_rate = perm_fail_rate
+        self.drop_rate = drop_rate
+        self.rejected = set(rejected)
+        self.ssl_context = ssl_context
+        self.keep_messages = keep_messages
+        self.messages: list[tuple[str, list[str], bytes]] = []
+        self.stats = SinkStats()
+        self._random = random.Random(seed)
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> "SMTPSink":
+        """Начинает принимать соединения; порт 0 — любой свободный."""
+        self._server = await asyncio.start_server(
+            self.handle, self.host, self.port, limit=MAX_MESSAGE_SIZE
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.stats = SinkStats()
+        return self
+
+    async def serve_forever(self) -> None:
+        """Принимает соединения до отмены задачи."""
+        await self._server.serve_forever()
+
+    async def stop(self) -> None:
+        """Перестаёт принимать соединения."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Обслуживает одну SMTP-сессию."""
+        stats = self.stats
+        stats.sessions += 1
+        stats.active_sessions += 1
+        stats.max_active_sessions = max(
+            stats.max_active_sessions, stats.active_sessions
+        )
+        session = SinkSession(reader, writer)
+
+        try:
+            await self._serve(session)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            stats.active_sessions -= 1
+            writer.close()
+
+    async def _serve(self, session: SinkSession) -> None:
+        session.reply("220 localhost ESMTP sink")
+
+        while not session.closed and (line := await session.reader.readline()):
+            command = line.decode(errors="replace").strip()
+            verb, _, argument = command.partition(" ")
+            handler = getattr(self, f"_smtp_{verb.lower()}", None)
+
+            if handler is None:
+                session.reply("502 Command not implemented")
+            else:
+                await handler(session, argument)
+            if not session.closed:
+                await session.writer.drain()
+
+    async def _smtp_ehlo(self, session: SinkSession, argument: str) -> None:
+        features = ["PIPELINING", "8BITMIME", "AUTH PLAIN LOGIN"]
+        if self.ssl_context and not session.tls:
+            features.append("STARTTLS")
+        lines = ["localhost", *features]
+        for line in lines[:-1]:
+            session.reply(f"250-{line}")
+        session.reply(f"250 {lines[-1]}")
+
+    async def _smtp_helo(self, session: SinkSession, argument: str) -> None:
+        session.reply("250 localhost")
+
+    async def _smtp_starttls(
+        self, session: SinkSession, argument: str
+    ) -> None:
+        if not self.ssl_context or session.tls:
+            session.reply("454 TLS not available")
+            return
+        session.reply("220 Ready to start TLS")
+        await session.writer.drain()
+        await session.writer.start_tls(self.ssl_context)
+        session.tls = True
+        session.reset()
+
+    async def _smtp_auth(self, session: SinkSession, argument: str) -> None:
+        session.reply("235 Authentication successful")
+
+    async def _smtp_mail(self, session: SinkSession, argument: str) -> None:
+        session.reset()
+        session.mail_from = parse_path(argument)
+        session.reply("250 OK")
+
+    async def _smtp_rcpt(self, session: SinkSession, argument: str) -> None:
+        address = parse_path(argument)
+
+        if session.mail_from is None:
+            session.reply("503 Need MAIL command")
+        elif address in self.rejected:
+            session.reply("550 No such user")
+        else:
+            session.rcpt_to.append(address)
+            session.reply("250 OK")
+
+    async def _smtp_data(self, session: SinkSession, argument: str) -> None:
+        if not session.rcpt_to:
+            session.reply("554 No valid recipients")
+            return
+
+        session.reply("354 End data with <CR><LF>.<CR><LF>")
+        await session.writer.drain()
+        data = await session.reader.readuntil(DATA_END)
+        data = data[: -len(DATA_END) + 2].replace(b"\r\n..", b"\r\n.")
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._accept(session, data)
+        session.reset()
+
+    def _accept(self, session: SinkSession, data: bytes) -> None:
+        """Принимает письмо или внедряет сбой."""
+        chance = self._random.random()
+        stats = self.stats
+
+        if chance < self.drop_rate:
+            stats.drops += 1
+            session.closed = True
+            session.writer.transport.abort()
+        elif chance < self.drop_rate + self.temp_fail_rate:
+            stats.temp_failures += 1
+            session.reply("451 4.3.0 Temporary failure")
+        elif chance < (
+            self.drop_rate + self.temp_fail_rate + self.perm_fail_rate
+        ):
+            stats.perm_failures += 1
+            session.reply("554 5.6.0 Message rejected")
+        else:
+            self._record(session, data)
+            session.reply("250 Queued")
+
+    def _record(self, session: SinkSession, data: bytes) -> None:
+        stats = self.stats
+        stats.messages += 1
+        stats.recipients += len(session.rcpt_to)
+        stats.bytes += len(data)
+        stats.last_message_at = time.monotonic()
+
+        if self.keep_messages:
+            self.messages.append((session.mail_from, session.rcpt_to, data))
+
+    async def _smtp_rset(self, session: SinkSession, argument: str) -> None:
+        session.reset()
+        session.reply("250 OK")
+
+    async def _smtp_noop(self, session: SinkSession, argument: str) -> None:
+        session.reply("250 OK")
+
+    async def _smtp_quit(self, session: SinkSession, argument: str) -> None:
+        session.reply("221 Bye")
+        await session.writer.drain()
+        session.closed = True
+
+
+class BackgroundSMTPSink:
+    """
+    Запускает `SMTPSink` в отдельном потоке со своим event loop.
+
+    Нужен там, где отправляющий код синхронный: тесты, бенчмарки.
+    """
+
+    def __init__(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, daemon=True
+        )
+        self._sinks: list[SMTPSink] = []
+
+    def __enter__(self) -> "BackgroundSMTPSink":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self, **kwargs) -> SMTPSink:
+        """Создаёт и запускает приёмник с параметрами `SMTPSink`."""
+        sink = SMTPSink(**kwargs)
+        asyncio.run_coroutine_threadsafe(sink.start(), self._loop).result()
+        self._sinks.append(sink)
+        return sink
+
+    def stop(self) -> None:
+        """Останавливает приёмники и event loop."""
+        for sink in self._sinks:
+            asyncio.run_coroutine_threadsafe(sink.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,495 @@
+"""Спул писем на диске и отправка из него через пул SMTP-соединений."""
+
+import atexit
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+from smtplib import SMTPException
+from typing import Iterator
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .aiosmtp import get_envelope
+from .pool import PooledEmailBackend
+from .retry import is_transient_error
+
+logger = logging.getLogger(__name__)
+
+RECORD_HEADER = struct.Struct(">II")
+ACK = struct.Struct(">Q")
+OPEN_SUFFIX: str = ".open"
+SEGMENT_SUFFIX: str = ".seg"
+ACK_SUFFIX: str = ".ack"
+DEAD_DIR: str = "dead"
+LOCK_FILE: str = ".flush.lock"
+
+
+@dataclass(frozen=True)
+class SpooledMessage:
+    """Письмо из спула: конверт и байты письма."""
+
+    from_email: str
+    recipients: list[str]
+    data: bytes
+
+
+def encode_record(
+    from_email: str, recipients: list[str], data: bytes
+) -> bytes:
+    """
+    Кодирует письмо записью спула.
+
+    Запись — длина и CRC32 полезной нагрузки, затем JSON с конвертом,
+    перевод строки и байты письма. По CRC при чтении отбрасывается
+    запись, дописанная не до конца.
+    """
+    envelope = json.dumps({"from": from_email, "to": recipients}).encode()
+    payload = envelope + b"\n" + data
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(
+    path: Path, offset: int = 0
+) -> Iterator[tuple[int, SpooledMessage]]:
+    """
+    Читает записи сегмента начиная с `offset`.
+
+    Возвращает пары из смещения конца записи и письма. Чтение
+    останавливается на первой неполной или повреждённой записи.
+    """
+    with open(path, "rb") as segment:
+        segment.seek(offset)
+
+        while header := segment.read(RECORD_HEADER.size):
+            if len(header) < RECORD_HEADER.size:
+                return
+            length, checksum = RECORD_HEADER.unpack(header)
+            payload = segment.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+
+            envelope, _, data = payload.partition(b"\n")
+            envelope = json.loads(envelope)
+            yield segment.tell(), SpooledMessage(
+                envelope["from"], envelope["to"], data
+            )
+
+
+def count_records(path: Path, offset: int = 0) -> int:
+    """
+    Считает полные записи сегмента начиная с `offset`.
+
+    Читаются только заголовки записей, письма пропускаются.
+    """
+    count = 0
+
+    with open(path, "rb") as segment:
+        size = os.fstat(segment.fileno()).st_size
+        segment.seek(offset)
+
+        while header := segment.read(RECORD_HEADER.size):
+            if len(header) < RECORD_HEADER.size:
+                break
+            length, _ = RECORD_HEADER.unpack(header)
+            if segment.seek(length, os.SEEK_CUR) > size:
+                break
+            count += 1
+    return count
+
+
+def read_ack(ack_path: Path) -> int:
+    """Возвращает смещение отправленной части сегмента из `.ack`-файла."""
+    try:
+        data = ack_path.read_bytes()
+    except FileNotFoundError:
+        return 0
+    return ACK.unpack(data)[0] if len(data) == ACK.size else 0
+
+
+def fsync_directory(directory: Path) -> None:
+    """Сбрасывает на диск каталог, чтобы переименование пережило сбой."""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SpoolWriter:
+    """
+    Дописывает письма в сегмент спула текущего процесса.
+
+    Запись — один `write` в файл, открытый на дозапись, поэтому письмо
+    переживает падение процесса сразу после возврата, а вызывающий поток
+    никогда не ждёт диска. Фоновый поток раз в `fsync_interval_ms`
+    миллисекунд сбрасывает на диск все письма за интервал одним `fsync`
+    (при сбое питания теряется не больше интервала) и закрывает
+    сегмент, когда тот больше `segment_size` байт или старше
+    `segment_age` секунд: `.open` переименовывается в `.seg` и
+    становится виден `flush_spool`.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_size: int | None = None,
+        segment_age: float | None = None,
+        fsync_interval_ms: int | None = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.segment_size = segment_size or settings.MAILING_SPOOL_SEGMENT_SIZE
+        self.segment_age = segment_age or settings.MAILING_SPOOL_SEGMENT_AGE
+        self.fsync_interval = (
+            fsync_interval_ms or settings.MAILING_SPOOL_FSYNC_INTERVAL_MS
+        ) / 1000
+        self._lock = threading.Lock()
+        self._fd: int | None = None
+        self._path: Path | None = None
+        self._size: int = 0
+        self._opened_at: float = 0.0
+        self._dirty: bool = False
+        self._sequence: int = 0
+        self._stopped = threading.Event()
+        self._syncer: threading.Thread | None = None
+
+    def append(self, records: list[bytes]) -> None:
+        """Дописывает записи в текущий сегмент."""
+        data = b"".join(records)
+        if not data:
+            return
+
+        with self._lock:
+            if self._fd is None:
+                self._open()
+            os.write(self._fd, data)
+            self._size += len(data)
+            self._dirty = True
+
+    def sync(self, seal: bool = False) -> None:
+        """
+        Сбрасывает сегмент на диск.
+
+        Переполненный или устаревший сегмент, а при `seal` — любой,
+        закрывается и отдаётся на отправку.
+        """
+        with self._lock:
+            if self._fd is None:
+                return
+            if seal or self._is_full():
+                fd, path = self._detach()
+            elif self._dirty:
+                fd, path = os.dup(self._fd), None
+                self._dirty = False
+            else:
+                return
+
+        os.fsync(fd)
+        os.close(fd)
+        if path is not None:
+            os.rename(path, path.with_suffix(SEGMENT_SUFFIX))
+        fsync_directory(self.directory)
+
+    def close(self) -> None:
+        """Закрывает текущий сегмент и останавливает фоновый поток."""
+        self._stopped.set()
+        self.sync(seal=True)
+
+    def _is_full(self) -> bool:
+        return (
+            self._size >= self.segment_size
+            or time.monotonic() - self._opened_at >= self.segment_age
+        )
+
+    def _open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._sequence += 1
+        name = f"{time.time_ns():020d}-{os.getpid()}-{self._sequence:06d}"
+        self._path = self.directory / f"{name}{OPEN_SUFFIX}"
+        self._fd = os.open(
+            self._path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600
+        )
+        self._size = 0
+        self._opened_at = time.monotonic()
+
+        if self._syncer is None:
+            self._syncer = threading.Thread(
+                target=self._run_syncer, name="spool-fsync", daemon=True
+            )
+            self._syncer.start()
+
+    def _detach(self) -> tuple[int, Path]:
+        """Отцепляет текущий сегмент; следующая запись откроет новый."""
+        segment = (self._fd, self._path)
+        self._fd, self._path, self._dirty = None, None, False
+        return segment
+
+    def _run_syncer(self) -> None:
+        while not self._stopped.wait(self.fsync_interval):
+            try:
+                self.sync()
+            except OSError:
+                logger.exception("Ошибка записи спула %s", self.directory)
+
+
+_writers: dict[tuple[int, str], SpoolWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_spool_writer(directory: str | Path | None = None) -> SpoolWriter:
+    """
+    Возвращает писатель спула каталога для текущего процесса.
+
+    Писатель создаётся заново в дочернем процессе после fork, так как
+    его файл и фоновый поток принадлежат родителю.
+    """
+    directory = str(directory or settings.MAILING_SPOOL_DIR)
+    key = (os.getpid(), directory)
+
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = SpoolWriter(Path(directory))
+            atexit.register(writer.close)
+        return writer
+
+
+class SpoolEmailBackend(BaseEmailBackend):
+    """
+    Почтовый бэкенд Django, складывающий письма в спул на диске.
+
+    Отправка занимает микросекунды: письмо дописывается в сегмент, а
+    по SMTP его отправляет `flush_spool`. Подключается настройкой
+    `TRANSACTIONAL_EMAIL_BACKEND = "mailings.delivery.SpoolEmailBackend"`.
+    """
+
+    def __init__(
+        self,
+        spool_dir: str | Path | None = None,
+        fail_silently: bool = False,
+        **kwargs,
+    ) -> None:
+        super().__init__(fail_silently=fail_silently, **kwargs)
+        self.writer = get_spool_writer(spool_dir)
+
+    def send_messages(self, email_messages: list[EmailMessage]) -> int:
+        """Складывает письма в спул и возвращает их число."""
+        records = [
+            encode_record(*get_envelope(message))
+            for message in email_messages
+            if message.recipients()
+        ]
+
+        try:
+            self.writer.append(records)
+        except OSError:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(records)
+
+
+@dataclass
+class FlushStats:
+    """Итоги одного прохода по спулу."""
+
+    recovered: int = 0
+    segments: int = 0
+    sent: int = 0
+    dead: int = 0
+    deferred: bool = False
+
+
+class SpoolFlusher:
+    """
+    Отправляет письма из закрытых сегментов спула.
+
+    Сегменты отправляются по порядку через соединение из пула
+    (`PooledEmailBackend`). После каждого письма смещение записывается
+    в файл `<сегмент>.ack`, поэтому после падения отправка продолжается
+    с места остановки; повторно может уйти только письмо, отправленное
+    перед самым падением. Письма, отклонённые сервером окончательно,
+    отклонённые адреса принятых писем и повреждённый остаток сегмента
+    переносятся в каталог `dead`. При
+    временной ошибке проход прерывается до следующего вызова.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        backend: BaseEmailBackend | None = None,
+    ) -> None:
+        self.directory = Path(directory or settings.MAILING_SPOOL_DIR)
+        self.backend = backend or PooledEmailBackend()
+        self._lock_file = None
+
+    def lock(self) -> bool:
+        """
+        Захватывает спул для этого отправителя.
+
+        False, если спул уже обслуживает другой процесс `flush_spool`.
+        """
+        import fcntl
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(self.directory / LOCK_FILE, "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+        return True
+
+    def recover(self) -> int:
+        """
+        Закрывает сегменты упавших процессов и возвращает их число.
+
+        Сегмент `.open`, процесса которого больше нет, закрывается как
+        есть; недописанная последняя запись отбросится при чтении.
+        """
+        recovered = 0
+
+        for path in sorted(self.directory.glob(f"*{OPEN_SUFFIX}")):
+            pid = int(path.stem.split("-")[1])
+            if pid != os.getpid() and not is_process_alive(pid):
+                os.rename(path, path.with_suffix(SEGMENT_SUFFIX))
+                recovered += 1
+
+        if recovered:
+            fsync_directory(self.directory)
+        return recovered
+
+    def flush(self) -> FlushStats:
+        """
+        Отправляет письма всех закрытых сегментов.
+
+        Если SMTP-сервер недоступен, проход откладывается целиком.
+        """
+        stats = FlushStats(recovered=self.recover())
+        segments = sorted(self.directory.glob(f"*{SEGMENT_SUFFIX}"))
+
+        try:
+            if segments:
+                self.backend.open()
+            for path in segments:
+                if not self.flush_segment(path, stats):
+                    break
+                stats.segments += 1
+        except (SMTPException, OSError) as error:
+            logger.warning("Отправка спула отложена: %s", error)
+        finally:
+            self.backend.close()
+
+        stats.deferred = stats.segments < len(segments)
+        return stats
+
+    def flush_segment(self, path: Path, stats: FlushStats) -> bool:
+        """
+        Отправляет письма сегмента и удаляет его.
+
+        Возвращает False, если отправку прервала временная ошибка.
+        """
+        ack_path = path.with_suffix(ACK_SUFFIX)
+        offset = read_ack(ack_path)
+        ack_fd = os.open(ack_path, os.O_WRONLY | os.O_CREAT, 0o600)
+
+        try:
+            for offset, message in read_records(path, offset):
+                if not self._deliver(path, message, stats):
+                    return False
+                os.pwrite(ack_fd, ACK.pack(offset), 0)
+        finally:
+            os.close(ack_fd)
+
+        if offset < path.stat().st_size:
+            logger.error("Повреждён сегмент спула %s с %s", path, offset)
+            self._bury_tail(path, offset)
+
+        path.unlink()
+        ack_path.unlink()
+        return True
+
+    def _deliver(
+        self, path: Path, message: SpooledMessage, stats: FlushStats
+    ) -> bool:
+        """
+        Отправляет письмо; False, если ошибка временная.
+
+        Письмо с отклонёнными на RCPT адресами отправлено остальным,
+        поэтому в `dead` уходит копия только для отклонённых адресов.
+        """
+        try:
+            refused = self.backend.send_raw(
+                message.from_email, message.recipients, message.data
+            )
+        except (SMTPException, OSError) as error:
+            if is_transient_error(error):
+                logger.warning("Отправка спула отложена: %s", error)
+                return False
+            logger.error("Письмо из спула отклонено: %s", error)
+            self._bury_message(path, message.recipients, message)
+            stats.dead += 1
+            return True
+
+        if refused:
+            logger.error("Адреса письма из спула отклонены: %s", refused)
+            self._bury_message(path, list(refused), message)
+            stats.dead += 1
+
+        stats.sent += 1
+        return True
+
+    def _bury_message(
+        self, path: Path, recipients: list[str], message: SpooledMessage
+    ) -> None:
+        """Переносит в `dead` письмо для адресов `recipients`."""
+        self._bury(
+            path, encode_record(message.from_email, recipients, message.data)
+        )
+
+    def _bury(self, path: Path, data: bytes) -> None:
+        """Дописывает данные в одноимённый сегмент каталога `dead`."""
+        dead_dir = self.directory / DEAD_DIR
+        dead_dir.mkdir(exist_ok=True)
+        with open(dead_dir / path.name, "ab") as dead:
+            dead.write(data)
+            dead.flush()
+            os.fsync(dead.fileno())
+
+    def _bury_tail(self, path: Path, offset: int) -> None:
+        with open(path, "rb") as segment:
+            segment.seek(offset)
+            self._bury(path.with_suffix(".tail"), segment.read())
+
+
+def count_spooled(directory: str | Path | None = None) -> int:
+    """Возвращает число писем спула, которые ещё не отправлены."""
+    directory = Path(directory or settings.MAILING_SPOOL_DIR)
+    pending = 0
+
+    for path in directory.glob("*"):
+        if path.suffix not in (OPEN_SUFFIX, SEGMENT_SUFFIX):
+            continue
+        offset = read_ack(path.with_suffix(ACK_SUFFIX))
+        with suppress(FileNotFoundError):
+            pending += count_records(path, offset)
+    return pending
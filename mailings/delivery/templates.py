@@ -0,0 +1,150 @@
+"""Персонализация писем: компиляция и кеширование шаблонов."""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable
+
+from mailings.constants import MERGE_FIELDS, TEMPLATE_CACHE_SIZE
+
+PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class CompiledTemplate:
+    """
+    Шаблон текста с полями вида `{{ first_name }}`.
+
+    Текст разбирается один раз на готовый список фрагментов; при
+    подстановке копируется только этот список, а поля берутся атрибутами
+    получателя. Неизвестные поля остаются в тексте как есть.
+    """
+
+    __slots__ = ("text", "_parts", "_slots")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._parts: list[str] = []
+        self._slots: list[tuple[int, str]] = []
+        position = 0
+
+        for match in PLACEHOLDER_RE.finditer(text):
+            field = match.group(1)
+            if field not in MERGE_FIELDS:
+                continue
+            self._parts.append(text[position : match.start()])
+            self._slots.append((len(self._parts), field))
+            self._parts.append("")
+            position = match.end()
+
+        self._parts.append(text[position:])
+
+    @property
+    def is_static(self) -> bool:
+        """Возвращает True, если в тексте нет полей для подстановки."""
+        return not self._slots
+
+    def render(self, recipient: Any) -> str:
+        """Подставляет поля получателя в текст."""
+        if not self._slots:
+            return self.text
+
+        parts = self._parts.copy()
+        for index, field in self._slots:
+            parts[index] = str(getattr(recipient, field))
+
+        return "".join(parts)
+
+
+class MessageTemplate:
+    """Скомпилированные тема и тело сообщения."""
+
+    __slots__ = ("subject", "body")
+
+    def __init__(self, subject: str, body: str) -> None:
+        self.subject = CompiledTemplate(subject)
+        self.body = CompiledTemplate(body)
+
+    @property
+    def is_personalized(self) -> bool:
+        """Возвращает True, если тема или тело содержат поля."""
+        return not (self.subject.is_static and self.body.is_static)
+
+    def render(self, recipient: Any) -> tuple[str, str]:
+        """Возвращает тему и тело письма для получателя."""
+        return self.subject.render(recipient), self.body.render(recipient)
+
+    def render_batch(self, recipients: Iterable[Any]) -> list[tuple[str, str]]:
+        """
+        Возвращает темы и тела писем для пачки получателей.
+
+        Неперсонализированное сообщение не рендерится вовсе: всем
+        получателям достаётся одна и та же пара строк.
+        """
+        if not self.is_personalized:
+            content = (self.subject.text, self.body.text)
+            return [content for _ in recipients]
+
+        return [self.render(recipient) for recipient in recipients]
+
+
+def get_content_hash(subject: str, body: str) -> str:
+    """Возвращает хеш содержимого сообщения."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(subject.encode())
+    digest.update(b"\0")
+    digest.update(body.encode())
+    return digest.hexdigest()
+
+
+class TemplateCache:
+    """
+    Потокобезопасный LRU-кеш скомпилированных шаблонов.
+
+    Ключ — первичный ключ сообщения; вместе с шаблоном хранится хеш
+    содержимого, поэтому изменённое в обход `save` сообщение всё равно
+    будет скомпилировано заново.
+    """
+
+    def __init__(self, max_size: int = TEMPLATE_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._templates: OrderedDict[Any, tuple[str, MessageTemplate]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, subject: str, body: str) -> MessageTemplate:
+        """Возвращает шаблон сообщения, компилируя его при необходимости."""
+        content_hash = get_content_hash(subject, body)
+
+        with self._lock:
+            cached = self._templates.get(key)
+            if cached and cached[0] == content_hash:
+                self._templates.move_to_end(key)
+                return cached[1]
+
+        template = MessageTemplate(subject, body)
+
+        with self._lock:
+            self._templates[key] = (content_hash, template)
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+
+        return template
+
+    def invalidate(self, key: Any) -> None:
+        """Удаляет шаблон сообщения из кеша."""
+        with self._lock:
+            self._templates.pop(key, None)
+
+    def clear(self) -> None:
+        """Очищает кеш."""
+        with self._lock:
+            self._templates.clear()
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._templates
+
+
+templates = TemplateCache()
@@ -0,0 +1,73 @@
+"""Буферизованная запись объектов в базу данных."""
+
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import models
+
+
+class BulkWriter:
+    """
+    Накапливает объекты модели и сохраняет их через `bulk_create`.
+
+    Вместо `bulk_create` можно указать другой метод менеджера модели
+    (`method`), принимающий список объектов. Буфер сбрасывается каждые
+    `batch_size` объектов или не реже, чем раз в `flush_interval_ms`
+    миллисекунд (проверяется при добавлении), а также при выходе из
+    контекстного менеджера — в том числе по исключению.
+    """
+
+    def __init__(
+        self,
+        model: type[models.Model],
+        batch_size: int | None = None,
+        flush_interval_ms: int | None = None,
+        method: str = "bulk_create",
+    ) -> None:
+        self.model = model
+        self.batch_size = batch_size or settings.MAILING_ATTEMPT_LOG_BATCH_SIZE
+        self.flush_interval = (
+            flush_interval_ms or settings.MAILING_ATTEMPT_LOG_FLUSH_MS
+        ) / 1000
+        self._save = getattr(model.objects, method)
+        self._buffer: list[models.Model] = []
+        self._last_flush: float = time.monotonic()
+
+    def __enter__(self) -> "BulkWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    def _should_flush(self) -> bool:
+        return (
+            len(self._buffer) >= self.batch_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    def add(self, obj: models.Model) -> None:
+        """Добавляет объект в буфер и сбрасывает его при необходимости."""
+        self._buffer.append(obj)
+
+        if self._should_flush():
+            self.flush()
+
+    async def aadd(self, obj: models.Model) -> None:
+        """Асинхронный аналог `add`."""
+        self._buffer.append(obj)
+
+        if self._should_flush():
+            await self.aflush()
+
+    def flush(self) -> None:
+        """Сохраняет накопленные объекты одним запросом."""
+        if self._buffer:
+            self._save(self._buffer)
+
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    async def aflush(self) -> None:
+        """Асинхронный аналог `flush`."""
+        await sync_to_async(self.flush)()
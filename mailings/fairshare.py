@@ -0,0 +1,109 @@
+"""Справедливое распределение отправки между владельцами рассылок."""
+
+from collections import Counter, deque
+
+
+class FairScheduler:
+    """
+    Делит места отправки между владельцами по deficit round robin.
+
+    Рассылки отправляются частями примерно по `quantum` писем. Владельцы
+    по кругу получают кредит `quantum × вес` и запускают части, пока
+    кредит не меньше `quantum`; когда часть отправлена, владельцу
+    возвращается неизрасходованный остаток кредита. Поэтому отправка
+    делится между владельцами пропорционально весам, а части небольших
+    рассылок встают между частями огромной, не дожидаясь её конца.
+
+    Владелец, которому нечего отправлять, выбывает из круга вместе с
+    кредитом. Одновременно у владельца не больше `caps[owner]` частей.
+    """
+
+    def __init__(self, quantum: int) -> None:
+        self.quantum = quantum
+        self._deficit: dict[int, int] = {}
+        self._ring: deque[int] = deque()
+        self._running: Counter[int] = Counter()
+
+    def select(
+        self,
+        ready: dict[int, list[int]],
+        free: int,
+        weights: dict[int, int] | None = None,
+        caps: dict[int, int] | None = None,
+    ) -> list[tuple[int, int]]:
+        """
+        Выбирает до `free` частей и возвращает пары (рассылка, владелец).
+
+        `ready` — подошедшие рассылки каждого владельца в порядке очереди.
+        """
+        weights = weights or {}
+        caps = caps or {}
+        queues = {
+            owner: deque(mailings)
+            for owner, mailings in ready.items()
+            if mailings
+        }
+        self._update_ring(queues)
+        picked: list[tuple[int, int]] = []
+
+        while len(picked) < free and any(
+            self._can_start(owner, queues, caps) for owner in self._ring
+        ):
+            owner = self._ring[0]
+            if (
+                self._can_start(owner, queues, caps)
+                and self._deficit[owner] >= self.quantum
+            ):
+                self._deficit[owner] -= self.quantum
+                self._running[owner] += 1
+                picked.append((queues[owner].popleft(), owner))
+                continue
+
+            self._ring.rotate(-1)
+            owner = self._ring[0]
+            if self._can_start(owner, queues, caps):
+                self._deficit[owner] += self.quantum * weights.get(owner, 1)
+
+        return picked
+
+    def finish(self, owner: int, processed: int) -> None:
+        """Учитывает отправленную часть и возвращает остаток кредита."""
+        self._running[owner] -= 1
+        if self._running[owner] <= 0:
+            del self._running[owner]
+        if owner in self._deficit:
+            self._deficit[owner] += self.quantum - processed
+
+    def get_metrics(self) -> dict[int, dict[str, int]]:
+        """Возвращает кредит и число отправляемых частей владельцев."""
+        return {
+            owner: {
+                "deficit": self._deficit[owner],
+                "running": self._running[owner],
+            }
+            for owner in self._ring
+        }
+
+    def _can_start(
+        self,
+        owner: int,
+        queues: dict[int, deque[int]],
+        caps: dict[int, int],
+    ) -> bool:
+        """Есть ли у владельца готовая рассылка и свободное место."""
+        cap = caps.get(owner)
+        return bool(queues.get(owner)) and (
+            cap is None or self._running[owner] < cap
+        )
+
+    def _update_ring(self, queues: dict[int, deque[int]]) -> None:
+        """Добавляет в круг новых владельцев и убирает выбывших."""
+        for owner in list(self._ring):
+            if owner not in queues and not self._running[owner]:
+                self._ring.remove(owner)
+                del self._deficit[owner]
+
+        for owner in queues:
+            if owner not in self._deficit:
+                self._ring.append(owner)
+                self._deficit[owner] = 0
@@ -1,7 +1,7 @@
 from django import forms
 from django.utils import timezone
 
-from .models import Mailing
+from .models import Mailing, OwnerShare
 
 
 class MailingForm(forms.ModelForm):
@@ -37,3 +37,11 @@ class MailingForm(forms.ModelForm):
                 "Дата окончания должна быть позже даты начала",
             )
         return cleaned_data
+
+
+class OwnerShareForm(forms.ModelForm):
+    """Форма доли владельца в отправке рассылок."""
+
+    class Meta:
+        model = OwnerShare
+        fields = ("weight", "max_concurrent")
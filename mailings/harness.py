@@ -0,0 +1,265 @@
+"""Проверка нескольких процессов-отправителей с аварийной остановкой."""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+
+from django.conf import settings
+from django.db import connection
+
+from mailings.bench import create_mailing
+from mailings.constants import MailingStatus, OutboxStatus
+from mailings.delivery import BackgroundSMTPSink, SMTPSink
+from mailings.managers import INTERRUPTED_ERROR
+from mailings.models import Mailing, OutboxEntry, Recipient, SenderWorker
+
+SMTP_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+POLL_INTERVAL: float = 0.05
+SENDER_CONCURRENCY: int = 2
+
+
+@dataclass
+class HarnessResult:
+    """
+    Итог прогона: что отправлено, что прервано, что потеряно.
+
+    Прерванное письмо могло не дойти, только если процесс убит посреди
+    SMTP-сессии после отметки его пачки, поэтому таких писем
+    (`interrupted_not_delivered`) не больше, чем писем в пачках всех
+    сессий одного отправителя (`sessions` × `batch_size`).
+    """
+
+    senders: int
+    sessions: int
+    batch_size: int
+    recipients: int
+    killed_pid: int | None
+    delivered: int
+    duplicates: int
+    sent: int
+    interrupted: int
+    interrupted_not_delivered: int
+    unfinished: int
+    sent_not_delivered: int
+    lost: int
+    duration: float
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def get_violations(self) -> list[str]:
+        """Возвращает нарушения: повторы, потери и незавершённые письма."""
+        checks = {
+            "duplicates": "письма, доставленные повторно",
+            "unfinished": "письма без окончательного статуса",
+            "sent_not_delivered": "отправленные письма, не дошедшие",
+            "lost": "получатели без письма и без записи о прерывании",
+        }
+        violations = [
+            f"{label}: {getattr(self, name)}"
+            for name, label in checks.items()
+            if getattr(self, name)
+        ]
+        if self.interrupted_not_delivered > self.sessions * self.batch_size:
+            violations.append(
+                "прерванные письма, не дошедшие: "
+                f"{self.interrupted_not_delivered}"
+            )
+        if self.killed_pid is None:
+            violations.append("ни один отправитель не был остановлен")
+        return violations
+
+
+def prepare_database() -> None:
+    """
+    Переводит базу SQLite в режим WAL.
+
+    Иначе читающий процесс блокирует пишущие, и отправители падают
+    с "database is locked". Режим сохраняется в файле базы.
+    """
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=WAL")
+
+
+def get_sender_env(sink: SMTPSink, lease_timeout: float) -> dict[str, str]:
+    """Окружение процесса-отправителя: SMTP-приёмник и короткая аренда."""
+    return {
+        **os.environ,
+        "EMAIL_BACKEND": SMTP_BACKEND,
+        "EMAIL_HOST": sink.host,
+        "EMAIL_PORT": str(sink.port),
+        "EMAIL_USE_SSL": "False",
+        "MAILING_DELIVERY_ENGINE": "sync",
+        "MAILING_WORKERS": "1",
+        "MAILING_SCHEDULER_CONCURRENCY": str(SENDER_CONCURRENCY),
+        "MAILING_SEND_BATCH_SIZE": "10",
+        "MAILING_ATTEMPT_LOG_FLUSH_MS": "50",
+        "MAILING_SENDER_LEASE_TIMEOUT": str(lease_timeout),
+        "MAILING_SENDER_HEARTBEAT_INTERVAL": str(lease_timeout / 4),
+    }
+
+
+def spawn_sender(env: dict[str, str]) -> subprocess.Popen:
+    """Запускает `run_sender` отдельным процессом."""
+    return subprocess.Popen(
+        [
+            sys.executable,
+            str(settings.BASE_DIR / "manage.py"),
+            "run_sender",
+            "--poll-interval",
+            str(POLL_INTERVAL * 4),
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def kill_busy_sender(
+    sink: SMTPSink,
+    mailing_ids: list[int],
+    processes: list[subprocess.Popen],
+    kill_after: int,
+    deadline: float,
+) -> int | None:
+    """
+    Убивает SIGKILL отправителя посреди отправки рассылки.
+
+    Ждёт, пока приёмник получит `kill_after` писем, и убивает процесс,
+    захвативший одну из рассылок. Возвращает его PID.
+    """
+    pids = {process.pid: process for process in processes}
+
+    while time.monotonic() < deadline:
+        busy = (
+            SenderWorker.objects.filter(
+                claimed_mailings__pk__in=mailing_ids,
+                claimed_mailings__status=MailingStatus.RUNNING,
+                pid__in=list(pids),
+            )
+            .values_list("pid", flat=True)
+            .first()
+        )
+        if busy and sink.stats.messages >= kill_after:
+            os.kill(busy, signal.SIGKILL)
+            pids[busy].wait()
+            return busy
+        time.sleep(POLL_INTERVAL)
+
+    return None
+
+
+def wait_completed(mailing_ids: list[int], deadline: float) -> None:
+    """Ждёт завершения рассылок, но не дольше `deadline`."""
+    unfinished = Mailing.objects.filter(pk__in=mailing_ids).exclude(
+        status=MailingStatus.COMPLETED
+    )
+    while unfinished.exists() and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+
+
+def stop_senders(processes: list[subprocess.Popen]) -> None:
+    """Останавливает отправителей SIGTERM и дожидается их завершения."""
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        process.wait()
+
+
+def collect_result(
+    sink: SMTPSink,
+    mailing_ids: list[int],
+    senders: int,
+    killed_pid: int | None,
+    duration: float,
+) -> HarnessResult:
+    """Сверяет письма, принятые приёмником, с очередью рассылок."""
+    delivered = Counter(
+        address for _, rcpt_to, _ in sink.messages for address in rcpt_to
+    )
+    expected = set(
+        Recipient.objects.filter(mailings__in=mailing_ids).values_list(
+            "email", flat=True
+        )
+    )
+    entries = list(
+        OutboxEntry.objects.filter(mailing_id__in=mailing_ids).values_list(
+            "recipient__email", "status", "last_error"
+        )
+    )
+    sent = {
+        email for email, status, _ in entries if status == OutboxStatus.SENT
+    }
+    interrupted = {
+        email
+        for email, status, error in entries
+        if status == OutboxStatus.FAILED and error == INTERRUPTED_ERROR
+    }
+
+    return HarnessResult(
+        senders=senders,
+        sessions=SENDER_CONCURRENCY,
+        batch_size=settings.MAILING_SEND_BATCH_SIZE,
+        recipients=len(expected),
+        killed_pid=killed_pid,
+        delivered=len(delivered),
+        duplicates=sum(count - 1 for count in delivered.values()),
+        sent=len(sent),
+        interrupted=len(interrupted),
+        interrupted_not_delivered=len(interrupted - set(delivered)),
+        unfinished=len(expected)
+        - len(entries)
+        + sum(
+            status in (OutboxStatus.PENDING, OutboxStatus.SENDING)
+            for _, status, _ in entries
+        ),
+        sent_not_delivered=len(sent - set(delivered)),
+        lost=len(expected - sent - interrupted - set(delivered)),
+        duration=round(duration, 3),
+    )
+
+
+def run_harness(
+    senders: int = 3,
+    mailings: int = 4,
+    recipients: int = 100,
+    latency: float = 0.01,
+    lease_timeout: float = 2.0,
+    timeout: float = 120.0,
+) -> HarnessResult:
+    """
+    Запускает отправителей отдельными процессами и убивает одного.
+
+    Рассылки создаются в базе из настроек, поэтому она должна быть
+    общей для процессов (PostgreSQL или файл SQLite). Письма уходят
+    в локальный `SMTPSink` с задержкой `latency` секунд на письмо.
+    """
+    prepare_database()
+    mailing_ids = [create_mailing(recipients).pk for _ in range(mailings)]
+    started = time.monotonic()
+    deadline = started + timeout
+
+    with BackgroundSMTPSink() as background:
+        sink = background.start(latency=latency, keep_messages=True)
+        env = get_sender_env(sink, lease_timeout)
+        processes = [spawn_sender(env) for _ in range(senders)]
+        try:
+            killed_pid = kill_busy_sender(
+                sink, mailing_ids, processes, recipients // 5, deadline
+            )
+            wait_completed(mailing_ids, deadline)
+        finally:
+            stop_senders(processes)
+
+        return collect_result(
+            sink,
+            mailing_ids,
+            senders,
+            killed_pid,
+            time.monotonic() - started,
+        )
@@ -0,0 +1,150 @@
+"""Фоновые задачи, поставленные из интерфейса."""
+
+import logging
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from mailings.constants import JobKind, Lane
+from mailings.delivery import RetryPolicy
+from mailings.managers import CLAIMED_ERROR
+from mailings.models import Job, SenderWorker
+from mailings.scheduler import MailingDispatcher
+from mailings.sender import SenderProcess
+
+logger = logging.getLogger(__name__)
+
+
+def send_mailing_job(job: Job, sender: SenderWorker | None) -> str | None:
+    """
+    Отправляет рассылку задачи по полосе ручной отправки.
+
+    Если рассылку отправляет другой процесс, задача падает, и `run_job`
+    возвращает её в очередь. Если рассылку нельзя отправить, возвращает
+    причину: повтор её не исправит.
+    """
+    mailing = job.mailing
+
+    if mailing.send_mailing(sender=sender, lane=Lane.MANUAL):
+        return None
+    reason = mailing.get_skip_reason()
+    if reason == CLAIMED_ERROR:
+        raise RuntimeError(reason)
+    return reason
+
+
+JobHandler = Callable[[Job, SenderWorker | None], str | None]
+
+JOB_HANDLERS: dict[str, JobHandler] = {
+    JobKind.SEND_MAILING: send_mailing_job,
+}
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Политика повтора упавших задач из настроек."""
+    return RetryPolicy(
+        max_attempts=settings.MAILING_JOB_MAX_ATTEMPTS,
+        base_delay=settings.MAILING_JOB_RETRY_DELAY,
+        max_delay=settings.MAILING_RETRY_MAX_DELAY,
+    )
+
+
+def run_job(
+    job: Job,
+    sender: SenderWorker | None = None,
+    policy: RetryPolicy | None = None,
+) -> bool:
+    """
+    Выполняет захваченную задачу и возвращает, выполнена ли она.
+
+    Выполненная задача подтверждается, упавшая возвращается в очередь
+    или признаётся невыполненной по `policy`. Задача, обработчик которой
+    вернул причину отказа, сразу признаётся невыполненной.
+    """
+    try:
+        rejection = JOB_HANDLERS[job.kind](job, sender)
+    except Exception as error:  # noqa: skip
+        logger.exception("Ошибка задачи %s", job.pk)
+        Job.objects.fail(job, repr(error), policy or get_retry_policy())
+        return False
+
+    if rejection:
+        logger.warning("Задача %s отклонена: %s", job.pk, rejection)
+        Job.objects.reject(job, rejection)
+        return False
+
+    return Job.objects.ack(job)
+
+
+class JobDispatcher(MailingDispatcher):
+    """
+    Выполняет задачи очереди в пуле потоков.
+
+    Одновременно выполняется не более `max_concurrent` задач. Упавшая
+    задача возвращается в очередь с задержкой, а после
+    `MAILING_JOB_MAX_ATTEMPTS` попыток признаётся невыполненной.
+    """
+
+    thread_name_prefix: str = "job-dispatcher"
+
+    def __init__(
+        self,
+        max_concurrent: int | None = None,
+        sender: SenderWorker | None = None,
+    ) -> None:
+        super().__init__(
+            max_concurrent or settings.MAILING_JOB_WORKERS, sender
+        )
+        self.retry_policy = get_retry_policy()
+
+    def _get_lease_deadline(self):
+        """Срок захвата: аренда отправителя или `MAILING_CLAIM_TIMEOUT`."""
+        timeout = (
+            settings.MAILING_SENDER_LEASE_TIMEOUT
+            if self.sender is not None
+            else settings.MAILING_CLAIM_TIMEOUT
+        )
+        return timezone.now() + timezone.timedelta(seconds=timeout)
+
+    def _submit(self, limit: int | None = None) -> list[int]:
+        """Захватывает готовые задачи и отправляет их в пул."""
+        jobs = Job.objects.claim(
+            self.sender, self._get_lease_deadline(), limit
+        )
+        for job in jobs:
+            self._in_flight[job.pk] = self._executor.submit(self._run, job)
+        return [job.pk for job in jobs]
+
+    def _run(self, job: Job) -> None:
+        try:
+            run_job(job, self.sender, self.retry_policy)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self._in_flight.pop(job.pk, None)
+
+
+class JobWorkerProcess(SenderProcess):
+    """
+    Обработчик очереди фоновых задач.
+
+    Как и отправитель, регистрируется в реестре и сигналом жизни
+    продлевает захват своих задач; задачи упавшего обработчика
+    после истечения захвата выполняет другой.
+    """
+
+    dispatcher_class = JobDispatcher
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        poll_interval: float | None = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(
+            concurrency=concurrency or settings.MAILING_JOB_WORKERS,
+            poll_interval=poll_interval or settings.MAILING_JOB_POLL_INTERVAL,
+            **kwargs,
+        )
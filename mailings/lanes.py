@@ -0,0 +1,57 @@
+"""Полосы доставки писем, их общие места и глубина очередей."""
+
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.utils import timezone
+
+from mailings.constants import Lane
+from mailings.delivery import smtp_pools
+from mailings.delivery.spool import count_spooled
+from mailings.managers import JOB_ACTIVE_STATUSES
+from mailings.models import LaneSlot, Mailing, MailingProgress
+
+
+@contextmanager
+def shared_lane_slots() -> Iterator[None]:
+    """
+    Подключает пулы SMTP-соединений процесса к общим местам полос.
+
+    Общие места нужны процессам-отправителям, которые делят сервер
+    между полосами; остальные процессы, например веб-сервер, обходятся
+    пулом процесса без запросов к базе. На выходе пулы закрываются.
+    """
+    previous = smtp_pools.slots
+    smtp_pools.clear()
+    smtp_pools.slots = LaneSlot.objects
+    try:
+        yield
+    finally:
+        smtp_pools.slots = previous
+        smtp_pools.clear()
+
+
+def get_queue_depths() -> dict[str, int]:
+    """
+    Возвращает число писем, ожидающих отправки в каждой полосе.
+
+    Служебные письма считаются по спулу `flush_spool`. Ручная отправка —
+    по рассылкам с задачей в очереди задач `run_workers`, рассылки по
+    расписанию — по остальным рассылкам, время отправки которых идёт;
+    у рассылок считаются письма без окончательного итога.
+    """
+    now = timezone.now()
+    started = Mailing.objects.active().filter(
+        start_time__lte=now, end_time__gt=now
+    )
+    manual = {"jobs__status__in": JOB_ACTIVE_STATUSES}
+
+    return {
+        Lane.TRANSACTIONAL: count_spooled(),
+        Lane.MANUAL: MailingProgress.objects.count_pending(
+            started.filter(**manual)
+        ),
+        Lane.BULK: MailingProgress.objects.count_pending(
+            started.exclude(**manual)
+        ),
+    }
@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mailings.bench import BENCH_BACKENDS, find_regressions, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет скорость отправки рассылки через locmem и локальный "
+        "SMTP-приёмник, сравнивает результаты с базовыми."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--recipients",
+            type=int,
+            default=1000,
+            help="Количество получателей рассылки",
+        )
+        parser.add_argument(
+            "--backend",
+            choices=BENCH_BACKENDS,
+            nargs="+",
+            default=list(BENCH_BACKENDS),
+            help="Почтовые бэкенды для замера",
+        )
+        parser.add_argument(
+            "--output",
+            type=Path,
+            default=None,
+            help="JSON-файл для результатов",
+        )
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            default=None,
+            help="JSON-файл с базовыми результатами",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Допустимое ухудшение метрик, доля",
+        )
+
+    def handle(self, *args, **kwargs):
+        results = {}
+
+        for backend in kwargs["backend"]:
+            result = run_benchmark(kwargs["recipients"], backend)
+            results[backend] = result.as_dict()
+            self.stdout.write(
+                f"{backend}: {result.messages_per_second} писем/с, "
+                f"p50 {result.p50_ms} мс, p99 {result.p99_ms} мс, "
+                f"{result.queries} запросов, "
+                f"{result.peak_memory_kb} КиБ памяти"
+            )
+
+        if kwargs["output"]:
+            kwargs["output"].write_text(json.dumps(results, indent=2))
+
+        if kwargs["baseline"]:
+            self._check_baseline(results, kwargs)
+
+    def _check_baseline(self, results: dict, options: dict) -> None:
+        baseline = json.loads(options["baseline"].read_text())
+        regressions = find_regressions(results, baseline, options["tolerance"])
+
+        if regressions:
+            raise CommandError(
+                "Регрессия производительности:\n" + "\n".join(regressions)
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Регрессий относительно базовых результатов нет"
+            )
+        )
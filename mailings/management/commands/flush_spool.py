@@ -0,0 +1,74 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from mailings.delivery import SpoolFlusher
+from mailings.lanes import shared_lane_slots
+
+
+class Command(BaseCommand):
+    help = (
+        "Отправляет по SMTP письма, сложенные в спул бэкендом "
+        "SpoolEmailBackend, и продолжает отправку сегментов, "
+        "прерванную падением."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--spool-dir",
+            default=None,
+            help="Каталог спула (по умолчанию MAILING_SPOOL_DIR)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=None,
+            help="Интервал проверки спула, с",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Отправить спул один раз и завершиться",
+        )
+
+    def handle(self, *args, **kwargs):
+        flusher = SpoolFlusher(kwargs.get("spool_dir"))
+        if not flusher.lock():
+            raise CommandError(
+                f"Спул {flusher.directory} уже отправляет другой процесс"
+            )
+
+        with shared_lane_slots():
+            if kwargs.get("once"):
+                self._report(flusher.flush())
+                return
+
+            self._run(flusher, kwargs.get("poll_interval"))
+
+        self.stdout.write(self.style.SUCCESS("Отправка спула остановлена"))
+
+    def _run(self, flusher: SpoolFlusher, interval: float | None) -> None:
+        interval = interval or settings.MAILING_SPOOL_POLL_INTERVAL
+        stopped = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+        signal.signal(signal.SIGINT, lambda *_: stopped.set())
+
+        while not stopped.is_set():
+            flusher.flush()
+            stopped.wait(interval)
+
+    def _report(self, stats) -> None:
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Сегментов: {stats.segments}, отправлено: {stats.sent}, "
+                f"отклонено: {stats.dead}, восстановлено: {stats.recovered}"
+            )
+        )
+        if stats.deferred:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Часть спула отложена до следующего запуска"
+                )
+            )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from mailings.models import Mailing
+
+
+class Command(BaseCommand):
+    help = (
+        "Повторно отправляет письма запущенных рассылок получателям, "
+        "у которых подошло время повторной попытки."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Количество потоков отправки",
+        )
+
+    def handle(self, *args, **kwargs):
+        mailings = Mailing.objects.with_due_retries().select_related(
+            "owner", "message"
+        )
+        count = 0
+
+        for mailing in mailings.iterator():
+            mailing.send_mailing(workers=kwargs.get("workers"))
+            count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Повторно отправлено рассылок: {count}")
+        )
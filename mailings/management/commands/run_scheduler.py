@@ -0,0 +1,102 @@
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django_apscheduler.jobstores import DjangoJobStore
+from django_apscheduler.models import DjangoJobExecution
+
+from mailings.lanes import shared_lane_slots
+from mailings.scheduler import (
+    MailingDispatcher,
+    dispatch_due_mailings,
+    get_dispatcher,
+    sweep_expired_mailings,
+)
+
+EXECUTIONS_MAX_AGE: int = 7 * 24 * 60 * 60
+
+
+def delete_old_job_executions(max_age: int = EXECUTIONS_MAX_AGE) -> None:
+    """Удаляет записи о выполнении задач старше `max_age` секунд."""
+    DjangoJobExecution.objects.delete_old_job_executions(max_age)
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает планировщик, который периодически отправляет рассылки, "
+        "время отправки которых наступило, и завершает истёкшие."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=None,
+            help="Интервал проверки рассылок, с",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Количество одновременно отправляемых рассылок",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Отправить подошедшие рассылки один раз и завершиться",
+        )
+
+    def handle(self, *args, **kwargs):
+        concurrency = kwargs.get("concurrency")
+
+        with shared_lane_slots():
+            if kwargs.get("once"):
+                self._dispatch_once(MailingDispatcher(concurrency))
+            else:
+                self._run(concurrency, kwargs.get("interval"))
+
+    def _run(self, concurrency: int | None, interval: int | None) -> None:
+        scheduler = BlockingScheduler(timezone=settings.TIME_ZONE)
+        scheduler.add_jobstore(DjangoJobStore(), "default")
+        scheduler.add_job(
+            dispatch_due_mailings,
+            trigger=IntervalTrigger(
+                seconds=interval or settings.MAILING_SCHEDULER_INTERVAL
+            ),
+            kwargs={"max_concurrent": concurrency},
+            id="dispatch_due_mailings",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True,
+        )
+        scheduler.add_job(
+            sweep_expired_mailings,
+            trigger=IntervalTrigger(seconds=settings.MAILING_SWEEP_INTERVAL),
+            id="sweep_expired_mailings",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True,
+        )
+        scheduler.add_job(
+            delete_old_job_executions,
+            trigger=CronTrigger(day_of_week="mon", hour="00", minute="00"),
+            id="delete_old_job_executions",
+            max_instances=1,
+            replace_existing=True,
+        )
+
+        self.stdout.write(self.style.SUCCESS("Планировщик запущен"))
+        try:
+            scheduler.start()
+        except KeyboardInterrupt:
+            scheduler.shutdown()
+            get_dispatcher().shutdown()
+            self.stdout.write(self.style.SUCCESS("Планировщик остановлен"))
+
+    def _dispatch_once(self, dispatcher: MailingDispatcher) -> None:
+        mailing_ids = dispatcher.dispatch_all()
+        dispatcher.shutdown()
+        self.stdout.write(
+            self.style.SUCCESS(f"Отправлено рассылок: {len(mailing_ids)}")
+        )
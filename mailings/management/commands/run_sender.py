@@ -0,0 +1,42 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from mailings.lanes import shared_lane_slots
+from mailings.sender import SenderProcess
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает процесс-отправитель рассылок. Несколько отправителей "
+        "на разных хостах делят рассылки через общую базу данных."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Количество одновременно отправляемых рассылок",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=None,
+            help="Интервал проверки рассылок, с",
+        )
+
+    def handle(self, *args, **kwargs):
+        sender = SenderProcess(
+            concurrency=kwargs.get("concurrency"),
+            poll_interval=kwargs.get("poll_interval"),
+        )
+        signal.signal(signal.SIGTERM, lambda *_: sender.stop())
+        signal.signal(signal.SIGINT, lambda *_: sender.stop())
+
+        with shared_lane_slots():
+            sender.run()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Отправитель {sender.worker} остановлен")
+        )
@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand
+
+from mailings.delivery import SMTPSink
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает локальный SMTP-приёмник для нагрузочных тестов: письма "
+        "принимаются и отбрасываются, сбои внедряются с заданной частотой."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--host", default="127.0.0.1", help="Адрес")
+        parser.add_argument("--port", type=int, default=2525, help="Порт")
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.0,
+            help="Задержка ответа на письмо, мс",
+        )
+        parser.add_argument(
+            "--temp-fail-rate",
+            type=float,
+            default=0.0,
+            help="Доля писем с ответом 451",
+        )
+        parser.add_argument(
+            "--perm-fail-rate",
+            type=float,
+            default=0.0,
+            help="Доля писем с ответом 554",
+        )
+        parser.add_argument(
+            "--drop-rate",
+            type=float,
+            default=0.0,
+            help="Доля писем, на которых обрывается соединение",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Начальное значение генератора сбоев",
+        )
+        parser.add_argument(
+            "--report-interval",
+            type=float,
+            default=10.0,
+            help="Интервал вывода статистики, с",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=0.0,
+            help="Время работы, с (0 — до прерывания)",
+        )
+
+    def handle(self, *args, **kwargs):
+        sink = SMTPSink(
+            host=kwargs["host"],
+            port=kwargs["port"],
+            latency=kwargs["latency"] / 1000,
+            temp_fail_rate=kwargs["temp_fail_rate"],
+            perm_fail_rate=kwargs["perm_fail_rate"],
+            drop_rate=kwargs["drop_rate"],
+            seed=kwargs["seed"],
+        )
+
+        try:
+            asyncio.run(self._run(sink, kwargs))
+        except KeyboardInterrupt:
+            pass
+
+        self._write_stats(sink)
+
+    async def _run(self, sink: SMTPSink, options: dict) -> None:
+        await sink.start()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"SMTP-приёмник слушает {sink.host}:{sink.port}"
+            )
+        )
+        reporter = asyncio.create_task(
+            self._report(sink, options["report_interval"])
+        )
+
+        try:
+            if options["duration"]:
+                await asyncio.sleep(options["duration"])
+            else:
+                await sink.serve_forever()
+        finally:
+            reporter.cancel()
+            await sink.stop()
+
+    async def _report(self, sink: SMTPSink, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self._write_stats(sink)
+
+    def _write_stats(self, sink: SMTPSink) -> None:
+        self.stdout.write(json.dumps(sink.stats.as_dict()))
@@ -0,0 +1,58 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from mailings.jobs import JobWorkerProcess
+from mailings.lanes import shared_lane_slots
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает обработчик очереди фоновых задач, например отправки "
+        "рассылок, запущенных из интерфейса."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Количество одновременно выполняемых задач",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=None,
+            help="Интервал проверки очереди, с",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить готовые задачи один раз и завершиться",
+        )
+
+    def handle(self, *args, **kwargs):
+        worker = JobWorkerProcess(
+            concurrency=kwargs.get("workers"),
+            poll_interval=kwargs.get("poll_interval"),
+        )
+
+        with shared_lane_slots():
+            self._run(worker, once=kwargs.get("once"))
+
+    def _run(self, worker: JobWorkerProcess, once: bool) -> None:
+        if once:
+            jobs = worker.drain()
+            self.stdout.write(
+                self.style.SUCCESS(f"Обработано задач: {len(jobs)}")
+            )
+            return
+
+        signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+        signal.signal(signal.SIGINT, lambda *_: worker.stop())
+
+        worker.run()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Обработчик {worker.worker} остановлен")
+        )
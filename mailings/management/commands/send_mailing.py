@@ -1,10 +1,15 @@
 from django.core.management.base import BaseCommand, CommandError
 
-from mailings.models import Mailing
+from mailings.constants import MailingStatus
+from mailings.delivery import BulkWriter, rate_limits
+from mailings.models import Mailing, MailingAttempt
 
 
 class Command(BaseCommand):
-    help = "Отправляет рассылку по указанному ID"
+    help = (
+        "Отправляет рассылку по указанному ID. Запущенная рассылка "
+        "продолжается с места остановки."
+    )
 
     def add_arguments(self, parser) -> None:
         parser.add_argument(
@@ -12,18 +17,44 @@ class Command(BaseCommand):
             type=int,
             help="ID рассылки для отправки",
         )
+        parser.add_argument(
+            "--log-batch-size",
+            type=int,
+            default=None,
+            help="Количество попыток, записываемых в базу одним запросом",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Количество потоков отправки",
+        )
 
     def handle(self, *args, **kwargs):
         mailing_id = kwargs.get("mailing_id")
         try:
-            mailing = Mailing.objects.get(pk=mailing_id)
-            if mailing.status == "created":
-                mailing.send_mailing()
+            mailing = Mailing.objects.select_related("owner", "message").get(
+                pk=mailing_id
+            )
+            if mailing.status in (
+                MailingStatus.CREATED,
+                MailingStatus.RUNNING,
+            ):
+                attempt_log = BulkWriter(
+                    MailingAttempt,
+                    batch_size=kwargs.get("log_batch_size"),
+                )
+                mailing.send_mailing(
+                    attempt_log=attempt_log,
+                    workers=kwargs.get("workers"),
+                )
                 self.stdout.write(
                     self.style.SUCCESS(
                         f"Рассылка {mailing_id} успешно отправлена"
                     ),
                 )
+                if kwargs.get("verbosity", 1) > 1:
+                    self._write_rate_limit_metrics()
             else:
                 self.stdout.write(
                     self.style.WARNING(
@@ -33,3 +64,13 @@ class Command(BaseCommand):
                 )
         except Mailing.DoesNotExist:
             raise CommandError(f"Рассылка с ID {mailing_id} не найдена")
+
+    def _write_rate_limit_metrics(self) -> None:
+        """Выводит уровень токенов и ожидание по ограничениям скорости."""
+        for metric in rate_limits.get_metrics():
+            self.stdout.write(
+                f"{metric['scope']} {metric['key']}: "
+                f"токенов {metric['tokens']}, "
+                f"писем {metric['acquired']}, "
+                f"ожидание {metric['total_wait']} с"
+            )
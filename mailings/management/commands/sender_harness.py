@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mailings.harness import run_harness
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает несколько процессов-отправителей на общей базе, "
+        "убивает одного посреди отправки и проверяет, что ни один "
+        "получатель не потерян и не получил письмо дважды."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--senders",
+            type=int,
+            default=3,
+            help="Количество процессов-отправителей",
+        )
+        parser.add_argument(
+            "--mailings",
+            type=int,
+            default=4,
+            help="Количество рассылок",
+        )
+        parser.add_argument(
+            "--recipients",
+            type=int,
+            default=100,
+            help="Количество получателей каждой рассылки",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=10.0,
+            help="Задержка ответа SMTP-приёмника на письмо, мс",
+        )
+        parser.add_argument(
+            "--lease-timeout",
+            type=float,
+            default=2.0,
+            help="Срок аренды отправителя, с",
+        )
+
+    def handle(self, *args, **kwargs):
+        result = run_harness(
+            senders=kwargs["senders"],
+            mailings=kwargs["mailings"],
+            recipients=kwargs["recipients"],
+            latency=kwargs["latency"] / 1000,
+            lease_timeout=kwargs["lease_timeout"],
+        )
+        self.stdout.write(json.dumps(result.as_dict(), indent=2))
+
+        if violations := result.get_violations():
+            raise CommandError("; ".join(violations))
@@ -20,6 +20,7 @@ class Command(BaseCommand):
             "can_view_all_messages",
             "can_view_all_mailings",
             "can_block_mailings",
+            "can_manage_owner_shares",
         )
         permissions = Permission.objects.filter(
             codename__in=permission_codenames
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from mailings.scheduler import sweep_expired_mailings
+
+
+class Command(BaseCommand):
+    help = (
+        "Завершает рассылки, срок действия которых истёк, и закрывает "
+        "их неотправленные письма."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Количество рассылок, завершаемых одним запросом",
+        )
+
+    def handle(self, *args, **kwargs):
+        count = sweep_expired_mailings(kwargs.get("batch_size"))
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Завершено истёкших рассылок: {count}")
+        )
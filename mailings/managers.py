@@ -1,5 +1,32 @@
+import os
+import socket
+import time
+import uuid
+from collections import Counter
+from contextlib import nullcontext
+
+from django.apps import apps
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from mailings.constants import (
+    RECIPIENT_DELIVERY_FIELDS,
+    JobStatus,
+    Lane,
+    MailingStatus,
+    OutboxStatus,
+)
+from mailings.delivery.pool import get_lane_limits, get_reserved
+
+INTERRUPTED_ERROR: str = "Отправка прервана, доставка не подтверждена"
+CLAIMED_ERROR: str = "Рассылку отправляет другой процесс"
+ACTIVE_STATUSES: tuple[str, ...] = (
+    MailingStatus.CREATED,
+    MailingStatus.RUNNING,
+)
+JOB_ACTIVE_STATUSES: tuple[str, ...] = (JobStatus.QUEUED, JobStatus.RUNNING)
 
 
 class BaseManager(models.Manager):
@@ -24,4 +51,773 @@ class MessageManager(BaseManager):
 class MailingManager(BaseManager):
     """Менеджер рассылки."""
 
-    pass
+    def active(self) -> models.QuerySet:
+        """Созданные и запущенные рассылки с владельцем и сообщением."""
+        return self.filter(status__in=ACTIVE_STATUSES).select_related(
+            "owner", "message"
+        )
+
+    def due(self, now=None) -> models.QuerySet:
+        """
+        Рассылки, которые пора отправлять.
+
+        Созданные или запущенные рассылки, время отправки которых
+        наступило и ещё не истекло, а владелец не заблокирован.
+        Рассылки, которые сейчас отправляет другой процесс, пропускаются.
+        """
+        now = now or timezone.now()
+        return self.active().filter(
+            Q(claimed_until__isnull=True) | Q(claimed_until__lt=now),
+            start_time__lte=now,
+            end_time__gt=now,
+            owner__is_blocked=False,
+        )
+
+    def scheduled(self, now=None) -> models.QuerySet:
+        """
+        Подошедшие рассылки полосы рассылок по расписанию.
+
+        Рассылки с задачей ручной отправки в очереди отправляет
+        обработчик задач, а не планировщик.
+        """
+        return self.due(now).exclude(jobs__status__in=JOB_ACTIVE_STATUSES)
+
+    def expired(self, now=None) -> models.QuerySet:
+        """Созданные или запущенные рассылки, срок которых истёк."""
+        return self.active().filter(end_time__lte=now or timezone.now())
+
+    def blocked_owner(self) -> models.QuerySet:
+        """Созданные или запущенные рассылки заблокированных владельцев."""
+        return self.active().filter(owner__is_blocked=True)
+
+    def claim(self, pk: int, until, sender=None) -> bool:
+        """
+        Захватывает рассылку для отправки до момента `until`.
+
+        Созданная рассылка или запущенная, захват которой истёк,
+        переводится в запущенные одним условным UPDATE, поэтому из
+        нескольких процессов захват получает ровно один. Захват
+        процесса-отправителя `sender` продлевает его сигнал жизни.
+        """
+        now = timezone.now()
+        return bool(
+            self.filter(
+                Q(status=MailingStatus.CREATED)
+                | Q(status=MailingStatus.RUNNING, claimed_until__isnull=True)
+                | Q(status=MailingStatus.RUNNING, claimed_until__lt=now),
+                pk=pk,
+            ).update(
+                status=MailingStatus.RUNNING,
+                claimed_until=until,
+                claimed_by=sender,
+            )
+        )
+
+    def is_claimed(self, pk: int) -> bool:
+        """Проверяет, что рассылку сейчас отправляет какой-либо процесс."""
+        return self.filter(
+            pk=pk,
+            status=MailingStatus.RUNNING,
+            claimed_until__gte=timezone.now(),
+        ).exists()
+
+    def extend_claim(self, pk: int, until) -> bool:
+        """Продлевает захват запущенной рассылки до момента `until`."""
+        return bool(
+            self.filter(
+                pk=pk,
+                status=MailingStatus.RUNNING,
+                claimed_until__isnull=False,
+            ).update(claimed_until=until)
+        )
+
+    def release(self, pk: int, status: str) -> bool:
+        """Снимает захват и переводит запущенную рассылку в `status`."""
+        return bool(
+            self.filter(pk=pk, status=MailingStatus.RUNNING).update(
+                status=status, claimed_until=None, claimed_by=None
+            )
+        )
+
+    def complete(self, mailing_ids: list[int]) -> int:
+        """Завершает созданные или запущенные рассылки из списка."""
+        return self.filter(
+            pk__in=mailing_ids,
+            status__in=ACTIVE_STATUSES,
+        ).update(status=MailingStatus.COMPLETED)
+
+    def with_due_retries(self) -> models.QuerySet:
+        """Запущенные рассылки, у которых подошло время повторной отправки."""
+        return self.filter(
+            status=MailingStatus.RUNNING,
+            outbox__status=OutboxStatus.PENDING,
+            outbox__next_attempt_at__lte=timezone.now(),
+        ).distinct()
+
+
+class OutboxManager(models.Manager):
+    """Менеджер очереди писем рассылки."""
+
+    def materialize(self, mailing, batch_size: int) -> None:
+        """
+        Ставит в очередь письмо каждому получателю рассылки.
+
+        Повторный вызов добавляет только новых получателей. Получатели
+        читаются пачками по pk, а не одним курсором, чтобы чтение
+        не держало открытую транзакцию, пока пишут другие процессы.
+        Счётчики прогресса рассылки пересчитываются по очереди.
+        """
+        recipient_ids = mailing.recipients.order_by("pk").values_list(
+            "pk", flat=True
+        )
+        chunk = [0] * batch_size
+
+        while len(chunk) == batch_size:
+            chunk = list(recipient_ids.filter(pk__gt=chunk[-1])[:batch_size])
+            self.bulk_create(
+                [
+                    self.model(mailing=mailing, recipient_id=recipient_id)
+                    for recipient_id in chunk
+                ],
+                ignore_conflicts=True,
+            )
+
+        self._progress().rebuild([mailing.pk])
+
+    def _progress(self) -> "ProgressManager":
+        return apps.get_model("mailings", "MailingProgress").objects
+
+    def fail_interrupted(self, mailing, expired_only: bool = False) -> int:
+        """
+        Разбирает письма рассылки, отправка которых была прервана.
+
+        Письма, переданные серверу (`handed_off_at`), могли уйти
+        получателю, поэтому помечаются неотправленными и повторно
+        не отправляются автоматически. Остальные арендованные письма
+        серверу не передавались и возвращаются в очередь. С `expired_only`
+        разбираются только письма, аренда которых истекла: их отправитель
+        умер или завис. Возвращает число неотправленных писем.
+        """
+        now = timezone.now()
+        interrupted = self.filter(mailing=mailing, status=OutboxStatus.SENDING)
+
+        if expired_only:
+            interrupted = interrupted.filter(
+                Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now)
+            )
+
+        failed = interrupted.filter(handed_off_at__isnull=False).update(
+            status=OutboxStatus.FAILED,
+            last_error=INTERRUPTED_ERROR,
+            updated_at=now,
+        )
+        interrupted.filter(handed_off_at__isnull=True).update(
+            status=OutboxStatus.PENDING,
+            attempts=F("attempts") - 1,
+            leased_by=None,
+            lease_expires_at=None,
+            updated_at=now,
+        )
+        self._progress().add(mailing.pk, failed=failed)
+        return failed
+
+    def mark_handed_off(self, pks: list[int]) -> None:
+        """Отмечает письма переданными серверу."""
+        self.filter(pk__in=pks).update(handed_off_at=timezone.now())
+
+    def cancel_pending(self, mailing_ids: list[int], reason: str) -> int:
+        """Закрывает неотправленными ожидающие письма рассылок."""
+        return self.filter(
+            mailing_id__in=mailing_ids,
+            status=OutboxStatus.PENDING,
+        ).update(
+            status=OutboxStatus.FAILED,
+            last_error=reason,
+            next_attempt_at=None,
+            updated_at=timezone.now(),
+        )
+
+    def take_batch(
+        self,
+        mailing,
+        after_pk: int,
+        batch_size: int,
+        lease_until=None,
+        sender=None,
+    ) -> list:
+        """
+        Берёт в аренду следующую пачку ожидающих писем.
+
+        Пачки выбираются по возрастанию pk, начиная после `after_pk`;
+        письма, время повторной отправки которых не наступило, пропускаются.
+        Письма пачки помечаются отправляемыми и арендуются отправителем
+        `sender` до `lease_until`. Строки, заблокированные другим
+        отправителем, пропускаются (SKIP LOCKED там, где база его
+        поддерживает), а UPDATE меняет только ожидающие письма, поэтому
+        одно письмо не попадёт в две пачки.
+
+        Загружаются только поля, нужные для отправки и записи результата,
+        поэтому память не зависит от размера списка получателей.
+        """
+        pending = (
+            self.filter(
+                Q(next_attempt_at__isnull=True)
+                | Q(next_attempt_at__lte=timezone.now()),
+                mailing=mailing,
+                status=OutboxStatus.PENDING,
+                pk__gt=after_pk,
+            )
+            .select_related("recipient")
+            .only(
+                "mailing",
+                "attempts",
+                *self.model.RESULT_FIELDS,
+                *(f"recipient__{name}" for name in RECIPIENT_DELIVERY_FIELDS),
+            )
+            .order_by("pk")
+        )
+        skip_locked = connection.features.has_select_for_update_skip_locked
+
+        with transaction.atomic() if skip_locked else nullcontext():
+            if skip_locked:
+                pending = pending.select_for_update(
+                    skip_locked=True, of=("self",)
+                )
+            entries = list(pending[:batch_size])
+            leased = self._lease(entries, lease_until, sender)
+
+        if leased != len(entries):
+            leased_pks = self._get_leased_pks(entries, sender)
+            entries = [entry for entry in entries if entry.pk in leased_pks]
+        return entries
+
+    def _lease(self, entries: list, lease_until, sender) -> int:
+        """Помечает ожидающие письма пачки отправляемыми и арендует их."""
+        if not entries:
+            return 0
+
+        now = timezone.now()
+        leased = self.filter(
+            pk__in=[entry.pk for entry in entries],
+            status=OutboxStatus.PENDING,
+        ).update(
+            status=OutboxStatus.SENDING,
+            attempts=F("attempts") + 1,
+            leased_by=sender,
+            lease_expires_at=lease_until,
+            handed_off_at=None,
+            updated_at=now,
+        )
+
+        for entry in entries:
+            entry.status = OutboxStatus.SENDING
+            entry.attempts += 1
+            entry.leased_by = sender
+            entry.lease_expires_at = lease_until
+            entry.updated_at = now
+        return leased
+
+    def _get_leased_pks(self, entries: list, sender) -> set[int]:
+        """
+        Возвращает pk писем пачки, арендованных этим вызовом.
+
+        Нужно, если часть пачки между SELECT и UPDATE забрал другой
+        отправитель; вызов узнаётся по отправителю и сроку аренды.
+        """
+        return set(
+            self.filter(
+                pk__in=[entry.pk for entry in entries],
+                status=OutboxStatus.SENDING,
+                leased_by=sender,
+                lease_expires_at=entries[0].lease_expires_at,
+            ).values_list("pk", flat=True)
+        )
+
+    def save_results(self, entries: list) -> None:
+        """
+        Сохраняет результаты отправки писем.
+
+        Отправленные письма обновляются одним UPDATE, остальные —
+        через `bulk_update`, так как у них разные ошибки и сроки повтора.
+        Итоги прибавляются к счётчикам прогресса рассылки.
+        """
+        sent_pks = [
+            entry.pk for entry in entries if entry.status == OutboxStatus.SENT
+        ]
+        unsent = [
+            entry for entry in entries if entry.status != OutboxStatus.SENT
+        ]
+
+        if sent_pks:
+            now = timezone.now()
+            self.filter(pk__in=sent_pks).update(
+                status=OutboxStatus.SENT,
+                last_error="",
+                next_attempt_at=None,
+                sent_at=now,
+                updated_at=now,
+            )
+
+        if unsent:
+            self.bulk_update(unsent, self.model.RESULT_FIELDS)
+
+        sent = Counter(
+            entry.mailing_id
+            for entry in entries
+            if entry.status == OutboxStatus.SENT
+        )
+        failed = Counter(
+            entry.mailing_id
+            for entry in entries
+            if entry.status == OutboxStatus.FAILED
+        )
+        for mailing_id in sent.keys() | failed.keys():
+            self._progress().add(
+                mailing_id, sent=sent[mailing_id], failed=failed[mailing_id]
+            )
+
+
+class RateLimitBucketManager(models.Manager):
+    """Менеджер ведер токенов, общих для всех процессов-отправителей."""
+
+    def reserve(
+        self,
+        scope: str,
+        key: str,
+        rate: float,
+        capacity: float,
+        count: int,
+    ) -> float:
+        """
+        Резервирует `count` токенов и возвращает время первого из них.
+
+        Ведро хранит момент `full_at`, когда оно снова наполнится: каждый
+        токен сдвигает его на 1 / `rate`. Запись обновляется условно по
+        прочитанному значению, поэтому одновременные резервирования
+        разных процессов не теряются.
+        """
+        bucket, _ = self.get_or_create(
+            scope=scope,
+            key=key,
+            defaults={"rate": rate, "capacity": capacity},
+        )
+        while True:
+            now = time.time()
+            start = max(bucket.full_at, now)
+            reserved = self.filter(
+                pk=bucket.pk, full_at=bucket.full_at
+            ).update(
+                full_at=start + count / rate,
+                rate=rate,
+                capacity=capacity,
+                reserved=F("reserved") + count,
+            )
+            if reserved:
+                return start + (1 - capacity) / rate
+            bucket.refresh_from_db(fields=("full_at",))
+
+    def get_metrics(self) -> list[dict]:
+        """
+        Возвращает уровень токенов и ожидание по всем ведрам.
+
+        Отрицательный уровень — токены уже зарезервированы отправителями
+        наперёд, `wait` — сколько ждать следующего токена.
+        """
+        now = time.time()
+        return [
+            {
+                "scope": scope,
+                "key": key,
+                "rate": rate,
+                "capacity": capacity,
+                "tokens": round(capacity - max(0.0, full_at - now) * rate, 3),
+                "reserved": reserved,
+                "wait": round(max(0.0, full_at - now - capacity / rate), 3),
+            }
+            for scope, key, rate, capacity, full_at, reserved in (
+                self.values_list(
+                    "scope", "key", "rate", "capacity", "full_at", "reserved"
+                )
+            )
+        ]
+
+
+class LaneSlotManager(models.Manager):
+    """Менеджер мест SMTP-соединений, общих для всех процессов."""
+
+    def acquire(
+        self, server: str, lane: str, size: int, limit: int, ttl: float
+    ) -> str | None:
+        """
+        Занимает место полосы `lane` на сервере `server` и возвращает ключ.
+
+        Из `size` мест сервера полоса занимает места с номерами меньше
+        `limit`, начиная со старших, — младшие остаются менее важным
+        полосам. Место занимается на `ttl` секунд условным UPDATE, поэтому
+        из нескольких процессов его получает один, а место упавшего
+        процесса освобождается по истечении срока. Возвращает None,
+        если свободных мест нет.
+        """
+        while True:
+            now = timezone.now()
+            free = self._free(server, now).filter(number__lt=limit)
+
+            for pk in free.order_by("-number").values_list("pk", flat=True):
+                holder = uuid.uuid4().hex
+                if (
+                    self._free(server, now)
+                    .filter(pk=pk)
+                    .update(
+                        lane=lane,
+                        holder=holder,
+                        expires_at=now + timezone.timedelta(seconds=ttl),
+                    )
+                ):
+                    return holder
+
+            if not self._add_slots(server, size):
+                return None
+
+    def extend(self, slot: str, ttl: float) -> bool:
+        """Продлевает место на `ttl` секунд, если его не занял другой."""
+        return bool(
+            self.filter(holder=slot).update(
+                expires_at=timezone.now() + timezone.timedelta(seconds=ttl)
+            )
+        )
+
+    def release(self, slot: str) -> None:
+        """Освобождает место."""
+        self.filter(holder=slot).update(lane="", holder="", expires_at=None)
+
+    def get_metrics(self) -> list[dict]:
+        """Возвращает занятость полос по каждому серверу."""
+        size = settings.MAILING_SMTP_LANE_SLOTS
+        limits = get_lane_limits(size, get_reserved())
+        in_use = Counter(
+            self.filter(expires_at__gte=timezone.now()).values_list(
+                "server", "lane"
+            )
+        )
+        servers = self.values_list("server", flat=True).distinct()
+
+        return [
+            {
+                "server": server,
+                "size": size,
+                "lanes": {
+                    lane: {
+                        "limit": limits[lane],
+                        "in_use": in_use[server, lane],
+                    }
+                    for lane in Lane
+                },
+            }
+            for server in servers.order_by("server")
+        ]
+
+    def _free(self, server: str, now) -> models.QuerySet:
+        """Свободные места сервера: не занятые или с истёкшим сроком."""
+        return self.filter(
+            Q(expires_at__isnull=True) | Q(expires_at__lt=now),
+            server=server,
+        )
+
+    def _add_slots(self, server: str, size: int) -> bool:
+        """Добавляет недостающие места сервера; False — все уже есть."""
+        if self.filter(server=server, number__lt=size).count() >= size:
+            return False
+
+        self.bulk_create(
+            [
+                self.model(server=server, number=number)
+                for number in range(size)
+            ],
+            ignore_conflicts=True,
+        )
+        return True
+
+
+class SenderWorkerManager(models.Manager):
+    """Менеджер реестра процессов-отправителей."""
+
+    def register(self):
+        """Регистрирует текущий процесс отправителем."""
+        hostname = socket.gethostname()
+        pid = os.getpid()
+        return self.create(
+            name=f"{hostname}-{pid}-{uuid.uuid4().hex[:8]}",
+            hostname=hostname,
+            pid=pid,
+        )
+
+    def heartbeat(self, sender, lease_until) -> bool:
+        """
+        Отмечает, что отправитель жив, и продлевает его аренды.
+
+        Захваченные отправителем рассылки, арендованные письма и задачи
+        продлеваются до `lease_until`. Возвращает False, если отправитель
+        удалён из реестра как мёртвый: его аренды уже могли забрать.
+        """
+        with transaction.atomic():
+            alive = self.filter(pk=sender.pk).update(
+                heartbeat_at=timezone.now()
+            )
+            if alive:
+                sender.claimed_mailings.filter(
+                    status=MailingStatus.RUNNING
+                ).update(claimed_until=lease_until)
+                sender.leases.filter(status=OutboxStatus.SENDING).update(
+                    lease_expires_at=lease_until
+                )
+                sender.jobs.filter(status=JobStatus.RUNNING).update(
+                    locked_until=lease_until
+                )
+
+        return bool(alive)
+
+    def dead(self, timeout: float) -> models.QuerySet:
+        """Отправители, не подававшие сигнал дольше `timeout` секунд."""
+        return self.filter(
+            heartbeat_at__lt=timezone.now()
+            - timezone.timedelta(seconds=timeout)
+        )
+
+
+class JobManager(models.Manager):
+    """Менеджер очереди фоновых задач."""
+
+    def enqueue(self, kind: str, mailing):
+        """
+        Ставит задачу в очередь и возвращает её.
+
+        У рассылки не бывает двух невыполненных задач одного вида:
+        если такая уже есть, возвращается она.
+        """
+        try:
+            with transaction.atomic():
+                return self.create(kind=kind, mailing=mailing)
+        except IntegrityError:
+            return self.get(
+                kind=kind,
+                mailing=mailing,
+                status__in=JOB_ACTIVE_STATUSES,
+            )
+
+    @staticmethod
+    def _ready(now) -> Q:
+        """Задачи в очереди, время которых наступило, и брошенные задачи."""
+        return Q(status=JobStatus.QUEUED, run_after__lte=now) | Q(
+            status=JobStatus.RUNNING, locked_until__lt=now
+        )
+
+    def claim(self, sender, lease_until, limit: int | None = None) -> list:
+        """
+        Захватывает до `limit` готовых задач и возвращает их.
+
+        Задачи захватываются отправителем `sender` до `lease_until`, в
+        порядке времени запуска. Строки, заблокированные другим
+        обработчиком, пропускаются (SKIP LOCKED там, где база его
+        поддерживает), а UPDATE повторяет условие выборки, поэтому
+        задачу получает ровно один обработчик. Задача, аренда которой
+        истекла, захватывается снова.
+        """
+        now = timezone.now()
+        ready = self.filter(self._ready(now)).order_by("run_after", "pk")
+        skip_locked = connection.features.has_select_for_update_skip_locked
+
+        with transaction.atomic() if skip_locked else nullcontext():
+            if skip_locked:
+                ready = ready.select_for_update(skip_locked=True)
+            pks = list(ready.values_list("pk", flat=True)[:limit])
+            self.filter(self._ready(now), pk__in=pks).update(
+                status=JobStatus.RUNNING,
+                attempts=F("attempts") + 1,
+                locked_by=sender,
+                locked_until=lease_until,
+                updated_at=now,
+            )
+
+        return list(
+            self.filter(
+                pk__in=pks,
+                status=JobStatus.RUNNING,
+                locked_by=sender,
+                locked_until=lease_until,
+            )
+            .select_related("mailing__owner", "mailing__message")
+            .order_by("run_after", "pk")
+        )
+
+    def _held(self, job) -> models.QuerySet:
+        """
+        Задача, пока её держит тот же захват.
+
+        Каждый захват увеличивает число попыток, поэтому обработчик,
+        чью задачу забрали после истечения аренды, её не изменит.
+        """
+        return self.filter(
+            pk=job.pk, status=JobStatus.RUNNING, attempts=job.attempts
+        )
+
+    def ack(self, job) -> bool:
+        """Отмечает захваченную задачу выполненной."""
+        now = timezone.now()
+        return bool(
+            self._held(job).update(
+                status=JobStatus.DONE,
+                last_error="",
+                locked_by=None,
+                locked_until=None,
+                finished_at=now,
+                updated_at=now,
+            )
+        )
+
+    def fail(self, job, error: str, policy) -> bool:
+        """
+        Возвращает упавшую задачу в очередь или признаёт невыполненной.
+
+        Пока `policy` разрешает повтор, задача ждёт в очереди задержку
+        по числу попыток; иначе она сохраняется невыполненной вместе
+        с последней ошибкой, пока её не вернут в очередь `requeue`.
+        """
+        now = timezone.now()
+        fields = {"status": JobStatus.DEAD, "finished_at": now}
+
+        if policy.can_retry(job.attempts):
+            fields = {
+                "status": JobStatus.QUEUED,
+                "run_after": now + policy.get_delay(job.attempts),
+            }
+
+        return bool(
+            self._held(job).update(
+                last_error=error,
+                locked_by=None,
+                locked_until=None,
+                updated_at=now,
+                **fields,
+            )
+        )
+
+    def reject(self, job, error: str) -> bool:
+        """Признаёт задачу невыполненной без повторов, сохраняя причину."""
+        now = timezone.now()
+        return bool(
+            self._held(job).update(
+                status=JobStatus.DEAD,
+                last_error=error,
+                locked_by=None,
+                locked_until=None,
+                finished_at=now,
+                updated_at=now,
+            )
+        )
+
+    def requeue(self, jobs: models.QuerySet) -> int:
+        """
+        Возвращает в очередь невыполненные задачи из `jobs`.
+
+        Задачи рассылок, у которых уже есть задача в работе, пропускаются.
+        """
+        now = timezone.now()
+        return (
+            jobs.filter(status=JobStatus.DEAD)
+            .exclude(mailing__jobs__status__in=JOB_ACTIVE_STATUSES)
+            .update(
+                status=JobStatus.QUEUED,
+                attempts=0,
+                run_after=now,
+                finished_at=None,
+                updated_at=now,
+            )
+        )
+
+
+class OwnerShareManager(models.Manager):
+    """Менеджер долей владельцев в отправке рассылок."""
+
+    def get_shares(self, owner_ids) -> tuple[dict[int, int], dict[int, int]]:
+        """
+        Возвращает веса и ограничения одновременных отправок владельцев.
+
+        Владельцу без настроек достаются вес 1 и ограничение
+        `MAILING_FAIR_OWNER_CONCURRENCY` (0 — без ограничения).
+        """
+        shares = {
+            owner_id: (weight, max_concurrent)
+            for owner_id, weight, max_concurrent in self.filter(
+                owner_id__in=list(owner_ids)
+            ).values_list("owner_id", "weight", "max_concurrent")
+        }
+        weights: dict[int, int] = {}
+        caps: dict[int, int] = {}
+
+        for owner_id in owner_ids:
+            weight, max_concurrent = shares.get(owner_id, (1, None))
+            weights[owner_id] = weight
+            cap = max_concurrent or settings.MAILING_FAIR_OWNER_CONCURRENCY
+            if cap:
+                caps[owner_id] = cap
+        return weights, caps
+
+
+class ProgressManager(models.Manager):
+    """
+    Менеджер счётчиков прогресса рассылок.
+
+    Счётчики увеличиваются по мере сохранения результатов отправки,
+    поэтому прогресс читается одной строкой, а не подсчётом очереди.
+    """
+
+    def add(self, mailing_id: int, sent: int = 0, failed: int = 0) -> None:
+        """Прибавляет к счётчикам рассылки отправленные и неотправленные."""
+        if sent or failed:
+            self.filter(mailing_id=mailing_id).update(
+                sent=F("sent") + sent,
+                failed=F("failed") + failed,
+                updated_at=timezone.now(),
+            )
+
+    def count_pending(self, mailings: models.QuerySet) -> int:
+        """
+        Возвращает число писем рассылок `mailings` без окончательного итога.
+
+        Письма считаются по счётчикам прогресса, а у рассылки, очередь
+        которой ещё не создана, ожидают письма все её получатели.
+        """
+        queued = self.filter(mailing__in=mailings.values("pk")).aggregate(
+            pending=Sum(F("total") - F("sent") - F("failed"))
+        )["pending"]
+        recipients = apps.get_model("mailings", "Mailing").recipients.through
+        unqueued = recipients.objects.filter(
+            mailing__in=mailings.filter(progress__isnull=True).values("pk")
+        ).count()
+        return (queued or 0) + unqueued
+
+    def rebuild(self, mailing_ids: list[int]) -> None:
+        """
+        Пересчитывает счётчики рассылок по их очереди писем.
+
+        Вызывается, когда очередь пополняется или рассылка завершается
+        целиком, и заодно исправляет расхождения после сбоев.
+        """
+        outbox = apps.get_model("mailings", "OutboxEntry").objects
+        counts = (
+            outbox.filter(mailing_id__in=mailing_ids)
+            .values("mailing_id")
+            .annotate(
+                total=Count("pk"),
+                sent=Count("pk", filter=Q(status=OutboxStatus.SENT)),
+                failed=Count("pk", filter=Q(status=OutboxStatus.FAILED)),
+            )
+            .order_by()
+        )
+        now = timezone.now()
+        self.bulk_create(
+            [self.model(updated_at=now, **row) for row in counts],
+            update_conflicts=True,
+            unique_fields=("mailing",),
+            update_fields=("total", "sent", "failed", "updated_at"),
+        )
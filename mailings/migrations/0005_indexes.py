@@ -0,0 +1,82 @@
+# Generated by Django 4.2 on 2026-10-18 02:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0004_outboxentry_next_attempt_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="mailing",
+            index=models.Index(
+                fields=["status", "start_time", "end_time"],
+                name="mailing_due_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mailing",
+            index=models.Index(
+                fields=["owner", "start_time"], name="mailing_owner_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mailing",
+            index=models.Index(
+                fields=["start_time"], name="mailing_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mailingattempt",
+            index=models.Index(
+                fields=["mailing", "-attempt_time"],
+                name="attempt_mailing_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mailingattempt",
+            index=models.Index(
+                fields=["-attempt_time"], name="attempt_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["owner", "subject"], name="message_owner_subject_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["subject"], name="message_subject_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="outboxentry",
+            index=models.Index(
+                fields=["mailing", "status", "id"],
+                name="outbox_mailing_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="outboxentry",
+            index=models.Index(
+                fields=["status", "next_attempt_at"],
+                name="outbox_status_retry_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipient",
+            index=models.Index(
+                fields=["owner", "last_name", "first_name"],
+                name="recipient_owner_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipient",
+            index=models.Index(
+                fields=["last_name", "first_name"], name="recipient_name_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0005_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mailing",
+            name="claimed_until",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                null=True,
+                verbose_name="Захвачена для отправки до",
+            ),
+        ),
+    ]
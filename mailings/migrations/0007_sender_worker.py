@@ -0,0 +1,91 @@
+# Generated by Django 4.2 on 2026-10-18 02:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0006_mailing_claimed_until"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SenderWorker",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="Имя"
+                    ),
+                ),
+                (
+                    "hostname",
+                    models.CharField(max_length=255, verbose_name="Хост"),
+                ),
+                ("pid", models.PositiveIntegerField(verbose_name="PID")),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Запущен"
+                    ),
+                ),
+                (
+                    "heartbeat_at",
+                    models.DateTimeField(
+                        db_index=True,
+                        default=django.utils.timezone.now,
+                        verbose_name="Последний сигнал",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Отправитель",
+                "verbose_name_plural": "Отправители",
+                "ordering": ("name",),
+            },
+        ),
+        migrations.AddField(
+            model_name="outboxentry",
+            name="lease_expires_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Аренда до"
+            ),
+        ),
+        migrations.AddField(
+            model_name="mailing",
+            name="claimed_by",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="claimed_mailings",
+                to="mailings.senderworker",
+                verbose_name="Захвачена отправителем",
+            ),
+        ),
+        migrations.AddField(
+            model_name="outboxentry",
+            name="leased_by",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="leases",
+                to="mailings.senderworker",
+                verbose_name="Отправитель",
+            ),
+        ),
+    ]
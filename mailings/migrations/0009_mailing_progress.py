@@ -0,0 +1,81 @@
+# Generated by Django 4.2 on 2026-10-18 02:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db.models import Count, Q
+
+
+def fill_progress(apps, schema_editor):
+    """Считает прогресс рассылок, у которых уже есть очередь писем."""
+    OutboxEntry = apps.get_model("mailings", "OutboxEntry")
+    MailingProgress = apps.get_model("mailings", "MailingProgress")
+    counts = (
+        OutboxEntry.objects.values("mailing_id")
+        .annotate(
+            total=Count("pk"),
+            sent=Count("pk", filter=Q(status="sent")),
+            failed=Count("pk", filter=Q(status="failed")),
+        )
+        .order_by()
+    )
+    MailingProgress.objects.bulk_create(
+        (MailingProgress(**row) for row in counts.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0008_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MailingProgress",
+            fields=[
+                (
+                    "mailing",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="progress",
+                        serialize=False,
+                        to="mailings.mailing",
+                        verbose_name="Рассылка",
+                    ),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Всего писем"
+                    ),
+                ),
+                (
+                    "sent",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Отправлено"
+                    ),
+                ),
+                (
+                    "failed",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Не отправлено"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Обновлено",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Прогресс рассылки",
+                "verbose_name_plural": "Прогресс рассылок",
+            },
+        ),
+        migrations.RunPython(fill_progress, migrations.RunPython.noop),
+    ]
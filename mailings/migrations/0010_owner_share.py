@@ -0,0 +1,66 @@
+# Generated by Django 4.2 on 2026-10-18 03:09
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("mailings", "0009_mailing_progress"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OwnerShare",
+            fields=[
+                (
+                    "owner",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="mailing_share",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Владелец",
+                    ),
+                ),
+                (
+                    "weight",
+                    models.PositiveSmallIntegerField(
+                        default=1,
+                        help_text="Во сколько раз больше писем владелец отправляет за круг",
+                        validators=[
+                            django.core.validators.MinValueValidator(1)
+                        ],
+                        verbose_name="Вес",
+                    ),
+                ),
+                (
+                    "max_concurrent",
+                    models.PositiveSmallIntegerField(
+                        blank=True,
+                        help_text="Пусто — по умолчанию для всех владельцев",
+                        null=True,
+                        validators=[
+                            django.core.validators.MinValueValidator(1)
+                        ],
+                        verbose_name="Одновременных отправок",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Доля отправки владельца",
+                "verbose_name_plural": "Доли отправки владельцев",
+                "permissions": (
+                    (
+                        "can_manage_owner_shares",
+                        "Может настраивать доли отправки",
+                    ),
+                ),
+            },
+        ),
+    ]
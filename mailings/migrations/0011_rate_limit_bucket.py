@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-18 03:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0010_owner_share"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RateLimitBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(max_length=20, verbose_name="Область"),
+                ),
+                ("key", models.CharField(max_length=255, verbose_name="Ключ")),
+                ("rate", models.FloatField(verbose_name="Скорость, писем/с")),
+                (
+                    "capacity",
+                    models.FloatField(verbose_name="Запас на всплеск"),
+                ),
+                (
+                    "full_at",
+                    models.FloatField(
+                        default=0.0, verbose_name="Наполнится к (Unix-время)"
+                    ),
+                ),
+                (
+                    "reserved",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Зарезервировано токенов"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ограничение скорости",
+                "verbose_name_plural": "Ограничения скорости",
+                "ordering": ("scope", "key"),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="ratelimitbucket",
+            constraint=models.UniqueConstraint(
+                fields=("scope", "key"), name="unique_rate_limit_bucket"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-18 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0011_rate_limit_bucket"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxentry",
+            name="handed_off_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Передано серверу"
+            ),
+        ),
+    ]
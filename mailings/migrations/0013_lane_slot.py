@@ -0,0 +1,70 @@
+# Generated by Django 4.2 on 2026-10-18 03:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0012_outbox_handed_off"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LaneSlot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "server",
+                    models.CharField(max_length=255, verbose_name="Сервер"),
+                ),
+                ("number", models.PositiveIntegerField(verbose_name="Номер")),
+                (
+                    "lane",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("transactional", "Служебные письма"),
+                            ("manual", "Ручная отправка"),
+                            ("bulk", "Рассылки по расписанию"),
+                        ],
+                        max_length=20,
+                        verbose_name="Полоса",
+                    ),
+                ),
+                (
+                    "holder",
+                    models.CharField(
+                        blank=True,
+                        max_length=32,
+                        verbose_name="Ключ занявшего",
+                    ),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Занято до"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Место SMTP-соединения",
+                "verbose_name_plural": "Места SMTP-соединений",
+                "ordering": ("server", "number"),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="laneslot",
+            constraint=models.UniqueConstraint(
+                fields=("server", "number"), name="unique_lane_slot"
+            ),
+        ),
+    ]
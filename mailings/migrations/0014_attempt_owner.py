@@ -0,0 +1,59 @@
+# Generated by Django 4.2 on 2026-10-18 06:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+
+
+def fill_owner(apps, schema_editor):
+    """Переносит в попытки владельца их рассылки."""
+    Mailing = apps.get_model("mailings", "Mailing")
+    MailingAttempt = apps.get_model("mailings", "MailingAttempt")
+    MailingAttempt.objects.update(
+        owner_id=Subquery(
+            Mailing.objects.filter(pk=OuterRef("mailing_id")).values(
+                "owner_id"
+            )
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("mailings", "0013_lane_slot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mailingattempt",
+            name="owner",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="owned_attempts",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Владелец",
+            ),
+        ),
+        migrations.RunPython(fill_owner, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="mailingattempt",
+            name="owner",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="owned_attempts",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Владелец",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mailingattempt",
+            index=models.Index(
+                fields=["owner", "-attempt_time"],
+                name="attempt_owner_time_idx",
+            ),
+        ),
+    ]
@@ -1,20 +1,57 @@
+from functools import partial
+from typing import AsyncIterator, Iterator
+
+from asgiref.sync import async_to_sync, sync_to_async
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
+from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models import QuerySet
 from django.utils import timezone
 
 from mailings.constants import (
     EMAIL_LEN,
     FIRST_NAME_LEN,
+    JOB_KIND_LEN,
     LAST_NAME_LEN,
     PATRONYMIC_LEN,
+    SLOT_HOLDER_LEN,
     STATUS_LEN,
     SUBJECT_LEN,
+    WORKER_NAME_LEN,
     AttemptStatus,
+    DeliveryEngine,
+    JobKind,
+    JobStatus,
+    Lane,
     MailingStatus,
+    OutboxStatus,
+)
+from mailings.delivery import (
+    AsyncDelivery,
+    BulkWriter,
+    DeliveryResult,
+    MessageBuilder,
+    MessageTemplate,
+    RateLimit,
+    RetryPolicy,
+    get_delivery,
+    rate_limits,
+    templates,
+)
+from mailings.managers import (
+    CLAIMED_ERROR,
+    JOB_ACTIVE_STATUSES,
+    JobManager,
+    LaneSlotManager,
+    MailingManager,
+    MessageManager,
+    OutboxManager,
+    OwnerShareManager,
+    ProgressManager,
+    RateLimitBucketManager,
+    RecipientManager,
+    SenderWorkerManager,
 )
-from mailings.managers import MailingManager, MessageManager, RecipientManager
 
 
 class Recipient(models.Model):
@@ -54,6 +91,16 @@ class Recipient(models.Model):
         verbose_name = "Получатель"
         verbose_name_plural = "Получатели"
         ordering = ("last_name", "first_name")
+        indexes = (
+            models.Index(
+                fields=("owner", "last_name", "first_name"),
+                name="recipient_owner_name_idx",
+            ),
+            models.Index(
+                fields=("last_name", "first_name"),
+                name="recipient_name_idx",
+            ),
+        )
         permissions = (
             (
                 "can_view_all_recipients",
@@ -97,6 +144,13 @@ class Message(models.Model):
         verbose_name = "Сообщение"
         verbose_name_plural = "Сообщения"
         ordering = ("subject",)
+        indexes = (
+            models.Index(
+                fields=("owner", "subject"),
+                name="message_owner_subject_idx",
+            ),
+            models.Index(fields=("subject",), name="message_subject_idx"),
+        )
         permissions = (
             ("can_view_all_messages", "Может просматривать все сообщения"),
         )
@@ -104,6 +158,14 @@ class Message(models.Model):
     def __str__(self) -> str:
         return str(self.subject)
 
+    def save(self, *args, **kwargs) -> None:
+        super().save(*args, **kwargs)
+        templates.invalidate(self.pk)
+
+    def get_template(self) -> MessageTemplate:
+        """Возвращает скомпилированный шаблон темы и тела сообщения."""
+        return templates.get(self.pk, self.subject, self.body)
+
 
 class Mailing(models.Model):
     """Модель рассылки."""
@@ -120,6 +182,21 @@ class Mailing(models.Model):
         choices=MailingStatus.choices,
         default=MailingStatus.CREATED,
     )
+    claimed_until = models.DateTimeField(
+        "Захвачена для отправки до",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    claimed_by = models.ForeignKey(
+        "SenderWorker",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="claimed_mailings",
+        verbose_name="Захвачена отправителем",
+    )
     message = models.ForeignKey(
         Message,
         on_delete=models.CASCADE,
@@ -137,113 +214,504 @@ class Mailing(models.Model):
         verbose_name="Владелец",
     )
     objects = MailingManager()
+    _sender: "SenderWorker | None" = None
 
     class Meta:
         verbose_name = "Рассылка"
         verbose_name_plural = "Рассылки"
         ordering = ("start_time",)
+        indexes = (
+            models.Index(
+                fields=("status", "start_time", "end_time"),
+                name="mailing_due_idx",
+            ),
+            models.Index(
+                fields=("owner", "start_time"),
+                name="mailing_owner_start_idx",
+            ),
+            models.Index(fields=("start_time",), name="mailing_start_idx"),
+        )
         permissions = (
             ("can_view_all_mailings", "Может просматривать все рассылки"),
             ("can_block_mailings", "Может отключать рассылки"),
         )
 
-    def _log_attempt(self, status: str, server_response: str) -> None:
-        """Создаёт запись о попытке отправки."""
-        MailingAttempt.objects.create(
+    def _make_attempt(
+        self,
+        status: str,
+        server_response: str,
+    ) -> "MailingAttempt":
+        """Создаёт несохранённую запись о попытке отправки."""
+        return MailingAttempt(
             mailing=self,
+            owner_id=self.owner_id,
             status=status,
             server_response=server_response,
         )
 
-    def _set_running_status(self) -> None:
-        """Устанавливает статус 'Запущена' перед отправкой."""
+    def _log_attempt(
+        self,
+        status: str,
+        server_response: str,
+        attempt_log: BulkWriter | None = None,
+    ) -> None:
+        """
+        Создаёт запись о попытке отправки.
+
+        Если передан `attempt_log`, запись попадает в его буфер.
+        """
+        attempt = self._make_attempt(status, server_response)
+
+        if attempt_log is None:
+            attempt.save()
+        else:
+            attempt_log.add(attempt)
+
+    def _get_claim_timeout(self) -> float:
+        """Срок захвата: аренда отправителя или `MAILING_CLAIM_TIMEOUT`."""
+        if self._sender is not None:
+            return settings.MAILING_SENDER_LEASE_TIMEOUT
+        return settings.MAILING_CLAIM_TIMEOUT
+
+    def _get_claim_deadline(self):
+        return timezone.now() + timezone.timedelta(
+            seconds=self._get_claim_timeout()
+        )
+
+    def _claim(self, sender: "SenderWorker | None" = None) -> bool:
+        """
+        Захватывает рассылку для отправки этим процессом.
+
+        Захват действует `MAILING_CLAIM_TIMEOUT` секунд и продлевается
+        по ходу отправки; захват упавшего процесса истекает, и рассылку
+        подхватывает следующий отправитель. Захват процесса-отправителя
+        `sender` действует `MAILING_SENDER_LEASE_TIMEOUT` секунд и
+        продлевается также его сигналом жизни.
+        """
+        self._sender = sender
+        claimed_until = self._get_claim_deadline()
+
+        if not Mailing.objects.claim(self.pk, claimed_until, sender):
+            return False
+
         self.status = MailingStatus.RUNNING
-        self.save()
+        self.claimed_until = claimed_until
+        return True
 
-    def _can_send(self) -> bool:
-        """Проверяет, можно ли отправить рассылку."""
+    def _extend_claim(self) -> None:
+        """Продлевает захват, если прошло больше половины его срока."""
+        half_timeout = timezone.timedelta(
+            seconds=self._get_claim_timeout() / 2
+        )
+
+        if self.claimed_until - timezone.now() < half_timeout:
+            self.claimed_until = self._get_claim_deadline()
+            Mailing.objects.extend_claim(self.pk, self.claimed_until)
+
+    def _take_batch(self, after_pk: int) -> list["OutboxEntry"]:
+        """Продлевает захват и берёт в аренду следующую пачку писем."""
+        self._extend_claim()
+        return OutboxEntry.objects.take_batch(
+            self,
+            after_pk,
+            settings.MAILING_SEND_BATCH_SIZE,
+            lease_until=self.claimed_until,
+            sender=self._sender,
+        )
+
+    def _get_rejection(self) -> str | None:
+        """Возвращает причину, по которой рассылку нельзя отправить."""
         now = timezone.now()
 
         if self.owner.is_blocked:
-            self._log_attempt(
-                AttemptStatus.FAILED,
-                "Владелец рассылки заблокирован",
-            )
-            return False
-
+            return "Владелец рассылки заблокирован"
         if self.status == MailingStatus.DISABLED:
-            self._log_attempt(
-                AttemptStatus.FAILED,
-                "Рассылка отключена менеджером",
-            )
-            return False
-
+            return "Рассылка отключена менеджером"
         if self.start_time > now:
-            self._log_attempt(
-                AttemptStatus.FAILED,
-                "Рассылка ещё не началась",
-            )
-            return False
-
+            return "Рассылка ещё не началась"
         if self.end_time and self.end_time < now:
-            self._log_attempt(
-                AttemptStatus.FAILED,
-                "Срок действия рассылки истёк",
-            )
-            return False
+            return "Срок действия рассылки истёк"
+        return None
 
-        return True
+    def _is_last_attempt(self, status: str, server_response: str) -> bool:
+        """Проверяет, совпадает ли с заданной последняя попытка рассылки."""
+        last_attempt = (
+            MailingAttempt.objects.filter(mailing=self)
+            .order_by("-attempt_time", "-pk")
+            .values_list("status", "server_response")
+            .first()
+        )
+        return last_attempt == (status, server_response)
 
-    def _send_to_recipients(self) -> bool:
+    def _can_send(self) -> bool:
         """
-        Отправляет письма каждому получателю.
+        Проверяет, можно ли отправить рассылку.
 
-        Если все успешно, возвращает True, иначе False.
+        Отказ записывается попыткой, только если причина изменилась
+        с прошлой попытки, — повторные проверки не плодят записи.
         """
-        recipients: QuerySet = self.recipients.all()
-        all_success: bool = True
-
-        for recipient in recipients:
-            try:
-                send_mail(
-                    subject=self.message.subject,
-                    message=self.message.body,
-                    from_email=settings.EMAIL_HOST_USER,
-                    recipient_list=[recipient.email],
-                    fail_silently=False,
-                )
+        rejection = self._get_rejection()
+
+        if rejection is None:
+            return True
+
+        if not self._is_last_attempt(AttemptStatus.FAILED, rejection):
+            self._log_attempt(AttemptStatus.FAILED, rejection)
+        return False
+
+    def get_skip_reason(self) -> str | None:
+        """
+        Возвращает, почему `send_mailing` не отправил рассылку.
+
+        Это причина отказа либо захват рассылки другим процессом;
+        None — отправлять было нечего.
+        """
+        if rejection := self._get_rejection():
+            return rejection
+        if Mailing.objects.is_claimed(self.pk):
+            return CLAIMED_ERROR
+        return None
+
+    def _get_message_builder(self) -> MessageBuilder:
+        """Возвращает построитель писем по сообщению рассылки."""
+        return MessageBuilder(
+            self.message.get_template(),
+            settings.EMAIL_HOST_USER,
+            rcpt_limit=settings.MAILING_RCPT_BATCH_SIZE,
+            group_by_domain=settings.MAILING_RCPT_GROUP_BY_DOMAIN,
+        )
+
+    @staticmethod
+    def _build_batch_messages(
+        entries: list["OutboxEntry"],
+        builder: MessageBuilder,
+        in_flight: dict[str, "OutboxEntry"],
+    ) -> list[EmailMessage]:
+        """Создаёт письма для пачки записей очереди рассылки."""
+        for entry in entries:
+            in_flight[entry.recipient.email] = entry
+
+        return builder.build_batch([entry.recipient for entry in entries])
+
+    def _build_outbox_messages(
+        self,
+        in_flight: dict[str, "OutboxEntry"],
+        limit: int | None = None,
+    ) -> Iterator[EmailMessage]:
+        """
+        Создаёт письма для ожидающих записей очереди рассылки.
+
+        Записи выбираются пачками и помечаются отправляемыми, а до
+        получения результата хранятся в `in_flight` по адресу получателя.
+        Пачки перестают выбираться, когда взято не меньше `limit` записей.
+        """
+        last_pk: int = 0
+        taken: int = 0
+        builder = self._get_message_builder()
+
+        while (limit is None or taken < limit) and (
+            entries := self._take_batch(last_pk)
+        ):
+            yield from self._build_batch_messages(entries, builder, in_flight)
+            last_pk = entries[-1].pk
+            taken += len(entries)
+
+    async def _abuild_outbox_messages(
+        self,
+        in_flight: dict[str, "OutboxEntry"],
+        limit: int | None = None,
+    ) -> AsyncIterator[EmailMessage]:
+        """Асинхронный аналог `_build_outbox_messages`."""
+        last_pk: int = 0
+        taken: int = 0
+        take_batch = sync_to_async(self._take_batch)
+        builder = await sync_to_async(self._get_message_builder)()
+
+        while (limit is None or taken < limit) and (
+            entries := await take_batch(last_pk)
+        ):
+            for message in self._build_batch_messages(
+                entries, builder, in_flight
+            ):
+                yield message
+            last_pk = entries[-1].pk
+            taken += len(entries)
+
+    def _get_rate_limit(self) -> RateLimit:
+        """Возвращает ограничение скорости по серверу и владельцу рассылки."""
+        return rate_limits.for_delivery(
+            settings.EMAIL_HOST,
+            self.owner_id,
+            store=RateLimitBucket.objects.reserve,
+        )
+
+    @staticmethod
+    def _mark_handed_off(
+        in_flight: dict[str, "OutboxEntry"], messages: list[EmailMessage]
+    ) -> None:
+        """
+        Отмечает записи очереди переданными серверу перед отправкой писем.
+
+        Пачка, отдаваемая одним вызовом `send_messages`, отмечается одним
+        запросом.
+
+        Прерванные после этого записи могли дойти до получателя, а
+        арендованные без отметки возвращаются в очередь
+        (`OutboxManager.fail_interrupted`).
+        """
+        OutboxEntry.objects.mark_handed_off(
+            [
+                in_flight[address].pk
+                for message in messages
+                for address in message.recipients()
+                if address in in_flight
+            ]
+        )
+
+    @staticmethod
+    def _get_attempt_status(result: DeliveryResult) -> str:
+        """Возвращает статус попытки по результату отправки письма."""
+        if result.success:
+            return AttemptStatus.SUCCESS
+        return AttemptStatus.FAILED
+
+    def _send_to_recipients(
+        self,
+        attempt_log: BulkWriter,
+        workers: int | None = None,
+        lane: str = Lane.BULK,
+        limit: int | None = None,
+    ) -> int:
+        """
+        Отправляет письма из очереди рассылки и возвращает их число.
+
+        Письма отправляются в `workers` потоков по полосе `lane`, попытки
+        и результаты по каждому получателю записываются в вызывающем
+        потоке.
+        """
+        processed: int = 0
+        in_flight: dict[str, OutboxEntry] = {}
+        policy = RetryPolicy.from_settings()
+        outbox_log = BulkWriter(
+            OutboxEntry,
+            method="save_results",
+        )
+
+        delivery = get_delivery(
+            workers,
+            self._get_rate_limit(),
+            lane,
+            on_handoff=partial(self._mark_handed_off, in_flight),
+        )
+
+        with outbox_log, delivery:
+            messages = self._build_outbox_messages(in_flight, limit)
+            for result in delivery.send(messages):
+                entry = in_flight.pop(result.recipient)
+                entry.apply_result(result, policy)
+                outbox_log.add(entry)
                 self._log_attempt(
-                    AttemptStatus.SUCCESS,
-                    "Сообщение успешно отправлено",
+                    self._get_attempt_status(result),
+                    result.response,
+                    attempt_log,
                 )
-            except Exception as err_msg:  # noqa: skip
-                self._log_attempt(
-                    AttemptStatus.FAILED,
-                    "Ошибка отправки",
+                processed += 1
+
+        return processed
+
+    async def _asend_to_recipients(
+        self,
+        attempt_log: BulkWriter,
+        limit: int | None = None,
+    ) -> int:
+        """Асинхронный аналог `_send_to_recipients`."""
+        processed: int = 0
+        in_flight: dict[str, OutboxEntry] = {}
+        policy = RetryPolicy.from_settings()
+        outbox_log = BulkWriter(
+            OutboxEntry,
+            method="save_results",
+        )
+        messages = self._abuild_outbox_messages(in_flight, limit)
+
+        try:
+            delivery = AsyncDelivery(
+                rate_limit=self._get_rate_limit(),
+                on_handoff=sync_to_async(
+                    partial(self._mark_handed_off, in_flight)
+                ),
+            )
+            async for result in delivery.asend(messages):
+                entry = in_flight.pop(result.recipient)
+                entry.apply_result(result, policy)
+                await outbox_log.aadd(entry)
+                await attempt_log.aadd(
+                    self._make_attempt(
+                        self._get_attempt_status(result),
+                        result.response,
+                    )
                 )
-                all_success = False
+                processed += 1
+        finally:
+            await outbox_log.aflush()
 
-        return all_success
+        return processed
 
-    def _update_final_status(self, all_success: bool) -> None:
-        """Обновляет финальный статус рассылки."""
-        if not all_success:
-            self.status = MailingStatus.RUNNING
-        else:
-            self.status = MailingStatus.COMPLETED
-        self.save()
+    def _prepare_outbox(self, limit: int | None = None) -> None:
+        """
+        Готовит очередь рассылки к отправке.
 
-    def send_mailing(self) -> None:
+        Добавляет в очередь новых получателей и разбирает письма,
+        аренда которых истекла: переданные серверу закрываются, чтобы
+        не отправить их повторно, остальные возвращаются в очередь. При
+        отправке частями (`limit`) получатели добавляются, только когда
+        ожидающих писем не осталось, — часть большой рассылки не
+        перебирает всех её получателей.
+        """
+        if limit is None or not self._has_pending():
+            OutboxEntry.objects.materialize(
+                self, settings.MAILING_SEND_BATCH_SIZE
+            )
+        OutboxEntry.objects.fail_interrupted(self, expired_only=True)
+
+    def _has_pending(self) -> bool:
+        return self.outbox.filter(status=OutboxStatus.PENDING).exists()
+
+    def _is_finished(self) -> bool:
+        """
+        Проверяет, что по каждому получателю получен окончательный итог.
+
+        Письмо либо отправлено, либо не отправлено окончательно; письма,
+        ожидающие повторной попытки, оставляют рассылку запущенной.
+        Рассылка не завершена и тогда, когда в очередь попали не все
+        получатели: процесс мог упасть, не дописав очередь, а при отправке
+        частями её дописывает только следующая часть.
+        """
+        if self.outbox.filter(
+            status__in=(OutboxStatus.PENDING, OutboxStatus.SENDING)
+        ).exists():
+            return False
+        return self.outbox.count() >= self.recipients.count()
+
+    def _release(self) -> None:
+        """
+        Снимает захват и обновляет финальный статус рассылки.
+
+        Статус меняется, только если рассылку не отключили и не
+        завершили, пока она отправлялась.
+        """
+        status = (
+            MailingStatus.COMPLETED
+            if self._is_finished()
+            else MailingStatus.RUNNING
+        )
+
+        if Mailing.objects.release(self.pk, status):
+            self.status = status
+        self.claimed_until = None
+
+    def send_mailing(
+        self,
+        attempt_log: BulkWriter | None = None,
+        workers: int | None = None,
+        sender: "SenderWorker | None" = None,
+        lane: str = Lane.BULK,
+        limit: int | None = None,
+    ) -> int:
         """
         Отправляет рассылки всем получателям с учётом статуса и блокировки.
+
+        Письма отправляются из очереди рассылки (`OutboxEntry`), поэтому
+        прерванная рассылка продолжается с места остановки, а уже
+        отправленным получателям письма повторно не уходят. Повторный
+        вызов отправляет только письма, у которых подошло время повтора.
+
+        Рассылку отправляет только процесс, захвативший её (`_claim`):
+        одновременный вызов из другого запроса или процесса ничего
+        не делает.
+
+        Попытки отправки записываются пачками через `attempt_log`; буфер
+        сбрасывается по завершении рассылки, в том числе при ошибке.
+        `workers` задаёт число потоков отправки (`MAILING_WORKERS`),
+        `sender` — процесс-отправитель из реестра, продлевающий захват,
+        `lane` — полоса доставки, соединения которой занимает рассылка.
+
+        С `limit` за вызов отправляется часть рассылки не больше чем
+        примерно из `limit` писем, а остальные отправит следующий вызов.
+        Возвращает число писем, по которым получен результат.
+
+        При `MAILING_DELIVERY_ENGINE = "async"` рассылка по расписанию
+        выполняется через `asend_mailing`. Асинхронные сессии не занимают
+        места полос, поэтому письма других полос по-прежнему уходят через
+        `get_delivery`.
         """
-        if not self._can_send():
-            return
+        if (
+            settings.MAILING_DELIVERY_ENGINE == DeliveryEngine.ASYNC
+            and lane == Lane.BULK
+        ):
+            return async_to_sync(self.asend_mailing)(
+                attempt_log, sender, limit
+            )
+
+        if not self._can_send() or not self._claim(sender):
+            return 0
+
+        if attempt_log is None:
+            attempt_log = BulkWriter(MailingAttempt)
+
+        try:
+            self._prepare_outbox(limit)
+            with attempt_log:
+                return self._send_to_recipients(
+                    attempt_log, workers, lane, limit
+                )
+        except BaseException:
+            OutboxEntry.objects.fail_interrupted(self)
+            raise
+        finally:
+            self._release()
 
-        self._set_running_status()
-        all_success = self._send_to_recipients()
+    async def _asend_outbox(
+        self,
+        attempt_log: BulkWriter,
+        limit: int | None = None,
+    ) -> int:
+        """Готовит очередь и отправляет письма захваченной рассылки."""
+        await sync_to_async(self._prepare_outbox)(limit)
+        self.message = await Message.objects.aget(pk=self.message_id)
+
+        try:
+            return await self._asend_to_recipients(attempt_log, limit)
+        finally:
+            await attempt_log.aflush()
+
+    async def asend_mailing(
+        self,
+        attempt_log: BulkWriter | None = None,
+        sender: "SenderWorker | None" = None,
+        limit: int | None = None,
+    ) -> int:
+        """
+        Асинхронный аналог `send_mailing`.
+
+        Письма отправляются через `AsyncDelivery` в нескольких параллельных
+        SMTP-сессиях (`MAILING_ASYNC_SESSIONS`).
+        """
+        if not await sync_to_async(self._can_send)():
+            return 0
+        if not await sync_to_async(self._claim)(sender):
+            return 0
 
-        self._update_final_status(all_success)
+        if attempt_log is None:
+            attempt_log = BulkWriter(MailingAttempt)
+
+        try:
+            return await self._asend_outbox(attempt_log, limit)
+        except BaseException:
+            await sync_to_async(OutboxEntry.objects.fail_interrupted)(self)
+            raise
+        finally:
+            await sync_to_async(self._release)()
 
     def __str__(self) -> str:
         return f"{self.message.subject} ({self.status})"
@@ -270,11 +738,450 @@ class MailingAttempt(models.Model):
         on_delete=models.CASCADE,
         verbose_name="Рассылка",
     )
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="owned_attempts",
+        verbose_name="Владелец",
+    )
 
     class Meta:
         verbose_name = "Попытка рассылки"
         verbose_name_plural = "Попытки рассылки"
         ordering = ("-attempt_time",)
+        indexes = (
+            models.Index(
+                fields=("mailing", "-attempt_time"),
+                name="attempt_mailing_time_idx",
+            ),
+            models.Index(
+                fields=("owner", "-attempt_time"),
+                name="attempt_owner_time_idx",
+            ),
+            models.Index(fields=("-attempt_time",), name="attempt_time_idx"),
+        )
 
     def __str__(self) -> str:
         return f"{self.mailing} - {self.status.name}"
+
+    def save(self, *args, **kwargs) -> None:
+        """
+        Сохраняет попытку с владельцем рассылки.
+
+        Владелец хранится в попытке, чтобы список попыток владельца
+        читался по индексу в порядке времени без сортировки.
+        """
+        if self.owner_id is None:
+            self.owner_id = self.mailing.owner_id
+        super().save(*args, **kwargs)
+
+
+class OutboxEntry(models.Model):
+    """Модель письма получателю в очереди рассылки."""
+
+    RESULT_FIELDS: list[str] = [
+        "status",
+        "last_error",
+        "next_attempt_at",
+        "sent_at",
+        "updated_at",
+    ]
+
+    mailing = models.ForeignKey(
+        Mailing,
+        on_delete=models.CASCADE,
+        related_name="outbox",
+        verbose_name="Рассылка",
+    )
+    recipient = models.ForeignKey(
+        Recipient,
+        on_delete=models.CASCADE,
+        related_name="outbox",
+        verbose_name="Получатель",
+    )
+    status = models.CharField(
+        "Статус",
+        max_length=STATUS_LEN,
+        choices=OutboxStatus.choices,
+        default=OutboxStatus.PENDING,
+    )
+    attempts = models.PositiveIntegerField(
+        "Количество попыток",
+        default=0,
+    )
+    last_error = models.TextField(
+        "Последняя ошибка",
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        "Создано",
+        auto_now_add=True,
+    )
+    updated_at = models.DateTimeField(
+        "Обновлено",
+        auto_now=True,
+    )
+    next_attempt_at = models.DateTimeField(
+        "Следующая попытка",
+        null=True,
+        blank=True,
+    )
+    sent_at = models.DateTimeField(
+        "Отправлено",
+        null=True,
+        blank=True,
+    )
+    leased_by = models.ForeignKey(
+        "SenderWorker",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="leases",
+        verbose_name="Отправитель",
+    )
+    lease_expires_at = models.DateTimeField(
+        "Аренда до",
+        null=True,
+        blank=True,
+    )
+    handed_off_at = models.DateTimeField(
+        "Передано серверу",
+        null=True,
+        blank=True,
+    )
+    objects = OutboxManager()
+
+    class Meta:
+        verbose_name = "Письмо в очереди"
+        verbose_name_plural = "Очередь писем"
+        ordering = ("pk",)
+        indexes = (
+            models.Index(
+                fields=("mailing", "status", "id"),
+                name="outbox_mailing_status_idx",
+            ),
+            models.Index(
+                fields=("status", "next_attempt_at"),
+                name="outbox_status_retry_idx",
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=("mailing", "recipient"),
+                name="unique_outbox_mailing_recipient",
+            ),
+        )
+
+    def apply_result(
+        self, result: DeliveryResult, policy: RetryPolicy
+    ) -> None:
+        """
+        Переносит в запись результат отправки письма.
+
+        После временной ошибки письмо возвращается в очередь с задержкой
+        по `policy`, пока не исчерпаны попытки; иначе ошибка окончательная.
+        """
+        now = timezone.now()
+        self.updated_at = now
+        self.next_attempt_at = None
+
+        if result.success:
+            self.status = OutboxStatus.SENT
+            self.sent_at = now
+            self.last_error = ""
+            return
+
+        self.last_error = result.response
+
+        if result.transient and policy.can_retry(self.attempts):
+            self.status = OutboxStatus.PENDING
+            self.next_attempt_at = now + policy.get_delay(self.attempts)
+        else:
+            self.status = OutboxStatus.FAILED
+
+    def __str__(self) -> str:
+        return f"{self.mailing_id} - {self.recipient_id} ({self.status})"
+
+
+class SenderWorker(models.Model):
+    """Модель процесса-отправителя в реестре отправителей."""
+
+    name = models.CharField(
+        "Имя",
+        max_length=WORKER_NAME_LEN,
+        unique=True,
+    )
+    hostname = models.CharField(
+        "Хост",
+        max_length=WORKER_NAME_LEN,
+    )
+    pid = models.PositiveIntegerField(
+        "PID",
+    )
+    started_at = models.DateTimeField(
+        "Запущен",
+        auto_now_add=True,
+    )
+    heartbeat_at = models.DateTimeField(
+        "Последний сигнал",
+        default=timezone.now,
+        db_index=True,
+    )
+    objects = SenderWorkerManager()
+
+    class Meta:
+        verbose_name = "Отправитель"
+        verbose_name_plural = "Отправители"
+        ordering = ("name",)
+
+    def __str__(self) -> str:
+        return str(self.name)
+
+
+class RateLimitBucket(models.Model):
+    """Модель ведра токенов, общего для всех процессов-отправителей."""
+
+    scope = models.CharField(
+        "Область",
+        max_length=STATUS_LEN,
+    )
+    key = models.CharField(
+        "Ключ",
+        max_length=WORKER_NAME_LEN,
+    )
+    rate = models.FloatField(
+        "Скорость, писем/с",
+    )
+    capacity = models.FloatField(
+        "Запас на всплеск",
+    )
+    full_at = models.FloatField(
+        "Наполнится к (Unix-время)",
+        default=0.0,
+    )
+    reserved = models.PositiveBigIntegerField(
+        "Зарезервировано токенов",
+        default=0,
+    )
+    objects = RateLimitBucketManager()
+
+    class Meta:
+        verbose_name = "Ограничение скорости"
+        verbose_name_plural = "Ограничения скорости"
+        ordering = ("scope", "key")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("scope", "key"),
+                name="unique_rate_limit_bucket",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.scope} {self.key}"
+
+
+class LaneSlot(models.Model):
+    """Модель места SMTP-соединения, общего для всех процессов."""
+
+    server = models.CharField(
+        "Сервер",
+        max_length=WORKER_NAME_LEN,
+    )
+    number = models.PositiveIntegerField(
+        "Номер",
+    )
+    lane = models.CharField(
+        "Полоса",
+        max_length=STATUS_LEN,
+        choices=Lane.choices,
+        blank=True,
+    )
+    holder = models.CharField(
+        "Ключ занявшего",
+        max_length=SLOT_HOLDER_LEN,
+        blank=True,
+    )
+    expires_at = models.DateTimeField(
+        "Занято до",
+        null=True,
+        blank=True,
+    )
+    objects = LaneSlotManager()
+
+    class Meta:
+        verbose_name = "Место SMTP-соединения"
+        verbose_name_plural = "Места SMTP-соединений"
+        ordering = ("server", "number")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("server", "number"),
+                name="unique_lane_slot",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.server} #{self.number}"
+
+
+class Job(models.Model):
+    """Модель фоновой задачи в очереди задач."""
+
+    kind = models.CharField(
+        "Вид",
+        max_length=JOB_KIND_LEN,
+        choices=JobKind.choices,
+    )
+    mailing = models.ForeignKey(
+        Mailing,
+        on_delete=models.CASCADE,
+        related_name="jobs",
+        verbose_name="Рассылка",
+    )
+    status = models.CharField(
+        "Статус",
+        max_length=STATUS_LEN,
+        choices=JobStatus.choices,
+        default=JobStatus.QUEUED,
+    )
+    attempts = models.PositiveIntegerField(
+        "Количество попыток",
+        default=0,
+    )
+    last_error = models.TextField(
+        "Последняя ошибка",
+        blank=True,
+    )
+    run_after = models.DateTimeField(
+        "Выполнить после",
+        default=timezone.now,
+    )
+    locked_by = models.ForeignKey(
+        SenderWorker,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+        verbose_name="Обработчик",
+    )
+    locked_until = models.DateTimeField(
+        "Захвачена до",
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        "Создана",
+        auto_now_add=True,
+    )
+    updated_at = models.DateTimeField(
+        "Обновлена",
+        auto_now=True,
+    )
+    finished_at = models.DateTimeField(
+        "Завершена",
+        null=True,
+        blank=True,
+    )
+    objects = JobManager()
+
+    class Meta:
+        verbose_name = "Задача"
+        verbose_name_plural = "Задачи"
+        ordering = ("-pk",)
+        indexes = (
+            models.Index(
+                fields=("status", "run_after"),
+                name="job_status_run_after_idx",
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=("mailing", "kind"),
+                condition=models.Q(status__in=JOB_ACTIVE_STATUSES),
+                name="unique_active_job",
+            ),
+        )
+
+    @property
+    def is_active(self) -> bool:
+        """Задача ещё в очереди или выполняется."""
+        return self.status in JOB_ACTIVE_STATUSES
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} {self.mailing_id} ({self.status})"
+
+
+class MailingProgress(models.Model):
+    """Модель счётчиков прогресса отправки рассылки."""
+
+    mailing = models.OneToOneField(
+        Mailing,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="progress",
+        verbose_name="Рассылка",
+    )
+    total = models.PositiveIntegerField(
+        "Всего писем",
+        default=0,
+    )
+    sent = models.PositiveIntegerField(
+        "Отправлено",
+        default=0,
+    )
+    failed = models.PositiveIntegerField(
+        "Не отправлено",
+        default=0,
+    )
+    updated_at = models.DateTimeField(
+        "Обновлено",
+        default=timezone.now,
+    )
+    objects = ProgressManager()
+
+    class Meta:
+        verbose_name = "Прогресс рассылки"
+        verbose_name_plural = "Прогресс рассылок"
+
+    @property
+    def pending(self) -> int:
+        """Письма, по которым ещё нет окончательного итога."""
+        return max(self.total - self.sent - self.failed, 0)
+
+    def __str__(self) -> str:
+        return f"{self.mailing_id}: {self.sent}/{self.total}"
+
+
+class OwnerShare(models.Model):
+    """Модель доли владельца в отправке рассылок по расписанию."""
+
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="mailing_share",
+        verbose_name="Владелец",
+    )
+    weight = models.PositiveSmallIntegerField(
+        "Вес",
+        default=1,
+        validators=(MinValueValidator(1),),
+        help_text="Во сколько раз больше писем владелец отправляет за круг",
+    )
+    max_concurrent = models.PositiveSmallIntegerField(
+        "Одновременных отправок",
+        null=True,
+        blank=True,
+        validators=(MinValueValidator(1),),
+        help_text="Пусто — по умолчанию для всех владельцев",
+    )
+    objects = OwnerShareManager()
+
+    class Meta:
+        verbose_name = "Доля отправки владельца"
+        verbose_name_plural = "Доли отправки владельцев"
+        permissions = (
+            ("can_manage_owner_shares", "Может настраивать доли отправки"),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.owner}: {self.weight}"
@@ -0,0 +1,241 @@
+"""Прогресс отправки рассылок для потоковых подписчиков (SSE)."""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Callable
+
+from django.conf import settings
+
+from mailings.constants import MailingStatus
+from mailings.models import Mailing
+
+FINAL_STATUSES: frozenset[str] = frozenset(
+    (MailingStatus.COMPLETED, MailingStatus.DISABLED)
+)
+SSE_RETRY_MS: int = 3000
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    """Прогресс рассылки на момент опроса."""
+
+    mailing_id: int
+    status: str
+    total: int
+    sent: int
+    failed: int
+    rate: float
+    eta: float | None
+
+    @property
+    def pending(self) -> int:
+        return max(self.total - self.sent - self.failed, 0)
+
+    @property
+    def is_final(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "pending": self.pending}
+
+
+class RateMeter:
+    """Скорость обработки писем по выборкам за последние `window` секунд."""
+
+    def __init__(
+        self,
+        window: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.window = window
+        self._clock = clock
+        self._samples: deque[tuple[float, int]] = deque()
+
+    def add(self, done: int) -> float:
+        """Учитывает обработанные письма и возвращает скорость, писем/с."""
+        now = self._clock()
+        self._samples.append((now, done))
+
+        while now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+
+        started, done_before = self._samples[0]
+        if now <= started:
+            return 0.0
+        return (done - done_before) / (now - started)
+
+
+class ProgressPoller:
+    """
+    Опрос прогресса одной рассылки, общий для всех её подписчиков.
+
+    Пока есть подписчики, раз в `interval` секунд читает счётчики
+    рассылки одним запросом и передаёт снимок каждому подписчику.
+    Подписчик хранит только последний снимок, поэтому медленный клиент
+    не копит очередь. Если рассылка удалена, подписчики получают None.
+    """
+
+    def __init__(
+        self,
+        mailing_id: int,
+        interval: float | None = None,
+        window: float | None = None,
+    ) -> None:
+        self.mailing_id = mailing_id
+        self.interval = interval or settings.MAILING_PROGRESS_INTERVAL
+        self._rate = RateMeter(window or settings.MAILING_PROGRESS_RATE_WINDOW)
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Добавляет подписчика; первый подписчик запускает опрос."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.add(queue)
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> bool:
+        """Убирает подписчика; True, если подписчиков не осталось."""
+        self._subscribers.discard(queue)
+
+        if self._subscribers:
+            return False
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        return True
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    async def fetch(self) -> ProgressSnapshot | None:
+        """Читает статус и счётчики рассылки."""
+        row = (
+            await Mailing.objects.filter(pk=self.mailing_id)
+            .values(
+                "status",
+                "progress__total",
+                "progress__sent",
+                "progress__failed",
+            )
+            .afirst()
+        )
+        if row is None:
+            return None
+
+        total = row["progress__total"] or 0
+        sent = row["progress__sent"] or 0
+        failed = row["progress__failed"] or 0
+        rate = self._rate.add(sent + failed)
+        pending = max(total - sent - failed, 0)
+        return ProgressSnapshot(
+            mailing_id=self.mailing_id,
+            status=row["status"],
+            total=total,
+            sent=sent,
+            failed=failed,
+            rate=round(rate, 1),
+            eta=round(pending / rate, 1) if rate > 0 else None,
+        )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                snapshot = await self.fetch()
+            except Exception:  # noqa: skip
+                logger.exception("Ошибка опроса рассылки %s", self.mailing_id)
+            else:
+                for queue in self._subscribers:
+                    self._offer(queue, snapshot)
+            await asyncio.sleep(self.interval)
+
+    @staticmethod
+    def _offer(
+        queue: asyncio.Queue, snapshot: ProgressSnapshot | None
+    ) -> None:
+        """Кладёт снимок в очередь подписчика, вытесняя непрочитанный."""
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(snapshot)
+
+
+class ProgressHub:
+    """
+    Опросы прогресса рассылок, общие для event loop процесса.
+
+    Все подписчики одной рассылки получают снимки одного опроса, поэтому
+    число запросов к базе не зависит от числа открытых страниц.
+    """
+
+    def __init__(self) -> None:
+        self._pollers: dict[int, ProgressPoller] = {}
+
+    @asynccontextmanager
+    async def subscribe(self, mailing_id: int) -> AsyncIterator[asyncio.Queue]:
+        """Подписывает на снимки прогресса рассылки на время блока."""
+        poller = self._pollers.get(mailing_id)
+        if poller is None:
+            poller = self._pollers[mailing_id] = ProgressPoller(mailing_id)
+
+        queue = poller.subscribe()
+        try:
+            yield queue
+        finally:
+            if poller.unsubscribe(queue):
+                self._pollers.pop(mailing_id, None)
+
+    def get_metrics(self) -> dict[int, int]:
+        """Возвращает число подписчиков по рассылкам."""
+        return {
+            mailing_id: poller.subscribers
+            for mailing_id, poller in self._pollers.items()
+        }
+
+
+progress_hub = ProgressHub()
+
+
+def format_event(event: str, data: dict) -> str:
+    """Форматирует событие server-sent events."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_progress(
+    mailing_id: int,
+    timeout: float | None = None,
+) -> AsyncIterator[str]:
+    """
+    Отдаёт события прогресса рассылки, пока она не завершится.
+
+    Поток закрывается не позже чем через `timeout` секунд
+    (`MAILING_PROGRESS_STREAM_TIMEOUT`), после чего браузер
+    переподключается сам; по завершении рассылки приходит событие
+    `done`, после которого клиенту переподключаться не нужно.
+    """
+    timeout = timeout or settings.MAILING_PROGRESS_STREAM_TIMEOUT
+    deadline = time.monotonic() + timeout
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+
+    async with progress_hub.subscribe(mailing_id) as queue:
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                snapshot = await asyncio.wait_for(queue.get(), remaining)
+            except TimeoutError:
+                return
+            if snapshot is None:
+                return
+
+            yield format_event("progress", snapshot.as_dict())
+            if snapshot.is_final:
+                yield format_event("done", snapshot.as_dict())
+                return
@@ -0,0 +1,216 @@
+"""Автоматическая отправка рассылок по расписанию."""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from mailings.fairshare import FairScheduler
+from mailings.models import (
+    Mailing,
+    MailingProgress,
+    OutboxEntry,
+    OwnerShare,
+    SenderWorker,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPIRED_ERROR: str = "Срок действия рассылки истёк"
+
+
+class MailingDispatcher:
+    """
+    Отправляет подошедшие рассылки в пуле потоков.
+
+    Одновременно отправляется не более `max_concurrent` рассылок; пока
+    рассылка отправляется, повторно она не выбирается. Подошедшие
+    рассылки, не поместившиеся в лимит, берутся при следующем вызове;
+    рассылки, поставленные в очередь ручной отправки, пропускаются.
+    Рассылки захватываются от имени процесса-отправителя `sender`.
+
+    Места делятся между владельцами рассылок (`FairScheduler`), и за
+    раз рассылка отправляется частью из `MAILING_FAIR_QUANTUM` писем,
+    поэтому огромная рассылка одного владельца не занимает все места.
+    Освободившееся место сразу получает следующая часть, не дожидаясь
+    следующего вызова.
+    """
+
+    thread_name_prefix: str = "mailing-dispatcher"
+
+    def __init__(
+        self,
+        max_concurrent: int | None = None,
+        sender: SenderWorker | None = None,
+    ) -> None:
+        self.max_concurrent = (
+            max_concurrent or settings.MAILING_SCHEDULER_CONCURRENCY
+        )
+        self.sender = sender
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent,
+            thread_name_prefix=self.thread_name_prefix,
+        )
+        self._in_flight: dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._stopped: bool = False
+        self.fair = FairScheduler(settings.MAILING_FAIR_QUANTUM)
+
+    def dispatch_due(self) -> list[int]:
+        """Ставит на отправку подошедшие рассылки, возвращает их ID."""
+        with self._lock:
+            return self._submit_free()
+
+    def _submit_free(self) -> list[int]:
+        """Занимает свободные места частями рассылок; под `_lock`."""
+        free = self.max_concurrent - len(self._in_flight)
+        if self._stopped or free <= 0:
+            return []
+        return self._submit(free)
+
+    def dispatch_all(self) -> list[int]:
+        """
+        Ставит на отправку все подошедшие рассылки сразу.
+
+        Сверх лимита рассылки ждут в очереди пула; используется для
+        разового запуска, когда следующей проверки не будет.
+        """
+        with self._lock:
+            return self._submit()
+
+    def _submit(self, limit: int | None = None) -> list[int]:
+        """
+        Выбирает подошедшие рассылки и отправляет их в пул.
+
+        До `limit` рассылок выбирается по долям владельцев, и каждая
+        отправляет одну часть; без `limit` рассылки отправляются целиком.
+        """
+        due = list(
+            Mailing.objects.scheduled()
+            .exclude(pk__in=list(self._in_flight))
+            .order_by("start_time", "pk")
+            .values_list("pk", "owner_id")
+        )
+        quantum = None
+
+        if limit is not None:
+            due = self._select_fair(due, limit)
+            quantum = self.fair.quantum
+
+        for mailing_id, owner_id in due:
+            self._in_flight[mailing_id] = self._executor.submit(
+                self._send, mailing_id, owner_id, quantum
+            )
+        return [mailing_id for mailing_id, _ in due]
+
+    def _select_fair(
+        self, due: list[tuple[int, int]], limit: int
+    ) -> list[tuple[int, int]]:
+        """Выбирает рассылки по весам и ограничениям владельцев."""
+        ready: dict[int, list[int]] = {}
+        for mailing_id, owner_id in due:
+            ready.setdefault(owner_id, []).append(mailing_id)
+
+        weights, caps = OwnerShare.objects.get_shares(ready)
+        return self.fair.select(ready, limit, weights, caps)
+
+    def wait(self, timeout: float | None = None) -> None:
+        """Ждёт завершения отправляемых рассылок и их следующих частей."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                futures = list(self._in_flight.values())
+            remaining = (
+                None if deadline is None else deadline - time.monotonic()
+            )
+            if not futures or (remaining is not None and remaining <= 0):
+                return
+            wait(futures, timeout=remaining)
+
+    def shutdown(self) -> None:
+        """Дожидается отправляемых рассылок и останавливает пул."""
+        with self._lock:
+            self._stopped = True
+        self._executor.shutdown(wait=True)
+
+    def _send(
+        self, mailing_id: int, owner_id: int, limit: int | None = None
+    ) -> None:
+        """Отправляет рассылку или её часть из `limit` писем."""
+        processed = 0
+        try:
+            mailing = Mailing.objects.select_related("owner", "message").get(
+                pk=mailing_id
+            )
+            processed = mailing.send_mailing(sender=self.sender, limit=limit)
+        except Exception:  # noqa: skip
+            logger.exception("Ошибка отправки рассылки %s", mailing_id)
+        finally:
+            with self._lock:
+                self._in_flight.pop(mailing_id, None)
+                if limit is not None:
+                    self.fair.finish(owner_id, processed)
+                    if processed >= limit:
+                        self._submit_next()
+            close_old_connections()
+
+    def _submit_next(self) -> None:
+        """
+        Отдаёт освободившееся место следующей части; вызывается под `_lock`.
+
+        Вызывается, только когда часть отправила полный квант: рассылки,
+        которым сейчас нечего отправлять, ждут следующего вызова, а не
+        перезапускаются вхолостую.
+        """
+        try:
+            self._submit_free()
+        except Exception:  # noqa: skip
+            logger.exception("Ошибка выбора следующей части рассылки")
+
+
+_dispatcher: MailingDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher(max_concurrent: int | None = None) -> MailingDispatcher:
+    """Возвращает общий для процесса диспетчер рассылок."""
+    global _dispatcher
+
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = MailingDispatcher(max_concurrent)
+        return _dispatcher
+
+
+def dispatch_due_mailings(max_concurrent: int | None = None) -> None:
+    """Задача планировщика: отправляет подошедшие рассылки."""
+    get_dispatcher(max_concurrent).dispatch_due()
+
+
+def sweep_expired_mailings(batch_size: int | None = None) -> int:
+    """
+    Завершает рассылки, срок которых истёк, и возвращает их число.
+
+    Рассылки обрабатываются пачками по `batch_size`
+    (`MAILING_SWEEP_BATCH_SIZE`): ожидающие письма пачки закрываются
+    неотправленными, а сами рассылки завершаются одним UPDATE; их
+    счётчики прогресса пересчитываются.
+    """
+    batch_size = batch_size or settings.MAILING_SWEEP_BATCH_SIZE
+    expired = Mailing.objects.expired(timezone.now())
+    completed = 0
+
+    while mailing_ids := list(
+        expired.values_list("pk", flat=True)[:batch_size]
+    ):
+        with transaction.atomic():
+            OutboxEntry.objects.cancel_pending(mailing_ids, EXPIRED_ERROR)
+            completed += Mailing.objects.complete(mailing_ids)
+            MailingProgress.objects.rebuild(mailing_ids)
+
+    return completed
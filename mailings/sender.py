@@ -0,0 +1,115 @@
+"""Процесс-отправитель, согласующий работу с другими через базу."""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from mailings.models import SenderWorker
+from mailings.scheduler import MailingDispatcher
+
+logger = logging.getLogger(__name__)
+
+
+class SenderProcess:
+    """
+    Отправитель рассылок, работающий параллельно с другими на любых хостах.
+
+    Процесс регистрируется в реестре `SenderWorker` и раз в
+    `heartbeat_interval` секунд подаёт сигнал жизни, продлевая на
+    `lease_timeout` секунд захваты своих рассылок и аренды своих писем.
+    Раз в `poll_interval` секунд он удаляет из реестра отправителей, не
+    подававших сигнал дольше `lease_timeout`, и отправляет подошедшие
+    рассылки. Захваты упавшего отправителя истекают, и его рассылки
+    продолжает другой.
+    """
+
+    dispatcher_class: type[MailingDispatcher] = MailingDispatcher
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        poll_interval: float | None = None,
+        heartbeat_interval: float | None = None,
+        lease_timeout: float | None = None,
+    ) -> None:
+        self.concurrency = concurrency
+        self.poll_interval = (
+            poll_interval or settings.MAILING_SENDER_POLL_INTERVAL
+        )
+        self.heartbeat_interval = (
+            heartbeat_interval or settings.MAILING_SENDER_HEARTBEAT_INTERVAL
+        )
+        self.lease_timeout = (
+            lease_timeout or settings.MAILING_SENDER_LEASE_TIMEOUT
+        )
+        self.worker: SenderWorker | None = None
+        self._dispatcher: MailingDispatcher | None = None
+        self._heartbeat: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> SenderWorker:
+        """Регистрирует отправителя и запускает сигнал жизни."""
+        self.worker = SenderWorker.objects.register()
+        self._dispatcher = self.dispatcher_class(self.concurrency, self.worker)
+        self._heartbeat = threading.Thread(
+            target=self._beat,
+            name=f"heartbeat-{self.worker.name}",
+            daemon=True,
+        )
+        self._heartbeat.start()
+        return self.worker
+
+    def poll(self) -> list[int]:
+        """Удаляет мёртвых отправителей и отправляет подошедшие рассылки."""
+        SenderWorker.objects.dead(self.lease_timeout).delete()
+        return self._dispatcher.dispatch_due()
+
+    def run(self) -> None:
+        """Отправляет рассылки до вызова `stop`."""
+        self.start()
+        try:
+            while not self._stopped.is_set():
+                self.poll()
+                self._stopped.wait(self.poll_interval)
+        finally:
+            self.shutdown()
+
+    def drain(self) -> list[int]:
+        """Разово отправляет всё, что подошло, и завершается."""
+        self.start()
+        try:
+            return self._dispatcher.dispatch_all()
+        finally:
+            self.shutdown()
+
+    def stop(self) -> None:
+        """Просит цикл `run` завершиться; безопасно из обработчика сигнала."""
+        self._stopped.set()
+
+    def shutdown(self) -> None:
+        """Дожидается отправляемых рассылок и удаляется из реестра."""
+        self._stopped.set()
+        self._dispatcher.shutdown()
+        self._heartbeat.join()
+        SenderWorker.objects.filter(pk=self.worker.pk).delete()
+
+    def _beat(self) -> None:
+        """Подаёт сигнал жизни, пока отправитель не остановлен."""
+        try:
+            while not self._stopped.wait(self.heartbeat_interval):
+                lease_until = timezone.now() + timezone.timedelta(
+                    seconds=self.lease_timeout
+                )
+                if not SenderWorker.objects.heartbeat(
+                    self.worker, lease_until
+                ):
+                    logger.error(
+                        "Отправитель %s удалён из реестра, остановка",
+                        self.worker.name,
+                    )
+                    self._stopped.set()
+        finally:
+            close_old_connections()
@@ -76,6 +76,11 @@ mailings_urls = [
         views.MailingDetailView.as_view(),
         name="mailing_detail",
     ),
+    path(
+        "<int:pk>/progress/",
+        views.MailingProgressView.as_view(),
+        name="mailing_progress",
+    ),
     path(
         "<int:pk>/update/",
         views.MailingUpdateView.as_view(),
@@ -93,6 +98,14 @@ mailings_urls = [
     ),
 ]
 
+owners_urls = [
+    path(
+        "<int:owner_pk>/share/",
+        views.OwnerShareUpdateView.as_view(),
+        name="owner_share",
+    ),
+]
+
 attempts_urls = [
     path(
         "",
@@ -101,9 +114,24 @@ attempts_urls = [
     ),
 ]
 
+metrics_urls = [
+    path(
+        "rate-limits/",
+        views.RateLimitMetricsView.as_view(),
+        name="rate_limit_metrics",
+    ),
+    path(
+        "lanes/",
+        views.LaneMetricsView.as_view(),
+        name="lane_metrics",
+    ),
+]
+
 urlpatterns = [
     path("recipients/", include(recipients_urls)),
     path("messages/", include(messages_urls)),
     path("mailings/", include(mailings_urls)),
+    path("owners/", include(owners_urls)),
     path("attempts/", include(attempts_urls)),
+    path("metrics/", include(metrics_urls)),
 ]
@@ -1,5 +1,7 @@
 from typing import Any
 
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
@@ -8,6 +10,8 @@ from django.http import (
     HttpResponse,
     HttpResponsePermanentRedirect,
     HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
 )
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
@@ -20,9 +24,20 @@ from django.views.generic import (
     UpdateView,
 )
 
-from mailings.constants import DEFAULT_PAGE_SIZE, MailingStatus
-from mailings.forms import MailingForm
-from mailings.models import Mailing, MailingAttempt, Message, Recipient
+from mailings.constants import DEFAULT_PAGE_SIZE, JobKind, MailingStatus
+from mailings.forms import MailingForm, OwnerShareForm
+from mailings.lanes import get_queue_depths
+from mailings.models import (
+    Job,
+    LaneSlot,
+    Mailing,
+    MailingAttempt,
+    Message,
+    OwnerShare,
+    RateLimitBucket,
+    Recipient,
+)
+from mailings.progress import stream_progress
 from utils import is_manager
 
 
@@ -195,7 +210,9 @@ class MailingDetailView(LoginRequiredMixin, DetailView):
     context_object_name = "mailing"
 
     def get_queryset(self) -> QuerySet:
-        return Mailing.objects.for_user(self.request.user)
+        return Mailing.objects.for_user(self.request.user).select_related(
+            "owner", "message"
+        )
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         """Добавление пагинации для получателей в контекст."""
@@ -211,14 +228,20 @@ class MailingDetailView(LoginRequiredMixin, DetailView):
         context["recipients_page"] = recipients_page
         context["is_paginated"] = recipients_page.has_other_pages()
         context["is_manager"] = is_manager(self.request.user)
+        context["job"] = self.object.jobs.first()
 
         return context
 
     def post(self, request, *args, **kwargs) -> HttpResponseRedirect:
-        """Обработка отправки рассылки."""
+        """
+        Ставит рассылку в очередь на отправку.
+
+        Рассылку отправляет обработчик очереди (`run_workers`), поэтому
+        запрос не ждёт окончания отправки.
+        """
         mailing = self.get_object()
         if mailing.status == MailingStatus.CREATED:
-            mailing.send_mailing()
+            Job.objects.enqueue(JobKind.SEND_MAILING, mailing)
 
         return HttpResponseRedirect(self.get_success_url())
 
@@ -229,6 +252,31 @@ class MailingDetailView(LoginRequiredMixin, DetailView):
         )
 
 
+class MailingProgressView(View):
+    """
+    Прогресс отправки рассылки потоком server-sent events.
+
+    Асинхронный: соединение держится без занятого потока только
+    под ASGI-сервером (`mail_pulse.asgi`).
+    """
+
+    @staticmethod
+    def _check_access(request, pk: int) -> None:
+        if not request.user.is_authenticated:
+            raise PermissionDenied("Требуется вход")
+        get_object_or_404(Mailing.objects.for_user(request.user), pk=pk)
+
+    async def get(self, request, pk: int) -> StreamingHttpResponse:
+        await sync_to_async(self._check_access)(request, pk)
+
+        response = StreamingHttpResponse(
+            stream_progress(pk), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
 class MailingCreateView(LoginRequiredMixin, CreateView):
     """Создание новой рассылки."""
 
@@ -300,7 +348,7 @@ class MailingAttemptListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         return MailingAttempt.objects.filter(
-            mailing__owner=self.request.user,
+            owner=self.request.user,
         )
 
 
@@ -342,3 +390,58 @@ class DisableMailingView(LoginRequiredMixin, View):
                 "HTTP_REFERER", reverse_lazy("mailings:mailing_list")
             )
         )
+
+
+class OwnerShareUpdateView(LoginRequiredMixin, UpdateView):
+    """Настройка доли владельца в отправке рассылок."""
+
+    model = OwnerShare
+    form_class = OwnerShareForm
+    template_name = "mailings/owner_share_form.html"
+    success_url = reverse_lazy("mailings:mailing_list")
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not is_manager(request.user):
+            raise PermissionDenied(
+                "Только менеджеры могут настраивать доли отправки"
+            )
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_object(self, queryset=None) -> OwnerShare:
+        owner = get_object_or_404(get_user_model(), pk=self.kwargs["owner_pk"])
+        try:
+            return owner.mailing_share
+        except OwnerShare.DoesNotExist:
+            return OwnerShare(owner=owner)
+
+
+class RateLimitMetricsView(LoginRequiredMixin, View):
+    """Метрики общих для отправителей ограничений скорости в формате JSON."""
+
+    def get(self, request) -> JsonResponse:
+        if not is_manager(request.user):
+            raise PermissionDenied("Только менеджеры могут смотреть метрики")
+
+        return JsonResponse(
+            {"rate_limits": RateLimitBucket.objects.get_metrics()}
+        )
+
+
+class LaneMetricsView(LoginRequiredMixin, View):
+    """
+    Глубина очередей полос доставки и занятость их мест в формате JSON.
+
+    Места соединений общие для всех процессов, поэтому видна занятость
+    полос отправителей, а не только веб-процесса.
+    """
+
+    def get(self, request) -> JsonResponse:
+        if not is_manager(request.user):
+            raise PermissionDenied("Только менеджеры могут смотреть метрики")
+
+        return JsonResponse(
+            {
+                "queues": get_queue_depths(),
+                "smtp_lanes": LaneSlot.objects.get_metrics(),
+            }
+        )
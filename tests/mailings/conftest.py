@@ -1,6 +1,7 @@
 import pytest
 from django.utils import timezone
 
+from mailings.delivery.sink import BackgroundSMTPSink
 from mailings.models import Message, Recipient
 
 
@@ -69,3 +70,14 @@ def mailing_data(message, recipient):
         "message": message.pk,
         "recipients": [recipient.pk],
     }
+
+
+@pytest.fixture
+def smtp_sink():
+    """Запускает SMTPSink в отдельном потоке; письма сохраняются."""
+    with BackgroundSMTPSink() as background:
+
+        def _start(**kwargs):
+            return background.start(keep_messages=True, **kwargs)
+
+        yield _start
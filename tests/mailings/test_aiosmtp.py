@@ -0,0 +1,253 @@
+import asyncio
+import shutil
+import ssl
+import subprocess
+from smtplib import SMTPRecipientsRefused
+
+import pytest
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+from mailings.constants import AttemptStatus, DeliveryEngine, MailingStatus
+from mailings.delivery import (
+    AsyncDelivery,
+    AsyncSMTPClient,
+    GroupEmailMessage,
+    MessagePayload,
+)
+from mailings.delivery.aiosmtp import quote_data
+from mailings.delivery.connection import get_results
+from mailings.models import Mailing, MailingAttempt, Recipient
+
+
+def make_client(port, **kwargs):
+    return AsyncSMTPClient("127.0.0.1", port, timeout=5, **kwargs)
+
+
+def make_messages(count):
+    return [
+        EmailMessage(
+            subject="Тема",
+            body="Текст",
+            from_email="sender@example.com",
+            to=[f"user{index}@example.com"],
+        )
+        for index in range(count)
+    ]
+
+
+def test_quote_data():
+    """Строки приводятся к CRLF, точки в начале строк экранируются."""
+    assert quote_data(b"a\n.b\r\nc") == b"a\r\n..b\r\nc\r\n.\r\n"
+
+
+class TestAsyncSMTPClient:
+
+    def test_sendmail(self, smtp_sink):
+        """Письмо доставляется через pipelined-транзакцию."""
+        server = smtp_sink()
+
+        async def send():
+            async with make_client(server.port, username="u", password="p"):
+                pass
+            async with make_client(server.port) as client:
+                assert "pipelining" in client.extensions
+                return await client.sendmail(
+                    "from@example.com",
+                    ["to@example.com"],
+                    b"Subject: Test\r\n\r\n.hidden",
+                )
+
+        refused = asyncio.run(send())
+
+        assert refused == {}
+        assert server.messages == [
+            (
+                "from@example.com",
+                ["to@example.com"],
+                b"Subject: Test\r\n\r\n.hidden\r\n",
+            )
+        ]
+
+    def test_refused_recipients(self, smtp_sink):
+        """Отклонённые получатели возвращаются, а если все — ошибка."""
+        server = smtp_sink(rejected={"bad@example.com"})
+
+        async def send():
+            async with make_client(server.port) as client:
+                refused = await client.sendmail(
+                    "from@example.com",
+                    ["bad@example.com", "good@example.com"],
+                    b"Subject: Test\r\n\r\nBody",
+                )
+                with pytest.raises(SMTPRecipientsRefused):
+                    await client.sendmail(
+                        "from@example.com",
+                        ["bad@example.com"],
+                        b"Subject: Test\r\n\r\nBody",
+                    )
+                return refused
+
+        refused = asyncio.run(send())
+
+        assert list(refused) == ["bad@example.com"]
+        assert server.messages[0][1] == ["good@example.com"]
+
+    def test_display_names_stay_out_of_envelope(self, smtp_sink):
+        """В MAIL FROM и RCPT TO уходят адреса без отображаемых имён."""
+        server = smtp_sink(rejected={"bad@example.com"})
+        message = EmailMessage(
+            "Тема",
+            "Текст",
+            "Рассылка <from@example.com>",
+            ["Иван <good@example.com>", "Пётр <bad@example.com>"],
+        )
+
+        async def send():
+            async with make_client(server.port) as client:
+                return await client.send_message(message)
+
+        refused = asyncio.run(send())
+
+        assert list(refused) == ["bad@example.com"]
+        assert server.messages[0][:2] == (
+            "from@example.com",
+            ["good@example.com"],
+        )
+        assert [
+            (result.recipient, result.success)
+            for result in get_results(message, refused)
+        ] == [
+            ("Иван <good@example.com>", True),
+            ("Пётр <bad@example.com>", False),
+        ]
+
+    @pytest.mark.skipif(not shutil.which("openssl"), reason="нет openssl")
+    def test_starttls(self, smtp_sink, tmp_path):
+        """Сессия переходит на TLS по команде STARTTLS."""
+        cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+        subprocess.run(
+            [
+                "openssl",
+                "req",
+                "-x509",
+                "-newkey",
+                "rsa:2048",
+                "-nodes",
+                "-days",
+                "1",
+                "-subj",
+                "/CN=localhost",
+                "-keyout",
+                str(key),
+                "-out",
+                str(cert),
+            ],
+            check=True,
+            capture_output=True,
+        )
+        server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        server_context.load_cert_chain(cert, key)
+        client_context = ssl.create_default_context(cafile=str(cert))
+        client_context.check_hostname = False
+        server = smtp_sink(ssl_context=server_context)
+
+        async def send():
+            client = make_client(
+                server.port, use_tls=True, ssl_context=client_context
+            )
+            async with client:
+                await client.sendmail(
+                    "from@example.com", ["to@example.com"], b"Body"
+                )
+
+        asyncio.run(send())
+
+        assert len(server.messages) == 1
+
+
+class TestAsyncDelivery:
+
+    def test_bounded_sessions(self, smtp_sink):
+        """Письма уходят не более чем в `sessions` параллельных сессиях."""
+        server = smtp_sink(rejected={"user3@example.com"})
+        delivery = AsyncDelivery(
+            sessions=3,
+            max_messages=4,
+            client_factory=lambda: make_client(server.port),
+        )
+
+        async def send():
+            return [
+                result async for result in delivery.asend(make_messages(20))
+            ]
+
+        results = asyncio.run(send())
+
+        assert len(results) == 20
+        assert [
+            result.recipient for result in results if not result.success
+        ] == ["user3@example.com"]
+        assert len(server.messages) == 19
+        assert server.stats.max_active_sessions <= 3
+        assert server.stats.sessions >= 5
+
+    def test_group_message_refused(self, smtp_sink):
+        """Если группа отклонена целиком, результат есть по каждому адресу."""
+        server = smtp_sink(rejected={"a@example.com", "b@example.com"})
+        message = GroupEmailMessage(
+            MessagePayload("Тема", "Текст", "sender@example.com"),
+            ["a@example.com", "b@example.com"],
+        )
+
+        async def send():
+            delivery = AsyncDelivery(
+                sessions=1, client_factory=lambda: make_client(server.port)
+            )
+            return [result async for result in delivery.asend([message])]
+
+        results = asyncio.run(send())
+
+        assert [(r.recipient, r.success) for r in results] == [
+            ("a@example.com", False),
+            ("b@example.com", False),
+        ]
+        assert server.messages == []
+
+
+@pytest.mark.django_db
+def test_send_mailing_async_engine(smtp_sink, settings, user, message):
+    """Рассылка отправляется асинхронным движком, выбранным в настройках."""
+    server = smtp_sink()
+    settings.MAILING_DELIVERY_ENGINE = DeliveryEngine.ASYNC
+    settings.EMAIL_HOST = "127.0.0.1"
+    settings.EMAIL_PORT = server.port
+    settings.EMAIL_USE_SSL = False
+    settings.EMAIL_HOST_PASSWORD = ""
+    mailing = Mailing.objects.create(
+        start_time=timezone.now(),
+        end_time=timezone.now() + timezone.timedelta(days=1),
+        message=message,
+        owner=user,
+    )
+    mailing.recipients.set(
+        Recipient.objects.create(
+            email=f"recipient{index}@example.com",
+            last_name="Иванов",
+            first_name="Иван",
+            owner=user,
+        )
+        for index in range(5)
+    )
+
+    mailing.send_mailing()
+    mailing.refresh_from_db()
+
+    assert mailing.status == MailingStatus.COMPLETED
+    assert len(server.messages) == 5
+    assert (
+        MailingAttempt.objects.filter(
+            mailing=mailing, status=AttemptStatus.SUCCESS
+        ).count()
+        == 5
+    )
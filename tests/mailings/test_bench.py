@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from mailings.bench import find_regressions, percentile, run_benchmark
+
+BASELINE = Path(__file__).with_name("bench_baseline.json")
+
+
+def test_percentile():
+    """Перцентили считаются по всем значениям."""
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 50) == pytest.approx(50.5)
+    assert percentile(values, 99) == pytest.approx(99.01)
+    assert percentile([], 99) == 0.0
+
+
+def test_find_regressions():
+    """Регрессией считается ухудшение метрики больше допуска."""
+    baseline = {
+        "smtp": {
+            "recipients": 100,
+            "messages_per_second": 100.0,
+            "p99_ms": 10.0,
+        }
+    }
+    result = {"backend": "smtp", "recipients": 100, "queries": 30}
+
+    assert not find_regressions(
+        {"smtp": {**result, "messages_per_second": 85.0, "p99_ms": 11.0}},
+        baseline,
+        tolerance=0.2,
+    )
+    assert find_regressions(
+        {"smtp": {**result, "messages_per_second": 70.0, "p99_ms": 13.0}},
+        baseline,
+        tolerance=0.2,
+    ) == [
+        "smtp.messages_per_second: 70.0 (база 100.0)",
+        "smtp.p99_ms: 13.0 (база 10.0)",
+    ]
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+@pytest.mark.parametrize("backend", ["locmem", "smtp"])
+def test_send_benchmark(backend):
+    """Все письма отправляются, метрики заполнены."""
+    result = run_benchmark(200, backend)
+
+    assert result.sent == 200
+    assert result.messages_per_second > 0
+    assert 0 < result.p50_ms <= result.p99_ms
+    assert result.queries > 0
+    assert result.peak_memory_kb > 0
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_bench_send_against_baseline(tmp_path):
+    """Команда пишет JSON и сверяет число запросов с базовым."""
+    output = tmp_path / "bench.json"
+
+    call_command(
+        "bench_send",
+        recipients=200,
+        output=output,
+        baseline=BASELINE,
+    )
+
+    assert set(json.loads(output.read_text())) == {"locmem", "smtp"}
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_bench_send_detects_regression(tmp_path):
+    """Ухудшение относительно базовых результатов — ошибка команды."""
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"locmem": {"queries": 1}}))
+
+    with pytest.raises(CommandError, match="locmem.queries"):
+        call_command(
+            "bench_send",
+            recipients=50,
+            backend=["locmem"],
+            baseline=baseline,
+        )
@@ -0,0 +1,195 @@
+from smtplib import SMTPRecipientsRefused, SMTPServerDisconnected
+
+from django.core import mail
+from django.core.mail import EmailMessage, get_connection
+
+from mailings.delivery import (
+    ConnectionDelivery,
+    GroupEmailMessage,
+    MessagePayload,
+    ThreadPoolDelivery,
+)
+from mailings.delivery import connection as connection_module
+from mailings.delivery import get_delivery
+
+
+def send_with_outcomes(*outcomes):
+    """
+    Имитирует `send_messages`, который отправляет письма по порядку.
+
+    Каждое отданное письмо забирает следующий исход: ошибка выбрасывается,
+    остальные письма считаются отправленными.
+    """
+    outcomes = list(outcomes)
+
+    def send_messages(messages):
+        for sent, _ in enumerate(messages):
+            if error := outcomes.pop(0):
+                raise error
+        return sent + 1
+
+    return send_messages
+
+
+def make_messages(count: int) -> list[EmailMessage]:
+    return [
+        EmailMessage(
+            subject="Тема",
+            body="Текст",
+            from_email="sender@example.com",
+            to=[f"user{index}@example.com"],
+        )
+        for index in range(count)
+    ]
+
+
+class TestConnectionDelivery:
+
+    def test_send_through_single_connection(self, mocker):
+        """Все письма отправляются через одно открытое соединение."""
+        get_connection = mocker.spy(connection_module, "get_connection")
+
+        with ConnectionDelivery(batch_size=2) as delivery:
+            results = list(delivery.send(make_messages(5)))
+
+        assert get_connection.call_count == 1
+        assert len(mail.outbox) == 5
+        assert all(result.success for result in results)
+        assert [result.recipient for result in results] == [
+            f"user{index}@example.com" for index in range(5)
+        ]
+
+    def test_reconnect_after_max_messages(self, mocker):
+        """Соединение переоткрывается после max_messages писем."""
+        connection = mocker.MagicMock()
+
+        with ConnectionDelivery(
+            batch_size=10, max_messages=2, connection=connection
+        ) as delivery:
+            list(delivery.send(make_messages(5)))
+
+        assert connection.open.call_count == 3
+        assert connection.send_messages.call_count == 3
+
+    def test_batch_in_one_call(self, mocker):
+        """Пачка писем передаётся бэкенду одним вызовом."""
+        connection = mocker.MagicMock()
+        connection.send_messages.side_effect = send_with_outcomes(*[None] * 5)
+
+        with ConnectionDelivery(
+            batch_size=5, connection=connection
+        ) as delivery:
+            results = list(delivery.send(make_messages(5)))
+
+        assert connection.send_messages.call_count == 1
+        assert all(result.success for result in results)
+
+    def test_reconnect_on_dropped_session(self, mocker):
+        """При обрыве сессии письмо отправляется повторно."""
+        connection = mocker.MagicMock()
+        connection.send_messages.side_effect = send_with_outcomes(
+            None,
+            SMTPServerDisconnected("Connection unexpectedly closed"),
+            None,
+        )
+
+        with ConnectionDelivery(connection=connection) as delivery:
+            results = list(delivery.send(make_messages(2)))
+
+        assert all(result.success for result in results)
+        assert connection.open.call_count == 2
+
+    def test_per_message_failure(self, mocker):
+        """Ошибка одного письма не влияет на результат остальных."""
+        connection = mocker.MagicMock()
+        connection.send_messages.side_effect = send_with_outcomes(
+            None,
+            SMTPRecipientsRefused({"user1@example.com": (550, b"No user")}),
+            None,
+        )
+
+        with ConnectionDelivery(connection=connection) as delivery:
+            results = list(delivery.send(make_messages(3)))
+
+        assert [result.success for result in results] == [True, False, True]
+        assert results[1].response.startswith("Ошибка отправки")
+
+    def test_open_failure_is_transient(self, mocker):
+        """Если соединение не открылось, письма вернутся в очередь повторов."""
+        connection = mocker.MagicMock()
+        connection.open.side_effect = ConnectionRefusedError("Refused")
+
+        with ConnectionDelivery(connection=connection) as delivery:
+            results = list(delivery.send(make_messages(2)))
+
+        assert [
+            (result.recipient, result.success, result.transient)
+            for result in results
+        ] == [
+            ("user0@example.com", False, True),
+            ("user1@example.com", False, True),
+        ]
+        connection.send_messages.assert_not_called()
+
+    def test_group_message_per_recipient_results(self, smtp_sink):
+        """Письмо группе уходит одной транзакцией, отказы RCPT по адресам."""
+        server = smtp_sink(rejected={"bad@example.com"})
+        connection = get_connection(
+            "django.core.mail.backends.smtp.EmailBackend",
+            host="127.0.0.1",
+            port=server.port,
+            timeout=5,
+        )
+        message = GroupEmailMessage(
+            MessagePayload("Тема", "Текст", "sender@example.com"),
+            ["good@example.com", "bad@example.com", "other@example.com"],
+        )
+
+        with ConnectionDelivery(connection=connection) as delivery:
+            results = list(delivery.send([message]))
+
+        assert len(server.messages) == 1
+        assert server.messages[0][1] == [
+            "good@example.com",
+            "other@example.com",
+        ]
+        assert {result.recipient: result.success for result in results} == {
+            "good@example.com": True,
+            "bad@example.com": False,
+            "other@example.com": True,
+        }
+        assert not results[1].transient
+
+
+class TestThreadPoolDelivery:
+
+    def test_send_in_parallel(self, mocker):
+        """Каждый поток использует своё соединение, все письма доставлены."""
+        get_connection = mocker.spy(connection_module, "get_connection")
+
+        with ThreadPoolDelivery(workers=3, batch_size=2) as delivery:
+            results = list(delivery.send(make_messages(20)))
+
+        assert len(results) == 20
+        assert all(result.success for result in results)
+        assert {result.recipient for result in results} == {
+            f"user{index}@example.com" for index in range(20)
+        }
+        assert 1 <= get_connection.call_count <= 3
+        assert len(mail.outbox) == 20
+
+    def test_connections_closed(self, mocker):
+        """После завершения все соединения потоков закрываются."""
+        close = mocker.spy(ConnectionDelivery, "close")
+
+        with ThreadPoolDelivery(workers=2, batch_size=1) as delivery:
+            list(delivery.send(make_messages(4)))
+            opened = len(delivery._deliveries)
+
+        assert close.call_count == opened
+
+
+def test_get_delivery_by_workers():
+    """Число потоков определяет способ доставки."""
+    assert isinstance(get_delivery(1), ConnectionDelivery)
+    assert isinstance(get_delivery(4), ThreadPoolDelivery)
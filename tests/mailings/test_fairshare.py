@@ -0,0 +1,191 @@
+from collections import Counter
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from mailings.constants import MailingStatus
+from mailings.fairshare import FairScheduler
+from mailings.models import Mailing, OutboxEntry, OwnerShare, Recipient
+from mailings.scheduler import MailingDispatcher
+
+QUANTUM = 100
+
+
+def simulate(mailings, arrivals, slots, ticks, weights=None, caps=None):
+    """
+    Моделирует отправку частей рассылок по тактам.
+
+    `mailings` — число частей каждой рассылки `(владелец, рассылка)`,
+    `arrivals` — такт появления рассылки (по умолчанию 0). Каждая часть
+    отправляется за один такт. Возвращает такты запуска частей.
+    """
+    scheduler = FairScheduler(QUANTUM)
+    remaining = dict(mailings)
+    started: dict[tuple[int, int], list[int]] = {key: [] for key in mailings}
+
+    for tick in range(ticks):
+        ready: dict[int, list[int]] = {}
+        for (owner, mailing), left in remaining.items():
+            if left and arrivals.get((owner, mailing), 0) <= tick:
+                ready.setdefault(owner, []).append(mailing)
+
+        picked = scheduler.select(ready, slots, weights, caps)
+        for mailing, owner in picked:
+            started[owner, mailing].append(tick)
+            remaining[owner, mailing] -= 1
+        for _, owner in picked:
+            scheduler.finish(owner, QUANTUM)
+
+    return started
+
+
+class TestFairScheduler:
+
+    def test_small_owners_wait_one_round(self):
+        """Пока огромный владелец отправляет, небольшие ждут не дольше круга."""
+        huge = {(1, mailing): 50 for mailing in range(10)}
+        small = {(owner, 100 + owner): 1 for owner in range(2, 6)}
+
+        started = simulate(
+            {**huge, **small},
+            arrivals={key: 20 for key in small},
+            slots=4,
+            ticks=40,
+        )
+
+        assert all(started[key][0] <= 21 for key in small)
+        assert all(started[key] == [] or started[key][0] < 20 for key in huge)
+        assert sum(len(started[key]) for key in huge) == 40 * 4 - 4
+
+    def test_weights(self):
+        """Отправка делится пропорционально весам владельцев."""
+        started = simulate(
+            {(1, 1): 1000, (1, 2): 1000, (2, 3): 1000, (2, 4): 1000},
+            arrivals={},
+            slots=2,
+            ticks=60,
+            weights={1: 3, 2: 1},
+        )
+        per_owner = Counter()
+        for (owner, _), ticks in started.items():
+            per_owner[owner] += len(ticks)
+
+        assert per_owner == {1: 90, 2: 30}
+
+    def test_caps(self):
+        """Владелец отправляет не больше `caps[owner]` частей сразу."""
+        scheduler = FairScheduler(QUANTUM)
+
+        picked = scheduler.select({1: [1, 2, 3], 2: [4]}, 4, caps={1: 1})
+
+        assert sorted(picked) == [(1, 1), (4, 2)]
+        assert scheduler.get_metrics() == {
+            1: {"deficit": 0, "running": 1},
+            2: {"deficit": 0, "running": 1},
+        }
+
+
+@pytest.mark.django_db
+def test_get_shares_defaults(settings, user, manager):
+    """Владельцу без настроек достаются вес 1 и общее ограничение."""
+    settings.MAILING_FAIR_OWNER_CONCURRENCY = 2
+    OwnerShare.objects.create(owner=manager, weight=3, max_concurrent=5)
+
+    weights, caps = OwnerShare.objects.get_shares([user.pk, manager.pk])
+
+    assert weights == {user.pk: 1, manager.pk: 3}
+    assert caps == {user.pk: 2, manager.pk: 5}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_dispatcher_sends_mailing_in_parts(
+    settings, user, message, mailoutbox, mocker
+):
+    """
+    Планировщик отправляет рассылку частями по `MAILING_FAIR_QUANTUM`,
+    запуская следующую часть сразу, как освободится место.
+    """
+    settings.MAILING_FAIR_QUANTUM = 2
+    settings.MAILING_SEND_BATCH_SIZE = 2
+    mailing = Mailing.objects.create(
+        start_time=timezone.now() - timezone.timedelta(minutes=1),
+        end_time=timezone.now() + timezone.timedelta(days=1),
+        message=message,
+        owner=user,
+    )
+    mailing.recipients.set(
+        Recipient.objects.create(
+            email=f"recipient{index}@example.com",
+            last_name="Иванов",
+            first_name="Иван",
+            owner=user,
+        )
+        for index in range(5)
+    )
+    send = mocker.spy(Mailing, "send_mailing")
+    dispatcher = MailingDispatcher(max_concurrent=1)
+
+    assert dispatcher.dispatch_due() == [mailing.pk]
+
+    dispatcher.wait()
+    dispatcher.shutdown()
+
+    assert len(mailoutbox) == 5
+    assert [call.kwargs["limit"] for call in send.call_args_list] == [2] * 3
+    assert dispatcher.dispatch_due() == []
+
+
+@pytest.mark.django_db
+def test_part_does_not_complete_partly_queued_mailing(
+    user, message, mailoutbox
+):
+    """Рассылка, очередь которой дописана не до конца, не завершается."""
+    mailing = Mailing.objects.create(
+        start_time=timezone.now() - timezone.timedelta(minutes=1),
+        end_time=timezone.now() + timezone.timedelta(days=1),
+        message=message,
+        owner=user,
+    )
+    recipients = [
+        Recipient.objects.create(
+            email=f"recipient{index}@example.com",
+            last_name="Иванов",
+            first_name="Иван",
+            owner=user,
+        )
+        for index in range(5)
+    ]
+    mailing.recipients.set(recipients)
+    OutboxEntry.objects.bulk_create(
+        OutboxEntry(mailing=mailing, recipient=recipient)
+        for recipient in recipients[:2]
+    )
+
+    mailing.send_mailing(limit=10)
+    mailing.refresh_from_db()
+
+    assert mailing.status == MailingStatus.RUNNING
+
+    mailing.send_mailing(limit=10)
+    mailing.refresh_from_db()
+
+    assert mailing.status == MailingStatus.COMPLETED
+    assert len(mailoutbox) == 5
+
+
+@pytest.mark.django_db
+def test_owner_share_view(client, user, manager):
+    """Доли владельцев настраивают только менеджеры."""
+    url = reverse("mailings:owner_share", kwargs={"owner_pk": user.pk})
+
+    client.login(email="user@example.com", password="pass123")
+
+    assert client.get(url).status_code == HTTPStatus.FORBIDDEN
+
+    client.login(email="manager@example.com", password="manager123")
+    response = client.post(url, {"weight": 4, "max_concurrent": ""})
+
+    assert response.status_code == HTTPStatus.FOUND
+    assert OwnerShare.objects.get(owner=user).weight == 4
@@ -0,0 +1,115 @@
+import re
+
+import pytest
+from django.db import connection
+
+from mailings.constants import OutboxStatus
+from mailings.models import (
+    Mailing,
+    MailingAttempt,
+    Message,
+    OutboxEntry,
+    Recipient,
+)
+
+SQLITE_FULL_SCAN_RE = re.compile(r"\bSCAN (\w+)(?! USING)")
+
+
+def explain(queryset) -> str:
+    """
+    Возвращает план запроса первой страницы списка.
+
+    На PostgreSQL последовательное чтение отключается: на почти пустых
+    таблицах планировщик выбрал бы его при любых индексах.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset[:20].explain()
+
+
+def assert_uses_index(plan: str, table: str, index: str | None) -> None:
+    """Таблица читается по индексу `index` (любому, если None)."""
+    assert index is None or index in plan, plan
+
+    if connection.vendor == "sqlite":
+        assert table not in SQLITE_FULL_SCAN_RE.findall(plan), plan
+    elif connection.vendor == "postgresql":
+        assert f"Seq Scan on {table}" not in plan, plan
+
+
+def assert_no_sort(plan: str) -> None:
+    """Порядок строк даёт индекс, сортировки в памяти нет."""
+    if connection.vendor == "sqlite":
+        assert "TEMP B-TREE FOR ORDER BY" not in plan, plan
+    elif connection.vendor == "postgresql":
+        assert "Sort" not in plan, plan
+
+
+@pytest.mark.django_db
+class TestQueryPlans:
+
+    @pytest.mark.parametrize(
+        ("model", "table", "owner_index", "index"),
+        [
+            (
+                Recipient,
+                "mailings_recipient",
+                "recipient_owner_name_idx",
+                "recipient_name_idx",
+            ),
+            (
+                Message,
+                "mailings_message",
+                "message_owner_subject_idx",
+                "message_subject_idx",
+            ),
+            (
+                Mailing,
+                "mailings_mailing",
+                "mailing_owner_start_idx",
+                "mailing_start_idx",
+            ),
+        ],
+    )
+    def test_owner_lists(
+        self, user, manager, model, table, owner_index, index
+    ):
+        """Списки владельца и менеджера читаются по индексу без сортировки."""
+        plan = explain(model.objects.for_user(user))
+        assert_uses_index(plan, table, owner_index)
+        assert_no_sort(plan)
+
+        plan = explain(model.objects.for_user(manager))
+        assert_uses_index(plan, table, index)
+        assert_no_sort(plan)
+
+    def test_due_mailings(self):
+        """Подошедшие рассылки ищутся по индексу статуса и времени."""
+        plan = explain(Mailing.objects.due())
+
+        assert_uses_index(plan, "mailings_mailing", "mailing_due_idx")
+
+    def test_mailing_attempts(self, user):
+        """Попытки владельца читаются по индексу без сортировки."""
+        plan = explain(MailingAttempt.objects.filter(owner=user))
+
+        assert_uses_index(
+            plan, "mailings_mailingattempt", "attempt_owner_time_idx"
+        )
+        assert_no_sort(plan)
+
+    def test_outbox_batch(self):
+        """Пачка очереди выбирается по индексу в порядке pk."""
+        plan = explain(
+            OutboxEntry.objects.filter(
+                mailing_id=1,
+                status=OutboxStatus.PENDING,
+                pk__gt=0,
+            ).order_by("pk")
+        )
+
+        assert_uses_index(
+            plan, "mailings_outboxentry", "outbox_mailing_status_idx"
+        )
+        assert_no_sort(plan)
@@ -5,7 +5,8 @@ from django.urls import reverse
 from django.utils import timezone
 
 from mailings.constants import MailingStatus
-from mailings.models import Mailing, MailingAttempt
+from mailings.jobs import run_job
+from mailings.models import Job, Mailing, MailingAttempt
 
 
 @pytest.mark.django_db
@@ -58,6 +59,12 @@ class TestMailingIntegration:
 
         assert response.status_code == HTTPStatus.FOUND
 
+        [job] = Job.objects.claim(
+            None, timezone.now() + timezone.timedelta(minutes=1)
+        )
+
+        assert run_job(job)
+
         mailing.refresh_from_db()
 
         assert mailing.status == MailingStatus.COMPLETED
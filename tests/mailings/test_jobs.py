@@ -0,0 +1,156 @@
+import pytest
+from django.utils import timezone
+
+from mailings.constants import JobKind, JobStatus, MailingStatus
+from mailings.delivery import RetryPolicy
+from mailings.jobs import JobWorkerProcess, run_job
+from mailings.managers import CLAIMED_ERROR
+from mailings.models import Job, Mailing, SenderWorker
+
+
+@pytest.fixture
+def mailing(user, message, recipient):
+    """Рассылка, время отправки которой наступило."""
+    mailing = Mailing.objects.create(
+        start_time=timezone.now(),
+        end_time=timezone.now() + timezone.timedelta(days=1),
+        message=message,
+        owner=user,
+    )
+    mailing.recipients.add(recipient)
+    return mailing
+
+
+def in_seconds(seconds: float):
+    return timezone.now() + timezone.timedelta(seconds=seconds)
+
+
+@pytest.mark.django_db
+class TestJobQueue:
+
+    def test_enqueue_keeps_one_active_job(self, mailing):
+        """Повторная постановка возвращает невыполненную задачу."""
+        job = Job.objects.enqueue(JobKind.SEND_MAILING, mailing)
+
+        assert Job.objects.enqueue(JobKind.SEND_MAILING, mailing) == job
+
+        [claimed] = Job.objects.claim(None, in_seconds(60))
+        Job.objects.ack(claimed)
+
+        assert Job.objects.enqueue(JobKind.SEND_MAILING, mailing) != job
+        assert mailing.jobs.count() == 2
+
+    def test_claim_is_exclusive(self, mailing):
+        """Задача достаётся одному обработчику, отложенная — никому."""
+        sender = SenderWorker.objects.register()
+        job = Job.objects.enqueue(JobKind.SEND_MAILING, mailing)
+        Job.objects.create(
+            kind=JobKind.SEND_MAILING,
+            mailing=Mailing.objects.create(
+                start_time=mailing.start_time,
+                end_time=mailing.end_time,
+                message=mailing.message,
+                owner=mailing.owner,
+            ),
+            run_after=in_seconds(60),
+        )
+
+        [claimed] = Job.objects.claim(sender, in_seconds(60))
+
+        assert claimed.pk == job.pk
+        assert claimed.attempts == 1
+        assert claimed.locked_by == sender
+        assert Job.objects.claim(None, in_seconds(60)) == []
+
+    def test_expired_claim_is_taken_over(self, mailing):
+        """Брошенную задачу забирает другой, прежний её не подтвердит."""
+        Job.objects.enqueue(JobKind.SEND_MAILING, mailing)
+        [stale] = Job.objects.claim(None, in_seconds(-1))
+
+        [claimed] = Job.objects.claim(None, in_seconds(60))
+
+        assert claimed.attempts == 2
+        assert not Job.objects.ack(stale)
+        assert Job.objects.ack(claimed)
+        assert Job.objects.get().status == JobStatus.DONE
+
+    def test_failed_job_is_retried_then_dead(self, mailing):
+        """Упавшая задача повторяется, затем остаётся невыполненной."""
+        policy = RetryPolicy(max_attempts=2, base_delay=0, max_delay=0)
+        Job.objects.enqueue(JobKind.SEND_MAILING, mailing)
+
+        [job] = Job.objects.claim(None, in_seconds(60))
+        Job.objects.fail(job, "ошибка", policy)
+        [job] = Job.objects.claim(None, in_seconds(60))
+        Job.objects.fail(job, "снова ошибка", policy)
+        job.refresh_from_db()
+
+        assert job.status == JobStatus.DEAD
+        assert job.last_error == "снова ошибка"
+        assert Job.objects.claim(None, in_seconds(60)) == []
+
+        assert Job.objects.requeue(Job.objects.all()) == 1
+        job.refresh_from_db()
+        assert job.status == JobStatus.QUEUED
+        assert job.attempts == 0
+
+
+@pytest.mark.django_db
+class TestSendMailingJob:
+
+    def test_claimed_mailing_is_retried(self, mailing, mailoutbox):
+        """Задача рассылки, которую отправляет другой процесс, повторяется."""
+        policy = RetryPolicy(max_attempts=2, base_delay=0, max_delay=0)
+        other = SenderWorker.objects.register()
+        Mailing.objects.claim(mailing.pk, in_seconds(60), other)
+        Job.objects.enqueue(JobKind.SEND_MAILING, mailing)
+        [job] = Job.objects.claim(None, in_seconds(60))
+
+        assert not run_job(job, policy=policy)
+
+        job.refresh_from_db()
+        assert job.status == JobStatus.QUEUED
+        assert CLAIMED_ERROR in job.last_error
+        assert mailoutbox == []
+
+    def test_rejected_mailing_fails_with_reason(self, mailing, mailoutbox):
+        """Задача отключённой рассылки сразу не выполняется с причиной."""
+        policy = RetryPolicy(max_attempts=5, base_delay=0, max_delay=0)
+        Mailing.objects.filter(pk=mailing.pk).update(
+            status=MailingStatus.DISABLED
+        )
+        Job.objects.enqueue(JobKind.SEND_MAILING, mailing)
+        [job] = Job.objects.claim(None, in_seconds(60))
+
+        assert not run_job(job, policy=policy)
+
+        job.refresh_from_db()
+        assert job.status == JobStatus.DEAD
+        assert job.last_error == "Рассылка отключена менеджером"
+        assert job.finished_at is not None
+        assert mailoutbox == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_runs_send_jobs(mailing, mailoutbox, mocker):
+    """Обработчик отправляет рассылку и возвращает упавшую задачу."""
+    Job.objects.enqueue(JobKind.SEND_MAILING, mailing)
+
+    assert len(JobWorkerProcess(concurrency=1).drain()) == 1
+
+    mailing.refresh_from_db()
+    assert len(mailoutbox) == 1
+    assert mailing.status == MailingStatus.COMPLETED
+    assert mailing.jobs.get().status == JobStatus.DONE
+
+    mocker.patch.object(
+        Mailing, "send_mailing", side_effect=ConnectionError("нет связи")
+    )
+    job = Job.objects.enqueue(JobKind.SEND_MAILING, mailing)
+
+    JobWorkerProcess(concurrency=1).drain()
+    job.refresh_from_db()
+
+    assert job.status == JobStatus.QUEUED
+    assert job.run_after > timezone.now()
+    assert "нет связи" in job.last_error
@@ -0,0 +1,231 @@
+from http import HTTPStatus
+from smtplib import SMTP
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from mailings.constants import DeliveryEngine, JobKind, Lane
+from mailings.delivery import SMTPConnectionPool, smtp_pools
+from mailings.delivery.spool import (
+    ACK,
+    SpoolWriter,
+    encode_record,
+    read_records,
+)
+from mailings.jobs import send_mailing_job
+from mailings.lanes import get_queue_depths, shared_lane_slots
+from mailings.models import (
+    Job,
+    LaneSlot,
+    Mailing,
+    MailingProgress,
+    OutboxEntry,
+    Recipient,
+)
+
+
+@pytest.fixture
+def mailing(user, message, recipient):
+    """Рассылка, время отправки которой наступило."""
+    mailing = Mailing.objects.create(
+        start_time=timezone.now(),
+        end_time=timezone.now() + timezone.timedelta(days=1),
+        message=message,
+        owner=user,
+    )
+    mailing.recipients.add(recipient)
+    return mailing
+
+
+class TestLanePool:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker):
+        """Пул на три соединения, по одному закреплено за полосами."""
+        self._pool = SMTPConnectionPool(
+            mocker.Mock(side_effect=lambda: mocker.MagicMock(spec=SMTP)),
+            size=3,
+            timeout=0.05,
+            reserved={Lane.TRANSACTIONAL: 1, Lane.MANUAL: 1},
+        )
+
+    def test_reserved_connections(self):
+        """Рассылки не занимают места служебных писем и ручной отправки."""
+        bulk = self._pool.acquire(Lane.BULK)
+        with pytest.raises(TimeoutError):
+            self._pool.acquire(Lane.BULK)
+
+        self._pool.acquire(Lane.MANUAL)
+        with pytest.raises(TimeoutError):
+            self._pool.acquire(Lane.MANUAL)
+
+        self._pool.acquire(Lane.TRANSACTIONAL)
+        self._pool.release(bulk)
+
+        assert {
+            lane: metrics["in_use"]
+            for lane, metrics in self._pool.get_metrics()["lanes"].items()
+        } == {Lane.TRANSACTIONAL: 1, Lane.MANUAL: 1, Lane.BULK: 0}
+
+    def test_higher_lane_borrows_free_connections(self):
+        """Служебные письма занимают любое свободное место."""
+        for _ in range(3):
+            self._pool.acquire(Lane.TRANSACTIONAL)
+
+        assert self._pool.get_metrics()["open"] == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("engine", DeliveryEngine)
+def test_manual_send_uses_manual_lane(
+    settings, smtp_sink, mailing, mocker, engine
+):
+    """Ручная отправка любым движком берёт соединения своей полосы."""
+    server = smtp_sink()
+    settings.MAILING_DELIVERY_ENGINE = engine
+    settings.EMAIL_BACKEND = "mailings.delivery.pool.PooledEmailBackend"
+    settings.EMAIL_HOST = "127.0.0.1"
+    settings.EMAIL_PORT = server.port
+    settings.EMAIL_USE_SSL = False
+    acquire = mocker.spy(SMTPConnectionPool, "acquire")
+
+    send_mailing_job(Job.objects.enqueue(JobKind.SEND_MAILING, mailing), None)
+    smtp_pools.clear()
+
+    assert len(server.messages) == 1
+    assert {call.args[1] for call in acquire.call_args_list} == {Lane.MANUAL}
+
+
+@pytest.mark.django_db
+class TestQueueDepths:
+
+    def test_depth_per_lane(self, settings, tmp_path, mailing):
+        """Глубина очереди полосы — число её неотправленных писем."""
+        settings.MAILING_SPOOL_DIR = str(tmp_path)
+        writer = SpoolWriter(tmp_path)
+        writer.append(
+            [
+                encode_record("a@b.ru", [f"user{index}@b.ru"], b"Text")
+                for index in range(3)
+            ]
+        )
+        writer.close()
+        [segment] = tmp_path.glob("*.seg")
+        first_end, _ = next(read_records(segment))
+        segment.with_suffix(".ack").write_bytes(ACK.pack(first_end))
+        scheduled = Mailing.objects.create(
+            start_time=mailing.start_time,
+            end_time=mailing.end_time,
+            message=mailing.message,
+            owner=mailing.owner,
+        )
+        scheduled.recipients.set(
+            Recipient.objects.create(
+                email=f"recipient{index}@example.com",
+                last_name="Иванов",
+                first_name="Иван",
+                owner=mailing.owner,
+            )
+            for index in range(3)
+        )
+        OutboxEntry.objects.materialize(scheduled, batch_size=10)
+        MailingProgress.objects.add(scheduled.pk, sent=1)
+
+        Job.objects.enqueue(JobKind.SEND_MAILING, mailing)
+
+        assert list(Mailing.objects.scheduled()) == [scheduled]
+        assert get_queue_depths() == {
+            Lane.TRANSACTIONAL: 2,
+            Lane.MANUAL: 1,
+            Lane.BULK: 2,
+        }
+
+    def test_metrics_view(self, client, settings, tmp_path, user, manager):
+        """Метрики полос доступны только менеджерам."""
+        settings.MAILING_SPOOL_DIR = str(tmp_path)
+        url = reverse("mailings:lane_metrics")
+
+        client.login(email="user@example.com", password="pass123")
+
+        assert client.get(url).status_code == HTTPStatus.FORBIDDEN
+
+        client.login(email="manager@example.com", password="manager123")
+        response = client.get(url)
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["queues"] == {
+            "transactional": 0,
+            "manual": 0,
+            "bulk": 0,
+        }
+        assert response.json()["smtp_lanes"] == []
+
+
+@pytest.mark.django_db
+class TestLaneSlots:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker, settings):
+        """Три общих места, по одному закреплено за полосами."""
+        settings.MAILING_SMTP_LANE_SLOTS = 3
+        settings.MAILING_SMTP_POOL_RESERVED_TRANSACTIONAL = 1
+        settings.MAILING_SMTP_POOL_RESERVED_MANUAL = 1
+        self._pools = [
+            SMTPConnectionPool(
+                mocker.Mock(side_effect=lambda: mocker.MagicMock(spec=SMTP)),
+                size=3,
+                timeout=0.05,
+                slots=LaneSlot.objects,
+                server="smtp.example.com:25",
+            )
+            for _ in range(2)
+        ]
+
+    def test_pools_share_reservations(self):
+        """Пулы разных процессов делят места полос через базу."""
+        first, second = self._pools
+        bulk = first.acquire(Lane.BULK)
+
+        with pytest.raises(TimeoutError):
+            second.acquire(Lane.BULK)
+
+        second.acquire(Lane.MANUAL)
+        with pytest.raises(TimeoutError):
+            second.acquire(Lane.MANUAL)
+
+        second.acquire(Lane.TRANSACTIONAL)
+        first.release(bulk)
+
+        assert LaneSlot.objects.get_metrics() == [
+            {
+                "server": "smtp.example.com:25",
+                "size": 3,
+                "lanes": {
+                    Lane.TRANSACTIONAL: {"limit": 3, "in_use": 1},
+                    Lane.MANUAL: {"limit": 2, "in_use": 1},
+                    Lane.BULK: {"limit": 1, "in_use": 0},
+                },
+            }
+        ]
+
+    def test_expired_slot_is_taken_over(self):
+        """Место упавшего процесса занимает другой после истечения срока."""
+        first, second = self._pools
+        stale = first.acquire(Lane.BULK)
+        LaneSlot.objects.update(expires_at=timezone.now())
+
+        second.acquire(Lane.BULK)
+
+        assert not LaneSlot.objects.extend(stale.slot, ttl=60)
+
+    def test_slots_are_shared_only_by_senders(self):
+        """Общие места занимают только пулы процессов-отправителей."""
+        assert smtp_pools.get_pool(host="a", port=25).slots is None
+
+        with shared_lane_slots():
+            assert smtp_pools.get_pool(host="a", port=25).slots is not None
+
+        assert smtp_pools.slots is None
+        assert smtp_pools.get_pool(host="a", port=25).slots is None
+        smtp_pools.clear()
@@ -0,0 +1,179 @@
+import asyncio
+import time
+from email import message_from_bytes, policy
+from types import SimpleNamespace
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+from mailings.constants import OutboxStatus
+from mailings.delivery import (
+    AsyncSMTPClient,
+    GroupEmailMessage,
+    MessageBuilder,
+    MessagePayload,
+    MessageTemplate,
+    PreparedEmailMessage,
+)
+from mailings.models import Mailing, MailingAttempt, Recipient
+
+SUBJECT = "Новости рассылки"
+BODY = "Здравствуйте!\nЭто текст письма.\n.точка в начале строки\n"
+
+
+def parse(data):
+    return message_from_bytes(
+        data.replace(b"\r\n", b"\n"), policy=policy.default
+    )
+
+
+def test_prepared_message_matches_email_message():
+    """Письмо из готового payload совпадает с письмом Django."""
+    payload = MessagePayload(SUBJECT, BODY, "sender@example.com")
+
+    first = parse(
+        PreparedEmailMessage(payload, "a@example.com")
+        .message()
+        .as_bytes(linesep="\r\n")
+    )
+    second = parse(
+        bytes(PreparedEmailMessage(payload, "b@example.com").message())
+    )
+    expected = parse(
+        EmailMessage(SUBJECT, BODY, "sender@example.com", ["a@example.com"])
+        .message()
+        .as_bytes()
+    )
+
+    assert first["Subject"] == expected["Subject"] == SUBJECT
+    assert first["From"] == "sender@example.com"
+    assert (first["To"], second["To"]) == ("a@example.com", "b@example.com")
+    assert first["Message-ID"] != second["Message-ID"]
+    assert first.get_content() == expected.get_content()
+
+
+def test_prepared_message_encodes_international_address():
+    """Адреса с не-ASCII символами кодируются как в Django."""
+    payload = MessagePayload(SUBJECT, BODY, "sender@example.com")
+
+    data = bytes(PreparedEmailMessage(payload, "ivan@пример.рф").message())
+
+    assert b"To: ivan@xn--e1afmkfd.xn--p1ai\r\n" in data
+
+
+def test_message_builder_renders_personalized_messages():
+    """Персонализированное сообщение рендерится, а не берётся из payload."""
+    recipient = SimpleNamespace(email="a@example.com", first_name="Иван")
+    static = MessageBuilder(MessageTemplate(SUBJECT, BODY), "s@example.com")
+    personal = MessageBuilder(
+        MessageTemplate("{{ first_name }}", BODY), "s@example.com"
+    )
+
+    (prepared,) = static.build_batch([recipient])
+    (rendered,) = personal.build_batch([recipient])
+
+    assert isinstance(prepared, PreparedEmailMessage)
+    assert personal.payload is None
+    assert rendered.subject == "Иван"
+
+
+def test_message_builder_groups_recipients():
+    """Получатели группируются по домену не более чем по rcpt_limit."""
+    builder = MessageBuilder(
+        MessageTemplate(SUBJECT, BODY),
+        "s@example.com",
+        rcpt_limit=2,
+        group_by_domain=True,
+    )
+    recipients = [
+        SimpleNamespace(email=email)
+        for email in (
+            "a@one.com",
+            "b@two.com",
+            "c@ONE.com",
+            "d@one.com",
+        )
+    ]
+
+    messages = builder.build_batch(recipients)
+
+    assert all(isinstance(m, GroupEmailMessage) for m in messages)
+    assert [m.recipients() for m in messages] == [
+        ["a@one.com", "c@ONE.com"],
+        ["d@one.com"],
+        ["b@two.com"],
+    ]
+    assert b"To: undisclosed-recipients:;" in bytes(messages[0].message())
+
+
+@pytest.mark.django_db
+def test_send_mailing_in_rcpt_groups(settings, user, message):
+    """Одинаковое письмо уходит группам, попытка пишется по получателю."""
+    settings.MAILING_RCPT_BATCH_SIZE = 3
+    mailing = Mailing.objects.create(
+        start_time=timezone.now(),
+        end_time=timezone.now() + timezone.timedelta(days=1),
+        message=message,
+        owner=user,
+    )
+    mailing.recipients.set(
+        Recipient.objects.create(
+            email=f"user{index}@example.com",
+            last_name="Иванов",
+            first_name="Иван",
+            owner=user,
+        )
+        for index in range(7)
+    )
+
+    mailing.send_mailing()
+
+    assert [len(sent.recipients()) for sent in mail.outbox] == [3, 3, 1]
+    assert MailingAttempt.objects.filter(mailing=mailing).count() == 7
+    assert mailing.outbox.filter(status=OutboxStatus.SENT).count() == 7
+
+
+def test_prepared_message_via_smtp(smtp_sink):
+    """Готовые байты уходят в SMTP-сессию без повторной сборки MIME."""
+    server = smtp_sink()
+    payload = MessagePayload(SUBJECT, BODY, "sender@example.com")
+
+    async def send():
+        client = AsyncSMTPClient("127.0.0.1", server.port, timeout=5)
+        async with client:
+            await client.send_message(
+                PreparedEmailMessage(payload, "a@example.com")
+            )
+
+    asyncio.run(send())
+
+    ((mail_from, rcpt_to, data),) = server.messages
+    assert (mail_from, rcpt_to) == ("sender@example.com", ["a@example.com"])
+    message = parse(data.replace(b"\n..", b"\n."))
+    assert message["To"] == "a@example.com"
+    assert message.get_content() == BODY
+
+
+@pytest.mark.benchmark
+def test_prepared_message_benchmark():
+    """Сборка 10 000 писем из payload быстрее, чем MIME с нуля."""
+    addresses = [f"user{index}@example.com" for index in range(10_000)]
+
+    started = time.perf_counter()
+    for address in addresses:
+        EmailMessage(
+            SUBJECT, BODY, "sender@example.com", [address]
+        ).message().as_bytes(linesep="\r\n")
+    per_recipient = time.perf_counter() - started
+
+    started = time.perf_counter()
+    payload = MessagePayload(SUBJECT, BODY, "sender@example.com")
+    for address in addresses:
+        PreparedEmailMessage(payload, address).message().as_bytes(
+            linesep="\r\n"
+        )
+    prepared = time.perf_counter() - started
+
+    assert prepared < per_recipient / 2
@@ -1,7 +1,10 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from mailings.constants import AttemptStatus, MailingStatus
+from mailings.delivery import BulkWriter, ConnectionDelivery
 from mailings.models import Mailing, MailingAttempt, Message, Recipient
 
 
@@ -123,6 +126,106 @@ class TestMailingModel:
         assert attempt.status == AttemptStatus.FAILED
         assert "Владелец рассылки заблокирован" in attempt.server_response
 
+    def test_claim_is_exclusive(self, mailoutbox):
+        """Рассылку, захваченную другим процессом, повторно не отправить."""
+        other = Mailing.objects.get(pk=self._mailing.pk)
+
+        assert other._claim()
+        self._mailing.send_mailing()
+
+        assert mailoutbox == []
+        assert not self._mailing.outbox.exists()
+
+        other._release()
+        self._mailing.refresh_from_db()
+
+        assert self._mailing.claimed_until is None
+
+    def test_expired_claim_is_taken_over(self, mailoutbox):
+        """Захват упавшего процесса истекает, и рассылку отправляет другой."""
+        Mailing.objects.filter(pk=self._mailing.pk).update(
+            status=MailingStatus.RUNNING,
+            claimed_until=timezone.now() - timezone.timedelta(seconds=1),
+        )
+        self._mailing.refresh_from_db()
+        self._mailing.send_mailing()
+        self._mailing.refresh_from_db()
+
+        assert len(mailoutbox) == 1
+        assert self._mailing.status == MailingStatus.COMPLETED
+        assert self._mailing.claimed_until is None
+
+    def test_release_keeps_disabled_status(self):
+        """Отключённая во время отправки рассылка остаётся отключённой."""
+        assert self._mailing._claim()
+        Mailing.objects.filter(pk=self._mailing.pk).update(
+            status=MailingStatus.DISABLED
+        )
+        self._mailing._release()
+        self._mailing.refresh_from_db()
+
+        assert self._mailing.status == MailingStatus.DISABLED
+
+    def test_rejection_logged_once_per_reason(self):
+        """Отказ записывается один раз, пока не изменится его причина."""
+        self._mailing.start_time = timezone.now() + timezone.timedelta(hours=1)
+        self._mailing.save()
+
+        for _ in range(3):
+            self._mailing.send_mailing()
+
+        self._mailing.owner.is_blocked = True
+        self._mailing.owner.save()
+        self._mailing.send_mailing()
+        self._mailing.send_mailing()
+
+        responses = MailingAttempt.objects.filter(
+            mailing=self._mailing
+        ).values_list("server_response", flat=True)
+
+        assert sorted(responses) == [
+            "Владелец рассылки заблокирован",
+            "Рассылка ещё не началась",
+        ]
+
+    def test_eligibility_querysets(self, user, django_user_model):
+        """Истёкшие рассылки и рассылки заблокированных владельцев."""
+        now = timezone.now()
+        expired = Mailing.objects.create(
+            start_time=now - timezone.timedelta(days=2),
+            end_time=now - timezone.timedelta(days=1),
+            message=self._message,
+            owner=user,
+        )
+        blocked = django_user_model.objects.create_user(
+            email="blocked@example.com",
+            username="blocked",
+            password="pass123",
+            is_blocked=True,
+        )
+        blocked_mailing = Mailing.objects.create(
+            start_time=now,
+            end_time=now + timezone.timedelta(days=1),
+            message=self._message,
+            owner=blocked,
+        )
+
+        assert list(Mailing.objects.expired()) == [expired]
+        assert list(Mailing.objects.blocked_owner()) == [blocked_mailing]
+        assert list(Mailing.objects.due()) == [self._mailing]
+
+    def test_due_loads_owner_and_message(self):
+        """Проверка рассылки из `due()` не делает лишних запросов."""
+        mailings = list(Mailing.objects.due())
+
+        with CaptureQueriesContext(connection) as queries:
+            rejections = [mailing._get_rejection() for mailing in mailings]
+            subjects = [mailing.message.subject for mailing in mailings]
+
+        assert rejections == [None]
+        assert subjects == ["Тестовое письмо"]
+        assert len(queries) == 0
+
 
 @pytest.mark.django_db
 class TestMailingAttemptModel:
@@ -157,3 +260,84 @@ class TestMailingAttemptModel:
 
         assert attempt.mailing == self._mailing
         assert attempt.status == AttemptStatus.SUCCESS
+
+
+@pytest.mark.django_db
+class TestMailingAttemptLog:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user):
+        """Создание рассылки с несколькими получателями."""
+        self._mailing = Mailing.objects.create(
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(days=1),
+            message=Message.objects.create(
+                subject="Тестовое письмо",
+                body="Тест",
+                owner=user,
+            ),
+            owner=user,
+        )
+        self._mailing.recipients.set(
+            Recipient.objects.create(
+                email=f"recipient{index}@example.com",
+                last_name="Иванов",
+                first_name="Иван",
+                owner=user,
+            )
+            for index in range(7)
+        )
+
+    def test_attempts_written_in_batches(self):
+        """Попытки сохраняются пачками, а не по одной."""
+        attempt_log = BulkWriter(MailingAttempt, batch_size=3)
+
+        with CaptureQueriesContext(connection) as queries:
+            self._mailing.send_mailing(attempt_log=attempt_log)
+
+        inserts = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "mailings_mailingattempt"')
+        ]
+
+        assert len(inserts) == 3
+        assert (
+            MailingAttempt.objects.filter(mailing=self._mailing).count() == 7
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_send_mailing_with_workers(self):
+        """Параллельная отправка записывает попытку для каждого письма."""
+        self._mailing.send_mailing(workers=3)
+        self._mailing.refresh_from_db()
+
+        assert self._mailing.status == MailingStatus.COMPLETED
+        assert (
+            MailingAttempt.objects.filter(
+                mailing=self._mailing,
+                status=AttemptStatus.SUCCESS,
+            ).count()
+            == 7
+        )
+
+    def test_attempts_flushed_on_error(self, mocker):
+        """Накопленные попытки сохраняются даже при ошибке отправки."""
+        send = ConnectionDelivery.send
+
+        def broken_send(delivery, messages):
+            results = send(delivery, messages)
+            yield next(results)
+            yield next(results)
+            raise RuntimeError
+
+        mocker.patch.object(ConnectionDelivery, "send", broken_send)
+
+        with pytest.raises(RuntimeError):
+            self._mailing.send_mailing(
+                attempt_log=BulkWriter(MailingAttempt, batch_size=100)
+            )
+
+        assert (
+            MailingAttempt.objects.filter(mailing=self._mailing).count() == 2
+        )
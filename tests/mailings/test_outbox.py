@@ -0,0 +1,220 @@
+import tracemalloc
+
+import pytest
+from django.core import mail
+from django.utils import timezone
+
+from mailings.constants import MailingStatus, OutboxStatus
+from mailings.delivery import ConnectionDelivery
+from mailings.managers import INTERRUPTED_ERROR
+from mailings.models import Mailing, OutboxEntry, Recipient
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, message, settings):
+        """Создание рассылки с несколькими получателями."""
+        settings.MAILING_SEND_BATCH_SIZE = 2
+        self._mailing = Mailing.objects.create(
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(days=1),
+            message=message,
+            owner=user,
+        )
+        self._recipients = [
+            Recipient.objects.create(
+                email=f"recipient{index}@example.com",
+                last_name="Иванов",
+                first_name="Иван",
+                owner=user,
+            )
+            for index in range(7)
+        ]
+        self._mailing.recipients.set(self._recipients)
+
+    def test_materialize_is_idempotent(self):
+        """Очередь содержит ровно одно письмо на получателя."""
+        OutboxEntry.objects.materialize(self._mailing, batch_size=3)
+        OutboxEntry.objects.materialize(self._mailing, batch_size=3)
+
+        assert self._mailing.outbox.count() == 7
+        assert not self._mailing.outbox.exclude(
+            status=OutboxStatus.PENDING
+        ).exists()
+
+    def test_send_drains_outbox(self):
+        """После отправки все письма очереди отмечены отправленными."""
+        self._mailing.send_mailing()
+        self._mailing.refresh_from_db()
+
+        assert self._mailing.status == MailingStatus.COMPLETED
+        assert (
+            self._mailing.outbox.filter(
+                status=OutboxStatus.SENT,
+                attempts=1,
+                sent_at__isnull=False,
+            ).count()
+            == 7
+        )
+
+    def test_resume_after_crash(self, mocker):
+        """Прерванная рассылка продолжается без повторной отправки."""
+        send = ConnectionDelivery.send
+
+        def crashing_send(delivery, messages):
+            results = send(delivery, messages)
+            for _ in range(3):
+                yield next(results)
+            raise KeyboardInterrupt
+
+        mocker.patch.object(ConnectionDelivery, "send", crashing_send)
+
+        with pytest.raises(KeyboardInterrupt):
+            self._mailing.send_mailing()
+
+        assert (
+            self._mailing.outbox.filter(status=OutboxStatus.SENT).count() == 3
+        )
+        assert (
+            self._mailing.outbox.filter(status=OutboxStatus.PENDING).count()
+            == 3
+        )
+
+        mocker.stopall()
+        self._mailing.send_mailing()
+
+        delivered = [message.to[0] for message in mail.outbox]
+        interrupted = self._mailing.outbox.get(status=OutboxStatus.FAILED)
+
+        assert len(delivered) == len(set(delivered)) == 7
+        assert interrupted.last_error == INTERRUPTED_ERROR
+        assert (
+            self._mailing.outbox.filter(status=OutboxStatus.SENT).count() == 6
+        )
+
+    def test_expired_lease_is_reclaimed(self):
+        """
+        По истёкшей аренде непереданные письма возвращаются в очередь,
+        а переданные серверу закрываются как прерванные.
+        """
+        OutboxEntry.objects.materialize(self._mailing, batch_size=10)
+        expired = timezone.now() - timezone.timedelta(minutes=1)
+        handed, unattempted = OutboxEntry.objects.take_batch(
+            self._mailing, 0, 2, lease_until=expired
+        )
+        active = OutboxEntry.objects.take_batch(
+            self._mailing,
+            unattempted.pk,
+            1,
+            lease_until=timezone.now() + timezone.timedelta(minutes=1),
+        )
+        OutboxEntry.objects.mark_handed_off([handed.pk])
+
+        failed = OutboxEntry.objects.fail_interrupted(
+            self._mailing, expired_only=True
+        )
+        handed.refresh_from_db()
+        unattempted.refresh_from_db()
+
+        assert failed == 1
+        assert (handed.status, handed.last_error) == (
+            OutboxStatus.FAILED,
+            INTERRUPTED_ERROR,
+        )
+        assert (unattempted.status, unattempted.attempts) == (
+            OutboxStatus.PENDING,
+            0,
+        )
+        assert unattempted.lease_expires_at is None
+        assert self._mailing.outbox.get(pk=active[0].pk).status == (
+            OutboxStatus.SENDING
+        )
+
+    def test_handoff_is_marked_once_per_batch(self, mocker):
+        """Пачка писем отмечается переданной серверу одним запросом."""
+        mark = mocker.spy(OutboxEntry.objects, "mark_handed_off")
+
+        self._mailing.send_mailing()
+
+        assert [len(call.args[0]) for call in mark.call_args_list] == [
+            2,
+            2,
+            2,
+            1,
+        ]
+        assert not self._mailing.outbox.filter(
+            handed_off_at__isnull=True
+        ).exists()
+
+    def test_crash_before_handoff_keeps_entries(self, mocker):
+        """Письма, не переданные серверу до сбоя, отправятся повторно."""
+        mocker.patch.object(
+            ConnectionDelivery, "send_batch", side_effect=KeyboardInterrupt
+        )
+
+        with pytest.raises(KeyboardInterrupt):
+            self._mailing.send_mailing()
+
+        assert (
+            self._mailing.outbox.filter(status=OutboxStatus.PENDING).count()
+            == 7
+        )
+
+        mocker.stopall()
+        self._mailing.send_mailing()
+
+        assert len(mail.outbox) == 7
+
+
+@pytest.mark.django_db
+class TestOutboxMemory:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, message, settings):
+        """Настройка отправки без накопления писем в памяти."""
+        settings.EMAIL_BACKEND = "django.core.mail.backends.dummy.EmailBackend"
+        settings.MAILING_SEND_BATCH_SIZE = 100
+        settings.MAILING_ATTEMPT_LOG_BATCH_SIZE = 100
+        self._user = user
+        self._message = message
+
+    def _measure_peak(self, count: int) -> int:
+        """Возвращает пиковую память отправки рассылки на count адресов."""
+        mailing = Mailing.objects.create(
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(days=1),
+            message=self._message,
+            owner=self._user,
+        )
+        recipients = Recipient.objects.bulk_create(
+            Recipient(
+                email=f"{mailing.pk}-{index}@example.com",
+                last_name="Иванов",
+                first_name="Иван",
+                comment="Комментарий " * 50,
+                owner=self._user,
+            )
+            for index in range(count)
+        )
+        mailing.recipients.add(*recipients)
+        del recipients
+
+        tracemalloc.start()
+        try:
+            mailing.send_mailing()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert mailing.outbox.filter(status=OutboxStatus.SENT).count() == count
+        return peak
+
+    def test_peak_memory_is_bounded(self):
+        """Пиковая память отправки не растёт вместе со списком получателей."""
+        self._measure_peak(100)
+        small = self._measure_peak(500)
+        large = self._measure_peak(2_500)
+
+        assert large < small * 2
@@ -0,0 +1,134 @@
+from smtplib import SMTP
+
+import pytest
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from mailings.constants import OutboxStatus
+from mailings.delivery import (
+    PooledEmailBackend,
+    SMTPConnectionPool,
+    smtp_pools,
+)
+from mailings.models import Mailing
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSMTPConnectionPool:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, mocker):
+        """Пул с поддельными соединениями и управляемыми часами."""
+        self._clock = FakeClock()
+        self._connect = mocker.Mock(
+            side_effect=lambda: mocker.MagicMock(spec=SMTP)
+        )
+        self._pool = SMTPConnectionPool(
+            self._connect,
+            size=2,
+            max_messages=3,
+            max_idle=60,
+            health_check_interval=10,
+            timeout=0.05,
+            clock=self._clock,
+        )
+
+    def test_reuse_with_rset(self):
+        """Возвращённое соединение сбрасывается RSET и выдаётся повторно."""
+        pooled = self._pool.acquire()
+        self._pool.release(pooled)
+
+        assert self._pool.acquire() is pooled
+        pooled.smtp.rset.assert_called_once()
+        pooled.smtp.noop.assert_not_called()
+        assert self._connect.call_count == 1
+
+    def test_recycle_after_max_messages(self):
+        """Соединение закрывается после max_messages писем."""
+        pooled = self._pool.acquire()
+        pooled.messages_sent = 3
+        self._pool.release(pooled)
+
+        assert self._pool.acquire() is not pooled
+        pooled.smtp.quit.assert_called_once()
+
+    def test_idle_eviction(self):
+        """Соединения, простоявшие дольше max_idle, закрываются."""
+        pooled = self._pool.acquire()
+        self._pool.release(pooled)
+        self._clock.now = 61
+
+        assert self._pool.evict_idle() == 1
+        pooled.smtp.quit.assert_called_once()
+        assert self._pool.get_metrics()["open"] == 0
+
+    def test_health_check(self):
+        """Долго простоявшее соединение проверяется NOOP перед выдачей."""
+        pooled = self._pool.acquire()
+        pooled.smtp.noop.return_value = (421, b"Timeout")
+        self._pool.release(pooled)
+        self._clock.now = 20
+
+        fresh = self._pool.acquire()
+
+        assert fresh is not pooled
+        pooled.smtp.noop.assert_called_once()
+        assert self._pool.get_metrics()["discarded"] == 1
+
+    def test_bounded_size(self):
+        """Больше size соединений не открывается, ожидание ограничено."""
+        self._pool.acquire()
+        self._pool.acquire()
+
+        with pytest.raises(TimeoutError):
+            self._pool.acquire()
+        assert self._connect.call_count == 2
+
+
+@pytest.fixture
+def pooled_settings(settings, smtp_sink):
+    """Настройки с пулом соединений к SMTPSink."""
+    server = smtp_sink()
+    settings.EMAIL_BACKEND = "mailings.delivery.pool.PooledEmailBackend"
+    settings.EMAIL_HOST = "127.0.0.1"
+    settings.EMAIL_PORT = server.port
+    settings.EMAIL_USE_SSL = False
+    settings.EMAIL_TIMEOUT = 5
+    yield server
+    smtp_pools.clear()
+
+
+def test_transactional_emails_share_connection(pooled_settings):
+    """Письма `send_mail` берут одно соединение из пула."""
+    for index in range(3):
+        send_mail("Тема", "Текст", None, [f"user{index}@example.com"])
+
+    assert len(pooled_settings.messages) == 3
+    assert pooled_settings.stats.sessions == 1
+
+
+@pytest.mark.django_db
+def test_mailings_share_connection(pooled_settings, user, message, recipient):
+    """Разные рассылки отправляются через одно соединение пула."""
+    for _ in range(2):
+        mailing = Mailing.objects.create(
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(days=1),
+            message=message,
+            owner=user,
+        )
+        mailing.recipients.add(recipient)
+        mailing.send_mailing()
+        assert mailing.outbox.get().status == OutboxStatus.SENT
+
+    assert len(pooled_settings.messages) == 2
+    assert pooled_settings.stats.sessions == 1
+    assert PooledEmailBackend().pool.get_metrics()["reused"] == 1
@@ -0,0 +1,151 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from mailings.constants import MailingStatus, OutboxStatus
+from mailings.models import Mailing, MailingProgress, OutboxEntry, Recipient
+from mailings.progress import (
+    ProgressPoller,
+    ProgressSnapshot,
+    RateMeter,
+    progress_hub,
+)
+from mailings.scheduler import sweep_expired_mailings
+
+
+@pytest.fixture
+def mailing(user, message):
+    """Рассылка на три получателя."""
+    mailing = Mailing.objects.create(
+        start_time=timezone.now(),
+        end_time=timezone.now() + timezone.timedelta(days=1),
+        message=message,
+        owner=user,
+    )
+    mailing.recipients.set(
+        Recipient.objects.create(
+            email=f"recipient{index}@example.com",
+            last_name="Иванов",
+            first_name="Иван",
+            owner=user,
+        )
+        for index in range(3)
+    )
+    return mailing
+
+
+@pytest.mark.django_db
+class TestProgressCounters:
+
+    def test_send_updates_counters(self, mailing, mailoutbox):
+        """Отправка увеличивает счётчики без пересчёта очереди."""
+        mailing.send_mailing()
+
+        progress = MailingProgress.objects.get(mailing=mailing)
+
+        assert (progress.total, progress.sent, progress.failed) == (3, 3, 0)
+        assert progress.pending == 0
+
+    def test_interrupted_and_expired_are_failed(self, mailing):
+        """Прерванные и просроченные письма считаются неотправленными."""
+        OutboxEntry.objects.materialize(mailing, batch_size=10)
+        first = mailing.outbox.first()
+        OutboxEntry.objects.filter(pk=first.pk).update(
+            status=OutboxStatus.SENDING, handed_off_at=timezone.now()
+        )
+
+        OutboxEntry.objects.fail_interrupted(mailing)
+
+        assert MailingProgress.objects.get(mailing=mailing).failed == 1
+
+        Mailing.objects.filter(pk=mailing.pk).update(end_time=timezone.now())
+        sweep_expired_mailings()
+        progress = MailingProgress.objects.get(mailing=mailing)
+
+        assert (progress.total, progress.failed) == (3, 3)
+
+
+def test_rate_meter():
+    """Скорость считается по выборкам в пределах окна."""
+    now = [0.0]
+    meter = RateMeter(window=10, clock=lambda: now[0])
+
+    assert meter.add(0) == 0.0
+
+    now[0] = 5.0
+    assert meter.add(50) == 10.0
+
+    now[0] = 20.0
+    assert meter.add(100) == 0.0
+    now[0] = 25.0
+    assert meter.add(200) == 20.0
+
+
+def test_hub_shares_one_poller_per_mailing(mocker, settings):
+    """Подписчики одной рассылки получают снимки одного опроса."""
+    settings.MAILING_PROGRESS_INTERVAL = 0.01
+    snapshot = ProgressSnapshot(1, MailingStatus.RUNNING, 10, 5, 1, 2.0, 2.0)
+    fetch = mocker.patch.object(ProgressPoller, "fetch", return_value=snapshot)
+
+    async def watch():
+        async with progress_hub.subscribe(1) as first:
+            async with progress_hub.subscribe(1) as second:
+                metrics = progress_hub.get_metrics()
+                received = [await first.get(), await second.get()]
+        return metrics, received
+
+    metrics, received = asyncio.run(watch())
+
+    assert metrics == {1: 2}
+    assert received == [snapshot, snapshot]
+    assert fetch.await_count == 1
+    assert progress_hub.get_metrics() == {}
+
+
+@pytest.mark.django_db(transaction=True)
+class TestProgressView:
+
+    def test_stream_ends_when_mailing_is_finished(
+        self, async_client, user, mailing, mailoutbox
+    ):
+        """Поток отдаёт прогресс и закрывается, когда рассылка завершена."""
+        mailing.send_mailing()
+        async_client.force_login(user)
+        url = reverse("mailings:mailing_progress", kwargs={"pk": mailing.pk})
+
+        async def read():
+            response = await async_client.get(url)
+            body = [chunk async for chunk in response.streaming_content]
+            return response, b"".join(body).decode()
+
+        response, body = asyncio.run(read())
+        events = [
+            line.removeprefix("data: ")
+            for line in body.splitlines()
+            if line.startswith("data: ")
+        ]
+
+        assert response.status_code == HTTPStatus.OK
+        assert response["Content-Type"] == "text/event-stream"
+        assert "event: done" in body
+        assert json.loads(events[0]) == {
+            "mailing_id": mailing.pk,
+            "status": MailingStatus.COMPLETED,
+            "total": 3,
+            "sent": 3,
+            "failed": 0,
+            "pending": 0,
+            "rate": 0.0,
+            "eta": None,
+        }
+
+    def test_anonymous_is_forbidden(self, async_client, mailing):
+        url = reverse("mailings:mailing_progress", kwargs={"pk": mailing.pk})
+
+        response = asyncio.run(async_client.get(url))
+
+        assert response.status_code == HTTPStatus.FORBIDDEN
@@ -0,0 +1,154 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from mailings.delivery import (
+    RateLimit,
+    SharedTokenBucket,
+    TokenBucket,
+    rate_limits,
+)
+from mailings.models import Mailing, RateLimitBucket, Recipient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+
+    def test_reserve_waits_for_refill(self):
+        """Пустое ведро выдаёт очередь ожидания по скорости пополнения."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=2, clock=clock)
+
+        waits = [bucket.reserve() for _ in range(4)]
+
+        assert waits == pytest.approx([0, 0, 0.1, 0.2])
+        assert bucket.tokens == pytest.approx(-2)
+
+        clock.now = 1.0
+
+        assert bucket.tokens == pytest.approx(2)
+        assert bucket.reserve() == 0
+
+    def test_threads_share_rate(self):
+        """Параллельные потоки вместе не превышают заданную скорость."""
+        bucket = TokenBucket(rate=100, capacity=1)
+        limit = RateLimit([bucket])
+        started = time.monotonic()
+
+        threads = [
+            threading.Thread(
+                target=lambda: [limit.acquire() for _ in range(10)]
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert time.monotonic() - started >= 0.38
+        assert bucket.get_metrics()["acquired"] == 40
+
+    def test_rate_limit_waits_for_slowest_bucket(self):
+        """Ожидание определяется самым загруженным ведром."""
+        clock = FakeClock()
+        fast = TokenBucket(rate=100, capacity=1, clock=clock)
+        slow = TokenBucket(rate=1, capacity=1, clock=clock)
+        limit = RateLimit([fast, slow])
+
+        assert limit.reserve() == 0
+        assert limit.reserve() == pytest.approx(1)
+
+
+@pytest.mark.django_db
+def test_processes_share_bucket():
+    """Отправители разных процессов вместе не превышают общую скорость."""
+
+    def store(count):
+        return RateLimitBucket.objects.reserve("host", "smtp", 10, 1, count)
+
+    first, second = (SharedTokenBucket(10, store, lease=0.1) for _ in range(2))
+
+    waits = [bucket.reserve() for bucket in (first, second, first, second)]
+
+    assert waits == pytest.approx([0, 0.1, 0.2, 0.3], abs=0.05)
+    [metrics] = RateLimitBucket.objects.get_metrics()
+    assert metrics["reserved"] == 4
+    assert metrics["tokens"] == pytest.approx(-3, abs=0.5)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestMailingRateLimit:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.MAILING_RATE_LIMIT_PER_HOST = 100
+        settings.MAILING_RATE_LIMIT_PER_OWNER = 1000
+        settings.MAILING_RATE_LIMIT_BURST = 1
+        rate_limits.clear()
+        yield
+        rate_limits.clear()
+
+    def test_send_mailing_uses_host_and_owner_buckets(
+        self, settings, user, message
+    ):
+        """Каждое письмо рассылки берёт токен сервера и владельца."""
+        mailing = Mailing.objects.create(
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(days=1),
+            message=message,
+            owner=user,
+        )
+        mailing.recipients.set(
+            Recipient.objects.create(
+                email=f"recipient{index}@example.com",
+                last_name="Иванов",
+                first_name="Иван",
+                owner=user,
+            )
+            for index in range(5)
+        )
+
+        mailing.send_mailing(workers=2)
+        metrics = {
+            metric["scope"]: metric for metric in rate_limits.get_metrics()
+        }
+
+        assert metrics["owner"]["key"] == str(user.pk)
+        assert metrics["owner"]["acquired"] == 5
+        assert metrics["host"]["acquired"] == 5
+        assert metrics["host"]["total_wait"] > 0
+        assert set(RateLimitBucket.objects.values_list("scope", "key")) == {
+            ("host", settings.EMAIL_HOST),
+            ("owner", str(user.pk)),
+        }
+
+    def test_metrics_view(self, client, user, manager):
+        """Метрики общих ведер доступны только менеджерам."""
+        rate_limits.for_delivery(
+            "smtp.example.com", user.pk, RateLimitBucket.objects.reserve
+        ).acquire()
+        url = reverse("mailings:rate_limit_metrics")
+
+        client.login(email="user@example.com", password="pass123")
+
+        assert client.get(url).status_code == HTTPStatus.FORBIDDEN
+
+        client.login(email="manager@example.com", password="manager123")
+        response = client.get(url)
+
+        assert response.status_code == HTTPStatus.OK
+        assert {
+            metric["key"] for metric in response.json()["rate_limits"]
+        } == {"smtp.example.com", str(user.pk)}
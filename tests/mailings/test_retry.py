@@ -0,0 +1,150 @@
+from datetime import timedelta
+from smtplib import (
+    SMTPDataError,
+    SMTPRecipientsRefused,
+    SMTPResponseException,
+    SMTPServerDisconnected,
+)
+
+import pytest
+from django.core.mail.backends.locmem import EmailBackend
+from django.utils import timezone
+
+from mailings.constants import MailingStatus, OutboxStatus
+from mailings.delivery import RetryPolicy, is_transient_error
+from mailings.models import Mailing, Recipient
+
+
+@pytest.mark.parametrize(
+    ("error", "transient"),
+    [
+        (SMTPResponseException(421, "Too many connections"), True),
+        (SMTPDataError(451, "Try again later"), True),
+        (SMTPDataError(554, "Rejected"), False),
+        (SMTPServerDisconnected("Connection closed"), True),
+        (ConnectionResetError(), True),
+        (SMTPRecipientsRefused({"a@example.com": (450, b"Busy")}), True),
+        (SMTPRecipientsRefused({"a@example.com": (550, b"No user")}), False),
+        (ValueError("bad header"), False),
+    ],
+)
+def test_is_transient_error(error, transient):
+    """Ошибки 4xx и обрывы соединения временные, 5xx — постоянные."""
+    assert is_transient_error(error) is transient
+
+
+def test_retry_policy_delay():
+    """Задержка растёт экспоненциально с джиттером и ограничена сверху."""
+    policy = RetryPolicy(max_attempts=3, base_delay=10, max_delay=60)
+
+    for attempts, expected in ((1, 10), (2, 20), (3, 40), (5, 60)):
+        delay = policy.get_delay(attempts)
+        assert timedelta(seconds=expected / 2) <= delay
+        assert delay <= timedelta(seconds=expected)
+
+    assert policy.can_retry(2)
+    assert not policy.can_retry(3)
+
+
+@pytest.mark.django_db
+class TestMailingRetry:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, message, settings, mocker):
+        """Создание рассылки, одному получателю которой письма не уходят."""
+        settings.MAILING_RETRY_MAX_ATTEMPTS = 2
+        self._mailing = Mailing.objects.create(
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(days=1),
+            message=message,
+            owner=user,
+        )
+        self._mailing.recipients.set(
+            Recipient.objects.create(
+                email=email,
+                last_name="Иванов",
+                first_name="Иван",
+                owner=user,
+            )
+            for email in ("good@example.com", "bad@example.com")
+        )
+        self.error = SMTPResponseException(421, "Try again later")
+        send_messages = EmailBackend.send_messages
+
+        def failing_send_messages(backend, messages):
+            sent = 0
+            for message in messages:
+                if self.error and message.to == ["bad@example.com"]:
+                    raise self.error
+                sent += send_messages(backend, [message])
+            return sent
+
+        mocker.patch.object(
+            EmailBackend,
+            "send_messages",
+            failing_send_messages,
+        )
+
+    def _get_entry(self, email):
+        return self._mailing.outbox.get(recipient__email=email)
+
+    def _make_due(self):
+        self._mailing.outbox.filter(status=OutboxStatus.PENDING).update(
+            next_attempt_at=timezone.now()
+        )
+
+    def test_transient_failure_is_retried(self):
+        """После временной ошибки письмо ждёт повтора, рассылка запущена."""
+        self._mailing.send_mailing()
+        self._mailing.refresh_from_db()
+        entry = self._get_entry("bad@example.com")
+
+        assert self._mailing.status == MailingStatus.RUNNING
+        assert entry.status == OutboxStatus.PENDING
+        assert entry.next_attempt_at > timezone.now()
+        assert self._get_entry("good@example.com").status == OutboxStatus.SENT
+
+        self._mailing.send_mailing()
+
+        assert self._get_entry("bad@example.com").attempts == 1
+
+        self.error = None
+        self._make_due()
+        self._mailing.send_mailing()
+        self._mailing.refresh_from_db()
+
+        assert self._mailing.status == MailingStatus.COMPLETED
+        assert self._get_entry("bad@example.com").status == OutboxStatus.SENT
+        assert self._get_entry("good@example.com").attempts == 1
+
+    def test_attempts_are_capped(self):
+        """После исчерпания попыток ошибка окончательная."""
+        self._mailing.send_mailing()
+        self._make_due()
+        self._mailing.send_mailing()
+        self._mailing.refresh_from_db()
+        entry = self._get_entry("bad@example.com")
+
+        assert entry.status == OutboxStatus.FAILED
+        assert entry.attempts == 2
+        assert self._mailing.status == MailingStatus.COMPLETED
+
+    def test_permanent_failure_is_not_retried(self):
+        """Постоянная ошибка сразу завершает попытки получателя."""
+        self.error = SMTPResponseException(550, "No such user")
+
+        self._mailing.send_mailing()
+        self._mailing.refresh_from_db()
+
+        assert self._get_entry("bad@example.com").status == OutboxStatus.FAILED
+        assert self._mailing.status == MailingStatus.COMPLETED
+
+    def test_with_due_retries(self):
+        """Рассылка попадает в выборку, когда подошло время повтора."""
+        self._mailing.send_mailing()
+
+        assert not Mailing.objects.with_due_retries().exists()
+
+        self._make_due()
+
+        assert list(Mailing.objects.with_due_retries()) == [self._mailing]
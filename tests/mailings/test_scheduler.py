@@ -0,0 +1,243 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+
+from mailings.constants import MailingStatus, OutboxStatus
+from mailings.models import Mailing, OutboxEntry
+from mailings.scheduler import MailingDispatcher
+
+
+def create_mailing(message, recipient, start, end, **kwargs):
+    mailing = Mailing.objects.create(
+        start_time=start,
+        end_time=end,
+        message=message,
+        owner=message.owner,
+        **kwargs,
+    )
+    mailing.recipients.add(recipient)
+    return mailing
+
+
+@pytest.mark.django_db
+def test_due(user, message, recipient):
+    """Подошедшие рассылки: время наступило, не истекло, владелец активен."""
+    now = timezone.now()
+    hour = timezone.timedelta(hours=1)
+    due = create_mailing(message, recipient, now - hour, now + hour)
+    running = create_mailing(
+        message,
+        recipient,
+        now - hour,
+        now + hour,
+        status=MailingStatus.RUNNING,
+    )
+    create_mailing(message, recipient, now + hour, now + 2 * hour)
+    create_mailing(message, recipient, now - 2 * hour, now - hour)
+    create_mailing(
+        message,
+        recipient,
+        now - hour,
+        now + hour,
+        status=MailingStatus.COMPLETED,
+    )
+
+    assert set(Mailing.objects.due(now)) == {due, running}
+
+    user.is_blocked = True
+    user.save()
+    assert not Mailing.objects.due(now).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestMailingDispatcher:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, message, recipient):
+        now = timezone.now()
+        self._mailings = [
+            create_mailing(
+                message,
+                recipient,
+                now - timezone.timedelta(minutes=1),
+                now + timezone.timedelta(days=1),
+            )
+            for _ in range(3)
+        ]
+
+    def test_dispatch_all(self, mailoutbox):
+        """
+        Подошедшие рассылки отправляются и завершаются.
+
+        Рассылки отправляются в одном потоке: тестовая база SQLite
+        в памяти не допускает одновременной записи из разных потоков.
+        """
+        dispatcher = MailingDispatcher(max_concurrent=1)
+        dispatched = dispatcher.dispatch_all()
+        dispatcher.shutdown()
+
+        assert sorted(dispatched) == sorted(m.pk for m in self._mailings)
+        assert len(mailoutbox) == 3
+        assert set(Mailing.objects.values_list("status", flat=True)) == {
+            MailingStatus.COMPLETED
+        }
+
+    def test_concurrency_limit(self, mocker):
+        """Одновременно отправляется не больше `max_concurrent` рассылок."""
+        release = threading.Event()
+        mocker.patch.object(
+            Mailing,
+            "send_mailing",
+            side_effect=lambda **kwargs: release.wait(5),
+        )
+        dispatcher = MailingDispatcher(max_concurrent=2)
+
+        first = dispatcher.dispatch_due()
+        second = dispatcher.dispatch_due()
+        release.set()
+        dispatcher.wait()
+        third = dispatcher.dispatch_due()
+        dispatcher.shutdown()
+
+        assert len(first) == 2
+        assert second == []
+        assert len(third) == 2
+
+    def test_run_scheduler_once(self, mailoutbox, capsys):
+        """Команда с --once отправляет подошедшие рассылки и завершается."""
+        call_command("run_scheduler", once=True, concurrency=1)
+
+        assert len(mailoutbox) == 3
+        assert "Отправлено рассылок: 3" in capsys.readouterr().out
+
+
+CONCURRENT_SEND = """
+import json
+
+from django.core.management import call_command
+
+from mailings.models import Mailing, MailingAttempt, Message, Recipient
+from users.models import User
+
+owner = User.objects.create_user(
+    email="owner@example.com", username="owner", is_active=True
+)
+message = Message.objects.create(subject="Тема", body="Текст", owner=owner)
+recipients = [
+    Recipient.objects.create(
+        email=f"recipient{index}@example.com",
+        last_name="Иванов",
+        first_name="Иван",
+        owner=owner,
+    )
+    for index in range(5)
+]
+for _ in range(6):
+    Mailing.objects.create(
+        start_time="2000-01-01T00:00:00Z",
+        end_time="2100-01-01T00:00:00Z",
+        message=message,
+        owner=owner,
+    ).recipients.set(recipients)
+
+call_command("run_scheduler", once=True, concurrency=3)
+print(
+    json.dumps(
+        {
+            "statuses": sorted(
+                Mailing.objects.values_list("status", flat=True)
+            ),
+            "attempts": MailingAttempt.objects.count(),
+        }
+    )
+)
+"""
+
+
+@pytest.mark.multiprocess
+def test_run_scheduler_concurrent(tmp_path):
+    """
+    Рассылки отправляются из нескольких потоков одновременно.
+
+    Тестовая база SQLite в памяти не допускает записи из разных потоков,
+    поэтому команда работает в отдельном процессе на базе в файле.
+    """
+    env = {
+        **os.environ,
+        "DB_NAME": str(tmp_path / "db.sqlite3"),
+        "EMAIL_BACKEND": "django.core.mail.backends.locmem.EmailBackend",
+    }
+    manage = [sys.executable, str(settings.BASE_DIR / "manage.py")]
+
+    subprocess.run([*manage, "migrate", "-v0"], env=env, check=True)
+    result = subprocess.run(
+        [*manage, "shell", "-c", CONCURRENT_SEND],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.splitlines()[-1]) == {
+        "statuses": [MailingStatus.COMPLETED] * 6,
+        "attempts": 30,
+    }
+
+
+@pytest.mark.django_db
+def test_sweep_expired_mailings(message, recipient):
+    """Истёкшие рассылки завершаются пачками, их очередь закрывается."""
+    now = timezone.now()
+    expired = [
+        create_mailing(
+            message,
+            recipient,
+            now - timezone.timedelta(days=2),
+            now - timezone.timedelta(days=1),
+            status=status,
+        )
+        for status in (
+            MailingStatus.CREATED,
+            MailingStatus.RUNNING,
+            MailingStatus.RUNNING,
+        )
+    ]
+    active = create_mailing(
+        message, recipient, now, now + timezone.timedelta(days=1)
+    )
+    disabled = create_mailing(
+        message,
+        recipient,
+        now - timezone.timedelta(days=2),
+        now - timezone.timedelta(days=1),
+        status=MailingStatus.DISABLED,
+    )
+    for mailing in (expired[1], active):
+        OutboxEntry.objects.create(mailing=mailing, recipient=recipient)
+
+    out = StringIO()
+    call_command("sweep_mailings", batch_size=2, stdout=out)
+
+    assert "Завершено истёкших рассылок: 3" in out.getvalue()
+    assert set(Mailing.objects.filter(status=MailingStatus.COMPLETED)) == set(
+        expired
+    )
+    assert Mailing.objects.get(pk=active.pk).status == MailingStatus.CREATED
+    assert Mailing.objects.get(pk=disabled.pk).status == (
+        MailingStatus.DISABLED
+    )
+    assert OutboxEntry.objects.get(mailing=expired[1]).status == (
+        OutboxStatus.FAILED
+    )
+    assert OutboxEntry.objects.get(mailing=active).status == (
+        OutboxStatus.PENDING
+    )
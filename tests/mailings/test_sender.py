@@ -0,0 +1,179 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.utils import timezone
+
+from mailings.constants import MailingStatus, OutboxStatus
+from mailings.models import Mailing, OutboxEntry, Recipient, SenderWorker
+from mailings.sender import SenderProcess
+
+
+@pytest.fixture
+def mailing(user, message):
+    """Рассылка на несколько получателей с готовой очередью."""
+    mailing = Mailing.objects.create(
+        start_time=timezone.now(),
+        end_time=timezone.now() + timezone.timedelta(days=1),
+        message=message,
+        owner=user,
+    )
+    mailing.recipients.set(
+        Recipient.objects.create(
+            email=f"recipient{index}@example.com",
+            last_name="Иванов",
+            first_name="Иван",
+            owner=user,
+        )
+        for index in range(5)
+    )
+    OutboxEntry.objects.materialize(mailing, batch_size=10)
+    return mailing
+
+
+def in_seconds(seconds: float):
+    return timezone.now() + timezone.timedelta(seconds=seconds)
+
+
+@pytest.mark.django_db
+class TestSenderLeases:
+
+    def test_take_batch_leases_entries(self, mailing):
+        """Пачка арендуется отправителем и не выдаётся повторно."""
+        sender = SenderWorker.objects.register()
+        lease_until = in_seconds(60)
+
+        first = OutboxEntry.objects.take_batch(
+            mailing, 0, 3, lease_until=lease_until, sender=sender
+        )
+        second = OutboxEntry.objects.take_batch(
+            mailing, 0, 3, lease_until=in_seconds(60)
+        )
+
+        assert len(first) == 3
+        assert len(second) == 2
+        assert not {entry.pk for entry in first} & {
+            entry.pk for entry in second
+        }
+        assert set(sender.leases.values_list("status", flat=True)) == {
+            OutboxStatus.SENDING
+        }
+        assert sender.leases.get(pk=first[0].pk).lease_expires_at == (
+            lease_until
+        )
+
+    def test_take_batch_skips_entries_taken_concurrently(
+        self, mailing, mocker
+    ):
+        """Письма, забранные другим отправителем после SELECT, не выдаются."""
+        other = SenderWorker.objects.register()
+        lease = OutboxEntry.objects._lease
+
+        def lease_after_other(entries, lease_until, sender):
+            OutboxEntry.objects.filter(pk=entries[0].pk).update(
+                status=OutboxStatus.SENDING, leased_by=other
+            )
+            return lease(entries, lease_until, sender)
+
+        mocker.patch.object(
+            OutboxEntry.objects, "_lease", side_effect=lease_after_other
+        )
+        entries = OutboxEntry.objects.take_batch(
+            mailing, 0, 5, lease_until=in_seconds(60)
+        )
+
+        assert len(entries) == 4
+        assert other.leases.count() == 1
+
+    def test_heartbeat_extends_leases(self, mailing):
+        """Сигнал жизни продлевает захваты и аренды отправителя."""
+        sender = SenderWorker.objects.register()
+        assert mailing._claim(sender)
+        mailing._take_batch(0)
+        lease_until = in_seconds(120)
+
+        assert SenderWorker.objects.heartbeat(sender, lease_until)
+
+        mailing.refresh_from_db()
+        assert mailing.claimed_until == lease_until
+        assert set(
+            sender.leases.values_list("lease_expires_at", flat=True)
+        ) == {lease_until}
+
+    def test_dead_sender(self, mailing):
+        """Удалённого из реестра отправителя подхватывает другой."""
+        sender = SenderWorker.objects.register()
+        assert mailing._claim(sender)
+        SenderWorker.objects.filter(pk=sender.pk).update(
+            heartbeat_at=timezone.now() - timezone.timedelta(minutes=5)
+        )
+        Mailing.objects.filter(pk=mailing.pk).update(
+            claimed_until=timezone.now() - timezone.timedelta(seconds=1)
+        )
+
+        assert list(SenderWorker.objects.dead(60)) == [sender]
+
+        SenderWorker.objects.dead(60).delete()
+
+        assert not SenderWorker.objects.heartbeat(sender, in_seconds(60))
+        assert Mailing.objects.get(pk=mailing.pk)._claim()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sender_process_sends_due_mailings(mailing, mailoutbox):
+    """Отправитель отправляет подошедшие рассылки и уходит из реестра."""
+    sender = SenderProcess(concurrency=1, heartbeat_interval=60)
+    worker = sender.start()
+    stale = SenderWorker.objects.create(
+        name="stale",
+        hostname="stale",
+        pid=1,
+        heartbeat_at=timezone.now() - timezone.timedelta(hours=1),
+    )
+
+    assert sender.poll() == [mailing.pk]
+
+    sender.shutdown()
+    mailing.refresh_from_db()
+
+    assert len(mailoutbox) == 5
+    assert mailing.status == MailingStatus.COMPLETED
+    assert mailing.claimed_by is None
+    assert not SenderWorker.objects.filter(pk__in=(worker.pk, stale.pk))
+
+
+@pytest.mark.multiprocess
+def test_sender_harness(tmp_path):
+    """
+    Несколько процессов-отправителей на общей базе, один убит SIGKILL.
+
+    Ни один получатель не получает письмо дважды и не остаётся
+    без письма или записи о прерванной отправке. Без письма после
+    прерывания остаются только получатели, письма которым убитый
+    процесс передавал серверу, — не больше одного на SMTP-сессию.
+    """
+    env = {**os.environ, "DB_NAME": str(tmp_path / "db.sqlite3")}
+    manage = [sys.executable, str(settings.BASE_DIR / "manage.py")]
+
+    subprocess.run([*manage, "migrate", "-v0"], env=env, check=True)
+    harness = subprocess.run(
+        [*manage, "sender_harness", "--recipients", "60"],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=180,
+    )
+
+    assert harness.returncode == 0, harness.stderr
+    result = json.loads(harness.stdout)
+    assert result["killed_pid"]
+    assert result["duplicates"] == result["lost"] == 0
+    assert (
+        result["interrupted_not_delivered"]
+        <= result["sessions"] * result["batch_size"]
+    )
+    assert result["interrupted_not_delivered"] <= result["interrupted"]
+    assert result["unfinished"] == 0
@@ -0,0 +1,99 @@
+import json
+import smtplib
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from mailings.constants import OutboxStatus
+from mailings.models import Mailing, Recipient
+
+
+def send(port, count=1):
+    with smtplib.SMTP("127.0.0.1", port, timeout=5) as client:
+        for index in range(count):
+            client.sendmail(
+                "from@example.com",
+                [f"to{index}@example.com"],
+                b"Subject: Test\r\n\r\nBody",
+            )
+
+
+class TestSMTPSink:
+
+    def test_stats(self, smtp_sink):
+        """Приёмник считает сессии, письма, получателей и байты."""
+        sink = smtp_sink()
+
+        send(sink.port, count=3)
+
+        stats = sink.stats.as_dict()
+        assert stats["sessions"] == 1
+        assert stats["messages"] == stats["recipients"] == 3
+        assert stats["bytes"] == 3 * len(b"Subject: Test\r\n\r\nBody\r\n")
+
+    @pytest.mark.parametrize(
+        ("options", "error", "counter"),
+        [
+            ({"temp_fail_rate": 1}, smtplib.SMTPDataError, "temp_failures"),
+            ({"perm_fail_rate": 1}, smtplib.SMTPDataError, "perm_failures"),
+            ({"drop_rate": 1}, smtplib.SMTPServerDisconnected, "drops"),
+        ],
+    )
+    def test_fault_injection(self, smtp_sink, options, error, counter):
+        """Сбои внедряются с заданной частотой и учитываются."""
+        sink = smtp_sink(**options)
+
+        with pytest.raises(error):
+            send(sink.port)
+
+        assert getattr(sink.stats, counter) == 1
+        assert sink.stats.messages == 0
+
+
+@pytest.mark.django_db
+def test_send_mailing_with_temporary_failures(
+    smtp_sink, settings, user, message
+):
+    """Временные сбои сервера ставят письма на повтор, а не теряют их."""
+    sink = smtp_sink(temp_fail_rate=0.5, seed=1)
+    settings.EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+    settings.EMAIL_HOST = "127.0.0.1"
+    settings.EMAIL_PORT = sink.port
+    settings.EMAIL_USE_SSL = False
+    settings.EMAIL_TIMEOUT = 5
+    mailing = Mailing.objects.create(
+        start_time=timezone.now(),
+        end_time=timezone.now() + timezone.timedelta(days=1),
+        message=message,
+        owner=user,
+    )
+    mailing.recipients.set(
+        Recipient.objects.create(
+            email=f"user{index}@example.com",
+            last_name="Иванов",
+            first_name="Иван",
+            owner=user,
+        )
+        for index in range(20)
+    )
+
+    mailing.send_mailing()
+
+    sent = mailing.outbox.filter(status=OutboxStatus.SENT).count()
+    pending = mailing.outbox.filter(status=OutboxStatus.PENDING).count()
+    assert sent == sink.stats.messages
+    assert pending == sink.stats.temp_failures > 0
+    assert sent + pending == 20
+
+
+def test_run_smtp_sink_command():
+    """Команда запускает приёмник и выводит статистику."""
+    out = StringIO()
+
+    call_command("run_smtp_sink", port=0, duration=0.1, stdout=out)
+
+    lines = out.getvalue().splitlines()
+    assert "слушает 127.0.0.1:" in lines[0]
+    assert json.loads(lines[-1])["messages"] == 0
@@ -0,0 +1,172 @@
+import subprocess
+
+import pytest
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+
+from mailings.delivery import SpoolEmailBackend, SpoolFlusher, smtp_pools
+from mailings.delivery.spool import (
+    ACK,
+    SpoolWriter,
+    encode_record,
+    read_records,
+)
+
+
+@pytest.fixture
+def spool_settings(settings, smtp_sink, tmp_path):
+    """Спул во временном каталоге и SMTPSink для его отправки."""
+
+    def _configure(**kwargs):
+        server = smtp_sink(**kwargs)
+        settings.MAILING_SPOOL_DIR = str(tmp_path)
+        settings.EMAIL_HOST = "127.0.0.1"
+        settings.EMAIL_PORT = server.port
+        settings.EMAIL_USE_SSL = False
+        settings.EMAIL_HOST_PASSWORD = ""
+        return server
+
+    yield _configure
+    smtp_pools.clear()
+
+
+def make_records(count: int) -> list[bytes]:
+    return [
+        encode_record(
+            "noreply@example.com",
+            [f"user{index}@example.com"],
+            f"Subject: {index}\r\n\r\nText\r\n".encode(),
+        )
+        for index in range(count)
+    ]
+
+
+def write_segment(directory, count: int):
+    """Записывает закрытый сегмент из `count` писем."""
+    writer = SpoolWriter(directory)
+    writer.append(make_records(count))
+    writer.close()
+    [segment] = directory.glob("*.seg")
+    return segment
+
+
+def test_read_records_skips_torn_tail(tmp_path):
+    """Недописанная последняя запись не читается."""
+    segment = tmp_path / "segment.seg"
+    records = make_records(3)
+    segment.write_bytes(b"".join(records)[:-5])
+
+    messages = [message for _, message in read_records(segment)]
+
+    assert [message.recipients for message in messages] == [
+        ["user0@example.com"],
+        ["user1@example.com"],
+    ]
+
+
+def test_backend_appends_to_spool(tmp_path):
+    """Бэкенд складывает письма в сегмент, а не отправляет их."""
+    backend = SpoolEmailBackend(spool_dir=tmp_path)
+
+    sent = backend.send_messages(
+        [EmailMessage("Тема", "Текст", "noreply@example.com", ["a@b.ru"])]
+    )
+    backend.writer.close()
+    [segment] = tmp_path.glob("*.seg")
+    [(offset, message)] = read_records(segment)
+
+    assert sent == 1
+    assert offset == segment.stat().st_size
+    assert message.from_email == "noreply@example.com"
+    assert message.recipients == ["a@b.ru"]
+    assert b"Subject: =?utf-8?b?" in message.data
+
+
+@pytest.mark.django_db
+def test_flush_resumes_partially_flushed_segment(spool_settings, tmp_path):
+    """Отправка продолжается со смещения, записанного до падения."""
+    server = spool_settings()
+    segment = write_segment(tmp_path, 3)
+    first_end, _ = next(read_records(segment))
+    segment.with_suffix(".ack").write_bytes(ACK.pack(first_end))
+
+    call_command("flush_spool", "--once", spool_dir=str(tmp_path))
+
+    assert [rcpt for _, rcpt, _ in server.messages] == [
+        ["user1@example.com"],
+        ["user2@example.com"],
+    ]
+    assert not list(tmp_path.glob("*.seg"))
+    assert not list(tmp_path.glob("*.ack"))
+
+
+def test_recover_segment_of_crashed_writer(spool_settings, tmp_path):
+    """Сегмент упавшего процесса закрывается, обрывок уходит в dead."""
+    server = spool_settings()
+    process = subprocess.Popen(["true"])
+    process.wait()
+    orphan = tmp_path / f"{0:020d}-{process.pid}-000001.open"
+    orphan.write_bytes(b"".join(make_records(2)) + make_records(1)[0][:10])
+
+    stats = SpoolFlusher(tmp_path).flush()
+
+    assert (stats.recovered, stats.sent, stats.deferred) == (1, 2, False)
+    assert len(server.messages) == 2
+    assert not list(tmp_path.glob("*.open"))
+    assert len(list((tmp_path / "dead").iterdir())) == 1
+
+
+def test_transient_error_keeps_segment(spool_settings, tmp_path):
+    """При временной ошибке сегмент остаётся для следующего прохода."""
+    spool_settings(temp_fail_rate=1.0)
+    segment = write_segment(tmp_path, 2)
+
+    stats = SpoolFlusher(tmp_path).flush()
+
+    assert stats.deferred
+    assert segment.exists()
+    assert segment.with_suffix(".ack").read_bytes() == b""
+
+
+def test_permanent_error_moves_message_to_dead(spool_settings, tmp_path):
+    """Окончательно отклонённые письма переносятся в dead."""
+    spool_settings(perm_fail_rate=1.0)
+    segment = write_segment(tmp_path, 2)
+
+    stats = SpoolFlusher(tmp_path).flush()
+
+    assert (stats.sent, stats.dead, stats.deferred) == (0, 2, False)
+    assert not segment.exists()
+    assert len(list(read_records(tmp_path / "dead" / segment.name))) == 2
+
+
+def test_refused_recipients_move_to_dead(spool_settings, tmp_path):
+    """Отклонённые адреса принятого письма переносятся в dead."""
+    server = spool_settings(rejected={"user1@example.com"})
+    writer = SpoolWriter(tmp_path)
+    writer.append(
+        [
+            encode_record(
+                "noreply@example.com",
+                ["user0@example.com", "user1@example.com"],
+                b"Subject: 0\r\n\r\nText\r\n",
+            )
+        ]
+    )
+    writer.close()
+    [segment] = tmp_path.glob("*.seg")
+
+    stats = SpoolFlusher(tmp_path).flush()
+
+    assert (stats.sent, stats.dead) == (1, 1)
+    assert [rcpt for _, rcpt, _ in server.messages] == [["user0@example.com"]]
+    [(_, dead)] = read_records(tmp_path / "dead" / segment.name)
+    assert dead.recipients == ["user1@example.com"]
+
+
+def test_second_flusher_is_locked_out(tmp_path):
+    """Спул одновременно отправляет только один процесс."""
+    flusher = SpoolFlusher(tmp_path)
+
+    assert flusher.lock()
+    assert not SpoolFlusher(tmp_path).lock()
@@ -0,0 +1,119 @@
+import timeit
+from types import SimpleNamespace
+
+import pytest
+from django.core import mail
+from django.template import Context, Template
+from django.utils import timezone
+
+from mailings.delivery import CompiledTemplate, MessageTemplate, templates
+from mailings.delivery.templates import TemplateCache
+from mailings.models import Mailing, Recipient
+
+RECIPIENT = SimpleNamespace(
+    email="ivanov@example.com",
+    first_name="Иван",
+    last_name="Иванов",
+    patronymic="",
+    full_name="Иванов Иван",
+)
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Здравствуйте, {{ first_name }}!", "Здравствуйте, Иван!"),
+        ("{{full_name}} <{{ email }}>", "Иванов Иван <ivanov@example.com>"),
+        ("Без полей", "Без полей"),
+        ("{{ unknown }} и {{ first_name }}", "{{ unknown }} и Иван"),
+    ],
+)
+def test_compiled_template_render(text, expected):
+    """Поля получателя подставляются, неизвестные остаются как есть."""
+    assert CompiledTemplate(text).render(RECIPIENT) == expected
+
+
+def test_render_batch_skips_static_message():
+    """Неперсонализированное сообщение не рендерится для получателей."""
+    template = MessageTemplate("Тема", "Тело")
+    recipients = [object(), object()]
+
+    assert template.is_personalized is False
+    assert template.render_batch(recipients) == [("Тема", "Тело")] * 2
+
+
+def test_template_cache_checks_content_hash():
+    """Изменённое содержимое компилируется заново, прежнее — из кеша."""
+    cache = TemplateCache(max_size=2)
+    template = cache.get(1, "Тема", "Тело")
+
+    assert cache.get(1, "Тема", "Тело") is template
+    assert cache.get(1, "Тема", "Новое тело") is not template
+
+    cache.get(2, "Тема", "Тело")
+    cache.get(3, "Тема", "Тело")
+    assert 1 not in cache
+
+
+@pytest.mark.django_db
+class TestPersonalization:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, user, message, recipient):
+        """Создание рассылки с персонализированным сообщением."""
+        message.subject = "{{ first_name }}, для вас новости"
+        message.body = "Уважаемый {{ full_name }}!"
+        message.save()
+        self._message = message
+        self._mailing = Mailing.objects.create(
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(days=1),
+            message=message,
+            owner=user,
+        )
+        self._mailing.recipients.add(
+            recipient,
+            Recipient.objects.create(
+                email="petrov@example.com",
+                last_name="Петров",
+                first_name="Пётр",
+                patronymic="Петрович",
+                owner=user,
+            ),
+        )
+
+    def test_send_mailing_personalizes_messages(self):
+        """Каждый получатель получает письмо со своими данными."""
+        self._mailing.send_mailing()
+
+        sent = {message.to[0]: message for message in mail.outbox}
+        assert sent["recipient@example.com"].subject == (
+            "Иван, для вас новости"
+        )
+        assert sent["petrov@example.com"].body == (
+            "Уважаемый Петров Пётр Петрович!"
+        )
+
+    def test_message_save_invalidates_template(self):
+        """Сохранение сообщения удаляет его шаблон из кеша."""
+        self._message.get_template()
+        assert self._message.pk in templates
+
+        self._message.save()
+
+        assert self._message.pk not in templates
+
+
+@pytest.mark.benchmark
+def test_compiled_template_benchmark():
+    """Скомпилированный шаблон быстрее создания `Template` на получателя."""
+    text = "Здравствуйте, {{ first_name }}!\n" + "Текст письма. " * 100
+    compiled = MessageTemplate("Новости", text)
+    context = Context(vars(RECIPIENT), autoescape=False)
+
+    per_recipient = timeit.timeit(
+        lambda: Template(text).render(context), number=500
+    )
+    cached = timeit.timeit(lambda: compiled.render(RECIPIENT), number=500)
+
+    assert cached < per_recipient
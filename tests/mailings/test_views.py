@@ -4,7 +4,7 @@ import pytest
 from django.urls import reverse
 from django.utils import timezone
 
-from mailings.constants import MailingStatus
+from mailings.constants import JobStatus, MailingStatus
 from mailings.models import Mailing, Message, Recipient
 
 
@@ -155,19 +155,26 @@ class TestMailingViews:
         assert response.context["mailing"] == self.mailing
 
     def test_mailing_detail_view_post(self):
-        """Проверка отправки рассылки."""
+        """Проверка постановки рассылки в очередь на отправку."""
         self.client.login(email="user@example.com", password="pass123")
-
-        response = self.client.post(
-            reverse(
-                "mailings:mailing_detail",
-                kwargs={"pk": self.mailing.pk},
-            )
+        url = reverse(
+            "mailings:mailing_detail",
+            kwargs={"pk": self.mailing.pk},
         )
 
+        response = self.client.post(url)
+        self.client.post(url)
+
         assert response.status_code == HTTPStatus.FOUND
         self.mailing.refresh_from_db()
-        assert self.mailing.status == MailingStatus.COMPLETED
+        assert self.mailing.status == MailingStatus.CREATED
+        assert self.mailing.jobs.get().status == JobStatus.QUEUED
+
+        response = self.client.get(url)
+
+        assert response.context["job"].status == JobStatus.QUEUED
+        assert "В очереди" in response.content.decode()
+        assert "Отправить сейчас" not in response.content.decode()
 
     def test_disable_mailing_view_get_manager(self):
         """
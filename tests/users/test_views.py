@@ -8,6 +8,7 @@ from django.core import mail
 from django.urls import reverse
 from django.utils import timezone
 
+from mailings.delivery.spool import get_spool_writer, read_records
 from users.models import EmailVerificationToken, User
 
 
@@ -33,7 +34,7 @@ def test_register_view_get(client):
 @pytest.mark.django_db
 def test_register_view_post_valid(client, mocker):
     """Проверка успешной регистрации."""
-    mocker.patch("django.core.mail.send_mail")
+    mocker.patch("users.views.send_mail")
     data = {
         "email": "newuser@example.com",
         "username": "newuser",
@@ -52,6 +53,32 @@ def test_register_view_post_valid(client, mocker):
     assert len(mail.outbox) == 0
 
 
+@pytest.mark.django_db
+def test_password_reset_spools_email(client, settings, tmp_path):
+    """Письмо сброса пароля складывается в спул, а не отправляется."""
+    settings.TRANSACTIONAL_EMAIL_BACKEND = (
+        "mailings.delivery.SpoolEmailBackend"
+    )
+    settings.MAILING_SPOOL_DIR = str(tmp_path)
+    User.objects.create_user(
+        email="test@example.com",
+        username="testuser",
+        password="testpass123",
+        is_active=True,
+    )
+
+    response = client.post(
+        reverse("users:password_reset"), {"email": "test@example.com"}
+    )
+    get_spool_writer(tmp_path).close()
+    [segment] = tmp_path.glob("*.seg")
+    [(_, message)] = read_records(segment)
+
+    assert response.status_code == HTTPStatus.FOUND
+    assert message.recipients == ["test@example.com"]
+    assert len(mail.outbox) == 0
+
+
 @pytest.mark.django_db
 def test_register_view_post_invalid(client):
     """Проверка регистрации с некорректными данными."""
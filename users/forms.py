@@ -1,5 +1,11 @@
+from django.conf import settings
+from django.contrib.auth.forms import (
+    PasswordResetForm as BasePasswordResetForm,
+)
 from django.contrib.auth.forms import UserChangeForm as BaseUserChangeForm
 from django.contrib.auth.forms import UserCreationForm as BaseUserCreationForm
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template import loader
 
 from users.models import User
 
@@ -27,3 +33,32 @@ class RegistrationForm(BaseUserCreationForm):
             "password1",
             "password2",
         )
+
+
+class PasswordResetForm(BasePasswordResetForm):
+    """Сброс пароля с письмом через `TRANSACTIONAL_EMAIL_BACKEND`."""
+
+    def send_mail(
+        self,
+        subject_template_name,
+        email_template_name,
+        context,
+        from_email,
+        to_email,
+        html_email_template_name=None,
+    ) -> None:
+        subject = loader.render_to_string(subject_template_name, context)
+        body = loader.render_to_string(email_template_name, context)
+        email_message = EmailMultiAlternatives(
+            "".join(subject.splitlines()),
+            body,
+            from_email,
+            [to_email],
+            connection=get_connection(settings.TRANSACTIONAL_EMAIL_BACKEND),
+        )
+        if html_email_template_name is not None:
+            email_message.attach_alternative(
+                loader.render_to_string(html_email_template_name, context),
+                "text/html",
+            )
+        email_message.send()
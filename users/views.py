@@ -12,7 +12,7 @@ from django.contrib.auth.views import (
     PasswordResetView as BasePasswordResetView,
 )
 from django.core.exceptions import PermissionDenied
-from django.core.mail import send_mail
+from django.core.mail import get_connection, send_mail
 from django.http import (
     HttpResponse,
     HttpResponsePermanentRedirect,
@@ -31,7 +31,7 @@ from django.views.generic import (
     UpdateView,
 )
 
-from users.forms import RegistrationForm, UserChangeForm
+from users.forms import PasswordResetForm, RegistrationForm, UserChangeForm
 from users.models import EmailVerificationToken, User
 from utils.users import is_manager
 
@@ -61,6 +61,7 @@ class RegisterView(CreateView):
             settings.EMAIL_HOST_USER,
             [user.email],
             fail_silently=False,
+            connection=get_connection(settings.TRANSACTIONAL_EMAIL_BACKEND),
         )
 
         return super().form_valid(form)
@@ -134,6 +135,7 @@ class ProfileEditView(LoginRequiredMixin, UpdateView):
 class PasswordResetView(BasePasswordResetView):
     """Сброс пароля."""
 
+    form_class = PasswordResetForm
     template_name = "users/password_reset.html"
     email_template_name = "users/password_reset_email.txt"
     html_email_template_name = "users/password_reset_email.html"